@@ -0,0 +1,128 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks montam um Flask app mínimo (só banco) para não depender do
+MySQL de produção: por padrão usam um SQLite em memória. Com
+BENCH_DATABASE_URL dá para rodar os mesmos dados no MySQL e comparar.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db
+from services.banco import init_banco
+
+
+def criar_app_benchmark(database_url=None):
+    from config import Config
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = (
+        database_url or os.getenv("BENCH_DATABASE_URL") or "sqlite://"
+    )
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = Config.SQLITE_BUSY_TIMEOUT_MS
+    app.config["SQLITE_PRAGMAS"] = Config.SQLITE_PRAGMAS
+    init_banco(app)
+    return app
+
+
+class ContadorSQL:
+    """Conta quantos comandos chegam ao driver (round-trips)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+
+@contextmanager
+def contar_sql():
+    contador = ContadorSQL()
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", contador._antes)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, "before_cursor_execute", contador._antes)
+
+
+@contextmanager
+def cronometro():
+    resultado = {}
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        resultado["segundos"] = time.perf_counter() - inicio
+
+
+def limpar_banco(database_url):
+    """Apaga todas as tabelas do app (inclusive schema_migracoes) em `database_url`."""
+    from sqlalchemy import create_engine
+
+    from migracoes import schema_migracoes
+
+    engine = create_engine(database_url)
+    try:
+        db.metadata.drop_all(engine)
+        schema_migracoes.drop(engine, checkfirst=True)
+    finally:
+        engine.dispose()
+
+
+def criar_app_completo(database_url):
+    """
+    Importa o app de verdade (todos os blueprints) apontando para
+    `database_url` (o mesmo que DATABASE_URL faria), sem o agendador em
+    background. Um processo só: o boot aplica migrações e seed
+    (MIGRAR_AO_INICIAR), então já existem os usuários de login.
+    """
+    import sys
+
+    from config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = database_url
+    Config.AGENDADOR_ATIVO = False
+    Config.MIGRAR_AO_INICIAR = True
+
+    if "app" in sys.modules:
+        app = sys.modules["app"].create_app()
+    else:
+        # o import já executa o create_app() do módulo com a Config acima
+        import app as modulo_app
+
+        app = modulo_app.app
+    return app
+
+
+def login(client, email="barbara@martinica.com", senha="Phlgbabi@10"):
+    resp = client.post(
+        "/auth/login",
+        data={"tipo_login": "admin", "email": email, "senha": senha},
+    )
+    assert resp.status_code == 302, f"login falhou ({resp.status_code})"
+    return client
+
+
+def login_responsavel(client, cpf="52629121844", senha="11992835438"):
+    resp = client.post(
+        "/auth/login",
+        data={"tipo_login": "responsavel", "cpf": cpf, "telefone": senha},
+    )
+    assert resp.status_code == 302, f"login do responsável falhou ({resp.status_code})"
+    return client
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
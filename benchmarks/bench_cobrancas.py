@@ -0,0 +1,93 @@
+"""
+Benchmark do motor de cobrança mensal (services/cobrancas.py).
+
+Mostra que a geração de uma competência inteira usa um número constante
+de comandos SQL, independente da quantidade de planos ativos.
+
+Uso:
+    python -m benchmarks.bench_cobrancas [--tamanhos 1000,10000,50000]
+"""
+import argparse
+from datetime import date
+
+from extensions import db
+from models import Atleta, AtletaPlano, Plano
+from services.cobrancas import gerar_cobrancas_competencia
+
+from benchmarks._comum import criar_app_benchmark, contar_sql, cronometro
+
+
+def _popular(qtd_planos: int):
+    db.drop_all()
+    db.create_all()
+
+    planos = [
+        {"nome": "Mensal", "valor_mensal": 100, "dia_vencimento": 31,
+         "periodicidade_cobranca": "MENSAL", "forma_pagamento_padrao": "PIX", "ativo": True},
+        {"nome": "Trimestral", "valor_mensal": 90, "dia_vencimento": 10,
+         "periodicidade_cobranca": "TRIMESTRAL", "forma_pagamento_padrao": "PIX", "ativo": True},
+    ]
+    db.session.execute(db.insert(Plano), planos)
+
+    db.session.execute(
+        db.insert(Atleta),
+        [
+            {"nome": f"Atleta {i:06d}", "data_nascimento": date(2012, 1, 1), "status": "ATIVO"}
+            for i in range(1, qtd_planos + 1)
+        ],
+    )
+    db.session.execute(
+        db.insert(AtletaPlano),
+        [
+            {"atleta_id": i, "plano_id": 1 if i % 4 else 2,
+             "data_inicio": date(2024, 1, 1), "ativo": True}
+            for i in range(1, qtd_planos + 1)
+        ],
+    )
+    db.session.commit()
+
+
+def executar(tamanhos):
+    app = criar_app_benchmark()
+    resultados = []
+    with app.app_context():
+        for qtd in tamanhos:
+            _popular(qtd)
+
+            with contar_sql() as contador, cronometro() as tempo:
+                criadas = gerar_cobrancas_competencia(2025, 2)
+
+            # segunda execução: nada a criar, só o anti-join
+            with contar_sql() as contador_repeticao:
+                repetidas = gerar_cobrancas_competencia(2025, 2)
+
+            resultados.append(
+                {
+                    "planos_ativos": qtd,
+                    "cobrancas_criadas": criadas,
+                    "comandos_sql": contador.total,
+                    "segundos": round(tempo["segundos"], 3),
+                    "comandos_sql_reexecucao": contador_repeticao.total,
+                    "cobrancas_reexecucao": repetidas,
+                }
+            )
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t]
+    for r in executar(tamanhos):
+        print(
+            f"{r['planos_ativos']:>7} planos | {r['cobrancas_criadas']:>7} criadas | "
+            f"{r['comandos_sql']} comandos SQL | {r['segundos']:.3f}s | "
+            f"reexecução: {r['comandos_sql_reexecucao']} comandos, "
+            f"{r['cobrancas_reexecucao']} criadas"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark do motor de exportação (services/exportacao.py) na exportação do
+financeiro, com cada vez mais linhas de ContaReceber.
+
+Para cada faixa mede tempo, tamanho do arquivo e pico de memória Python
+(tracemalloc) da rota /financeiro/exportar, consumindo a resposta inteira.
+Em streaming (CSV) o pico deve ficar estável com o aumento das linhas; no
+XLSX (openpyxl write-only) cresce só com o tamanho do arquivo compactado.
+
+Uso:
+    python -m benchmarks.bench_exportacao
+    python -m benchmarks.bench_exportacao --faixas 100000 --formatos excel
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from extensions import db
+from models import Atleta, ContaReceber
+
+from benchmarks._comum import criar_app_completo, login
+from benchmarks.gerador import LOTE, gerar_dados
+
+
+def completar_contas(total: int) -> int:
+    """Insere ContaReceber avulsas (sem competência) até a tabela ter `total` linhas."""
+    existentes = ContaReceber.query.count()
+    atletas = [a for (a,) in db.session.query(Atleta.id).all()]
+    hoje = date.today()
+    faltam = max(0, total - existentes)
+    for inicio in range(0, faltam, LOTE):
+        db.session.execute(
+            db.insert(ContaReceber),
+            [
+                {
+                    "atleta_id": atletas[i % len(atletas)],
+                    "descricao": "Cobrança avulsa bench",
+                    "competencia": None,
+                    "vencimento": hoje - timedelta(days=i % 700),
+                    "valor": 100 + (i % 50),
+                    "status": ("PAGO", "PENDENTE", "ATRASADO")[i % 3],
+                    "metodo_pagamento": "PIX",
+                }
+                for i in range(inicio, min(faltam, inicio + LOTE))
+            ],
+        )
+    db.session.commit()
+    return ContaReceber.query.count()
+
+
+def _baixar(client, url):
+    # sem buffer: consome bloco a bloco, como o navegador
+    resp = client.get(url, buffered=False)
+    tamanho = sum(len(bloco) for bloco in resp.response)
+    resp.close()
+    return resp.status_code, tamanho
+
+
+def medir(client, url) -> dict:
+    """Tempo numa execução sem tracemalloc (que deixa tudo mais lento); memória em outra."""
+    inicio = time.perf_counter()
+    status, tamanho = _baixar(client, url)
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    _baixar(client, url)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "status": status,
+        "segundos": round(segundos, 2),
+        "tamanho_kb": round(tamanho / 1024, 1),
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--faixas", default="10000,100000")
+    parser.add_argument("--formatos", default="csv,excel")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_exportacao_")
+    app = criar_app_completo(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+    app.logger.getChild("sql").setLevel(logging.ERROR)
+    with app.app_context():
+        gerar_dados(500, meses_financeiro=1)
+
+    client = login(app.test_client())
+    formatos = [f for f in args.formatos.split(",") if f]
+
+    print(f"{'linhas':>8} {'formato':<7} {'tempo':>8} {'arquivo':>12} {'pico memória':>14}")
+    for faixa in sorted(int(f) for f in args.faixas.split(",") if f):
+        with app.app_context():
+            linhas = completar_contas(faixa)
+        for formato in formatos:
+            r = medir(client, f"/financeiro/exportar?formato={formato}")
+            print(
+                f"{linhas:>8} {formato:<7} {r['segundos']:>7.2f}s {r['tamanho_kb']:>10.1f}KB "
+                f"{r['pico_memoria_kb']:>12.1f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
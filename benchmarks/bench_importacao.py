@@ -0,0 +1,117 @@
+"""
+Relatório de importação do worker: tempo de `import app` (via
+`python -X importtime`), memória residente (RSS) depois do boot e quais
+pacotes mais pesam.
+
+Também confere que as bibliotecas de exportação (openpyxl, python-docx,
+reportlab) NÃO são carregadas no boot: elas só devem ser importadas quando
+alguém exporta um arquivo (services/exportacao.py). Sai com código 1 se
+alguma delas aparecer.
+
+Uso:
+    python -m benchmarks.bench_importacao
+    python -m benchmarks.bench_importacao --top 25
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# só podem ser carregadas sob demanda
+PROIBIDAS_NO_BOOT = ("pandas", "docx", "reportlab", "openpyxl")
+
+CODIGO_WORKER = r"""
+import json, sys, time
+inicio = time.perf_counter()
+import app
+segundos = time.perf_counter() - inicio
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for linha in f:
+        if linha.startswith("VmRSS:"):
+            rss_kb = int(linha.split()[1])
+print(json.dumps({
+    "segundos": segundos,
+    "rss_kb": rss_kb,
+    "modulos": sorted({m.split(".")[0] for m in sys.modules}),
+}))
+"""
+
+_RE_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def medir_importacao() -> dict:
+    pasta = tempfile.mkdtemp(prefix="bench_import_")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(pasta, 'boot.db')}",
+        AGENDADOR_ATIVO="0",
+        MIGRAR_AO_INICIAR="1",
+    )
+    # um boot antes para migrar o banco; o medido só confere as versões
+    subprocess.run([sys.executable, "-c", "import app"], cwd=RAIZ, env=env, capture_output=True, check=True)
+    env["MIGRAR_AO_INICIAR"] = "0"
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO_WORKER],
+        cwd=RAIZ,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    dados = json.loads(resultado.stdout.strip().splitlines()[-1])
+
+    # importtime lista os filhos antes do pai (recuo = profundidade). Monta a
+    # árvore e soma o cumulativo de cada subárvore no pacote dela, sempre que
+    # o pacote muda em relação ao pai (ex.: app -> routes -> pandas).
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        m = _RE_IMPORTTIME.match(linha)
+        if m:
+            linhas.append((len(m.group(3)) // 2, m.group(4), int(m.group(2))))
+
+    por_pacote = {}
+    pendentes = []  # (profundidade, pacote, cumulativo) ainda sem pai
+    for profundidade, modulo, cumulativo_us in linhas:
+        pacote = modulo.split(".")[0]
+        while pendentes and pendentes[-1][0] > profundidade:
+            _, filho, us = pendentes.pop()
+            if filho != pacote:
+                por_pacote[filho] = por_pacote.get(filho, 0) + us
+        pendentes.append((profundidade, pacote, cumulativo_us))
+    for _, pacote, us in pendentes:
+        por_pacote[pacote] = por_pacote.get(pacote, 0) + us
+
+    dados["por_pacote_ms"] = {
+        p: round(us / 1000, 1)
+        for p, us in sorted(por_pacote.items(), key=lambda i: i[1], reverse=True)
+    }
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    dados = medir_importacao()
+    print(f"import app:  {dados['segundos'] * 1000:.1f} ms")
+    print(f"RSS no boot: {dados['rss_kb'] / 1024:.1f} MB")
+    print(f"\nPacotes mais pesados (importtime cumulativo, top {args.top}):")
+    for pacote, ms in list(dados["por_pacote_ms"].items())[: args.top]:
+        print(f"  {pacote:<30} {ms:>9.1f} ms")
+
+    carregadas = [p for p in PROIBIDAS_NO_BOOT if p in dados["modulos"]]
+    if carregadas:
+        print(f"\nFALHA: carregadas no boot: {', '.join(carregadas)}")
+        sys.exit(1)
+    print("\nOK: bibliotecas de exportação não são carregadas no boot.")
+
+
+if __name__ == "__main__":
+    main()
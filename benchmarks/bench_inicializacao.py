@@ -0,0 +1,104 @@
+"""
+Benchmark de inicialização do worker: tempo de `import app` (que executa o
+create_app()) num processo Python novo, como um worker do gunicorn sem
+preload.
+
+Compara:
+- MIGRAR_AO_INICIAR=0 (padrão): só confere que não há migração pendente
+  (o deploy rodou `flask banco migrar` antes);
+- MIGRAR_AO_INICIAR=1 (desenvolvimento): aplica as pendentes + seed no
+  create_app.
+
+Em dois cenários: banco já pronto (restart comum) e banco vazio (primeiro
+boot, quando o seed calcula os hashes de senha). Banco vazio só existe no
+primeiro modo: com MIGRAR_AO_INICIAR=0 o boot recusa subir.
+
+Uso:
+    python -m benchmarks.bench_inicializacao --repeticoes 10
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks._comum import percentil
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO_WORKER = r"""
+import json, time
+inicio = time.perf_counter()
+import app
+print(json.dumps({"segundos": time.perf_counter() - inicio}))
+"""
+
+# com MIGRAR_AO_INICIAR=1 o próprio boot aplica as migrações e o seed
+CODIGO_PREPARAR = "import app"
+
+
+def _rodar(codigo, database_url, migrar_ao_iniciar=False) -> str:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        AGENDADOR_ATIVO="0",
+        MIGRAR_AO_INICIAR="1" if migrar_ao_iniciar else "0",
+    )
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=RAIZ,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return resultado.stdout.strip().splitlines()[-1]
+
+
+def medir(modelo_banco, migrar_ao_iniciar, repeticoes, pasta) -> dict:
+    """Mede `repeticoes` boots, cada um num processo novo e numa cópia do banco modelo."""
+    tempos = []
+    for i in range(repeticoes):
+        arquivo = os.path.join(pasta, f"boot-{i}.db")
+        shutil.copyfile(modelo_banco, arquivo)
+        saida = _rodar(CODIGO_WORKER, f"sqlite:///{arquivo}", migrar_ao_iniciar)
+        tempos.append(json.loads(saida)["segundos"] * 1000)
+        os.remove(arquivo)
+    return {
+        "p50_ms": round(percentil(tempos, 50), 1),
+        "p95_ms": round(percentil(tempos, 95), 1),
+        "min_ms": round(min(tempos), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_boot_")
+    try:
+        vazio = os.path.join(pasta, "vazio.db")
+        open(vazio, "wb").close()
+
+        pronto = os.path.join(pasta, "pronto.db")
+        _rodar(CODIGO_PREPARAR, f"sqlite:///{pronto}", migrar_ao_iniciar=True)
+
+        print(f"{'cenário':<14} {'boot':<9} {'p50':>10} {'p95':>10} {'mín':>10}")
+        for cenario, modelo in (("banco pronto", pronto), ("banco vazio", vazio)):
+            for rotulo, migrar in (("migrar", True), ("conferir", False)):
+                if cenario == "banco vazio" and not migrar:
+                    continue
+                r = medir(modelo, migrar, args.repeticoes, pasta)
+                print(
+                    f"{cenario:<14} {rotulo:<9} {r['p50_ms']:>8.1f}ms "
+                    f"{r['p95_ms']:>8.1f}ms {r['min_ms']:>8.1f}ms"
+                )
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark de todas as rotas dos blueprints, por faixa de tamanho.
+
+Para cada faixa (quantidade de atletas) monta um banco novo (SQLite em WAL
+por padrão, ou o banco de --database-url, que é apagado antes) com o
+gerador sintético (benchmarks/gerador.py), sobe o app de verdade e chama
+cada rota pelo test client do Flask, medindo:
+
+- latência p50/p95 (ms) e da primeira chamada (cache frio; as seguintes
+  pegam os indicadores em cache, ver services/cache_dados.py);
+- quantidade de consultas SQL por requisição;
+- pico de memória alocada em Python (tracemalloc), numa execução à parte.
+
+O resultado vai para um JSON (um arquivo por execução) para comparar
+versões.
+
+Uso:
+    python -m benchmarks.bench_rotas --faixas 10000,100000
+    python -m benchmarks.bench_rotas --faixas 2000 --repeticoes 3 --rotas atletas,financeiro
+    python -m benchmarks.bench_rotas --faixas 10000 --database-url mysql+pymysql://u:s@localhost/bench
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from extensions import db
+from models import Atividade, Atleta, Grupo
+from services.instrumentacao_sql import registrar_consultas
+
+from benchmarks._comum import (
+    criar_app_completo,
+    limpar_banco,
+    login,
+    login_responsavel,
+    percentil,
+)
+from benchmarks.gerador import gerar_dados
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+# Exportações em PDF/Word ficam de fora nas faixas grandes (muito lentas),
+# a não ser com --incluir-pesadas.
+LIMITE_ROTAS_PESADAS = 20000
+
+
+def rotas(ids):
+    """(nome, perfil, url, pesada) de cada rota GET a medir."""
+    atleta_id, grupo_id, atividade_id = ids["atleta"], ids["grupo"], ids["atividade"]
+    lista = [
+        ("dashboard.index", "admin", "/", False),
+        ("dashboard.index[parent]", "parent", "/", False),
+        ("atletas.listar", "admin", "/atletas/listar", False),
+        ("atletas.listar[nome]", "admin", "/atletas/listar?nome=Araujo", False),
+        ("atletas.listar[idade]", "admin", "/atletas/listar?idade=12", False),
+        ("atletas.listar[docs]", "admin", "/atletas/listar?docs=pendente", False),
+        ("atletas.listar[parent]", "parent", "/atletas/listar", False),
+        ("atletas.novo", "admin", "/atletas/novo", False),
+        ("atletas.editar", "admin", f"/atletas/{atleta_id}/editar", False),
+        ("grupos.listar", "admin", "/grupos/listar", False),
+        ("grupos.novo", "admin", "/grupos/novo", False),
+        ("grupos.editar", "admin", f"/grupos/{grupo_id}/editar", False),
+        ("planos.listar", "admin", "/planos/", False),
+        ("atividades.listar", "admin", "/atividades/listar", False),
+        ("atividades.nova", "admin", "/atividades/nova", False),
+        ("atividades.presencas", "admin", f"/atividades/{atividade_id}/presencas", False),
+        ("financeiro.resumo", "admin", "/financeiro/resumo", False),
+        ("financeiro.resumo[inadimplentes]", "admin", "/financeiro/resumo?inadimplentes=1", False),
+        ("financeiro.resumo[nome]", "admin", "/financeiro/resumo?nome=Silva", False),
+        ("financeiro.resumo_responsavel", "parent", "/financeiro/responsavel", False),
+        ("financeiro.nova_cobranca", "admin", "/financeiro/cobranca/nova", False),
+        ("financeiro.nova_despesa", "admin", "/financeiro/despesa/nova", False),
+        ("usuarios_sistema.listar", "admin", "/usuarios-sistema/", False),
+        ("ia.index", "admin", "/ia/", False),
+    ]
+    for formato in ("csv", "excel", "pdf", "word"):
+        pesada = formato in ("pdf", "word")
+        lista += [
+            (f"atletas.exportar[{formato}]", "admin", f"/atletas/exportar?formato={formato}", pesada),
+            (f"grupos.exportar[{formato}]", "admin", f"/grupos/exportar?formato={formato}", pesada),
+            (f"grupos.exportar_grupo[{formato}]", "admin",
+             f"/grupos/{grupo_id}/exportar?formato={formato}", pesada),
+            (f"financeiro.exportar[{formato}]", "admin",
+             f"/financeiro/exportar?formato={formato}", pesada),
+        ]
+    return lista
+
+
+def _ids_exemplo():
+    atividade = Atividade.query.order_by(Atividade.id.desc()).first()
+    return {
+        "atleta": db.session.query(db.func.max(Atleta.id)).scalar(),
+        "grupo": db.session.query(db.func.max(Grupo.id)).scalar(),
+        "atividade": atividade.id if atividade else 1,
+    }
+
+
+def _medir(client, url, repeticoes):
+    latencias, consultas, status = [], [], None
+    for _ in range(repeticoes):
+        with client.application.app_context(), registrar_consultas() as registro:
+            inicio = time.perf_counter()
+            resp = client.get(url)
+            resp.get_data()  # consome respostas em streaming
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(registro.consultas)
+        status = resp.status_code
+
+    tracemalloc.start()
+    client.get(url).get_data()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "primeira_ms": round(latencias[0], 2),
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p95_ms": round(percentil(latencias, 95), 2),
+        "consultas": max(consultas),
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def executar_faixa(atletas, repeticoes, filtro_rotas, incluir_pesadas, database_url=None):
+    if database_url:
+        limpar_banco(database_url)
+    else:
+        pasta = tempfile.mkdtemp(prefix="bench_rotas_")
+        database_url = f"sqlite:///{os.path.join(pasta, 'bench.db')}"
+    app = criar_app_completo(database_url)
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        volumes = gerar_dados(atletas)
+        tempo_geracao = time.perf_counter() - inicio
+        ids = _ids_exemplo()
+        banco = db.engine.dialect.name
+
+    # o benchmark coleta as consultas sozinho; o log por requisição só polui
+    app.logger.getChild("sql").setLevel(logging.ERROR)
+
+    clientes = {
+        "admin": login(app.test_client()),
+        "parent": login_responsavel(app.test_client()),
+    }
+
+    resultados = {}
+    for nome, perfil, url, pesada in rotas(ids):
+        if filtro_rotas and not any(f in nome for f in filtro_rotas):
+            continue
+        if pesada and atletas > LIMITE_ROTAS_PESADAS and not incluir_pesadas:
+            continue
+        reps = 1 if pesada else repeticoes
+        resultados[nome] = {"url": url, **_medir(clientes[perfil], url, reps)}
+        r = resultados[nome]
+        print(
+            f"  {nome:<40} {r['status']} 1a={r['primeira_ms']:>9.1f}ms "
+            f"p50={r['p50_ms']:>9.1f}ms p95={r['p95_ms']:>9.1f}ms "
+            f"sql={r['consultas']:>5} pico={r['pico_memoria_kb']:>10.1f}KB"
+        )
+
+    return {
+        "atletas": atletas,
+        "banco": banco,
+        "volumes": volumes,
+        "tempo_geracao_s": round(tempo_geracao, 2),
+        "repeticoes": repeticoes,
+        "rotas": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--faixas", default="10000,100000")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--rotas", default="", help="filtra rotas pelo nome (separado por vírgula)")
+    parser.add_argument("--incluir-pesadas", action="store_true")
+    parser.add_argument("--saida", default=None, help="arquivo JSON de saída")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="banco a usar (APAGADO a cada faixa); padrão: SQLite temporário",
+    )
+    args = parser.parse_args()
+
+    faixas = [int(f) for f in args.faixas.split(",") if f]
+    filtro = [r for r in args.rotas.split(",") if r]
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "faixas": [],
+    }
+    for atletas in faixas:
+        print(f"== {atletas} atletas ==")
+        relatorio["faixas"].append(
+            executar_faixa(
+                atletas, args.repeticoes, filtro, args.incluir_pesadas, args.database_url
+            )
+        )
+
+    saida = args.saida
+    if not saida:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        saida = os.path.join(
+            PASTA_RESULTADOS, f"rotas-{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Gerador de dados sintéticos para benchmarks.
+
+Cria N atletas com responsáveis, grupos, planos, meses de ContaReceber,
+atividades e presenças, sempre com INSERT em lote e semente fixa (o mesmo
+N gera sempre os mesmos dados). Funciona em qualquer banco suportado.
+
+Uso direto (no banco configurado em BENCH_DATABASE_URL):
+    python -m benchmarks.gerador --atletas 10000
+"""
+import argparse
+import random
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import (
+    Atividade,
+    Atleta,
+    AtletaGrupo,
+    AtletaPlano,
+    AtletaResponsavel,
+    ContaPagar,
+    ContaReceber,
+    Grupo,
+    Plano,
+    Presenca,
+    Responsavel,
+    Usuario,
+)
+from services.busca import reindexar
+from services.cobrancas import ORIGEM_PLANO
+from services.frequencia import recalcular as recalcular_frequencia
+from services.metricas import marcar_historico
+
+SEMENTE_PADRAO = 20240601
+LOTE = 5000
+
+PRIMEIROS_NOMES = [
+    "João", "Maria", "Pedro", "Ana", "Lucas", "Júlia", "Gabriel", "Beatriz", "Rafael",
+    "Larissa", "Matheus", "Sofia", "Enzo", "Helena", "Davi", "Isabela", "Guilherme",
+    "Laura", "Bernardo", "Luíza", "Heitor", "Valentina", "Arthur", "Alice", "Miguel",
+    "Lívia", "Théo", "Cecília", "Samuel", "Lorena",
+]
+SOBRENOMES = [
+    "Silva", "Oliveira", "Costa", "Lima", "Souza", "Rocha", "Santos", "Alves", "Gomes",
+    "Melo", "Nunes", "Cardoso", "Ribeiro", "Fernandes", "Araújo", "Martins", "Barbosa",
+    "Freitas", "Teixeira", "Moraes", "Conceição", "Guimarães", "Simões", "Magalhães",
+]
+POSICOES = ["Goleiro", "Zagueiro", "Lateral", "Volante", "Meia", "Atacante", None]
+
+CATEGORIAS = [(6, 9), (10, 11), (12, 13), (14, 15), (16, 17)]
+
+
+def _proximo_id(modelo) -> int:
+    return (db.session.query(db.func.max(modelo.id)).scalar() or 0) + 1
+
+
+def _inserir(modelo, linhas):
+    for i in range(0, len(linhas), LOTE):
+        db.session.execute(db.insert(modelo), linhas[i:i + LOTE])
+
+
+def _nome(rnd) -> str:
+    return f"{rnd.choice(PRIMEIROS_NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+
+
+def _subtrair_meses(d: date, meses: int) -> date:
+    total = d.year * 12 + (d.month - 1) - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def gerar_dados(
+    atletas: int,
+    meses_financeiro: int = 12,
+    atletas_por_grupo: int = 40,
+    atividades_por_semana: int = 2,
+    semanas_atividades: int = 8,
+    despesas: int = 500,
+    semente: int = SEMENTE_PADRAO,
+    hoje: date = None,
+) -> dict:
+    """
+    Gera a massa de dados e faz commit. Retorna as quantidades criadas.
+    Pode ser chamado num banco que já tem dados (os ids continuam de onde
+    pararam).
+    """
+    rnd = random.Random(semente)
+    hoje = hoje or date.today()
+    agora = datetime.utcnow()
+    senha_hash = generate_password_hash("benchmark")  # um hash só para todos
+
+    qtd_responsaveis = max(1, atletas // 2)
+    qtd_grupos = max(len(CATEGORIAS), atletas // atletas_por_grupo)
+
+    # ---- usuários + responsáveis ----
+    id_usuario = _proximo_id(Usuario)
+    id_resp = _proximo_id(Responsavel)
+    usuarios, responsaveis = [], []
+    for i in range(qtd_responsaveis):
+        nome = _nome(rnd)
+        telefone = f"119{rnd.randrange(10**7, 10**8)}"
+        usuarios.append({
+            "id": id_usuario + i, "nome": nome, "email": f"bench.resp{id_resp + i}@teste.com",
+            "senha_hash": senha_hash, "telefone": telefone, "role": "PARENT", "ativo": True,
+            "criado_em": agora,
+        })
+        responsaveis.append({
+            "id": id_resp + i, "usuario_id": id_usuario + i, "nome": nome,
+            "cpf": f"9{id_resp + i:010d}", "telefone": telefone,
+        })
+    _inserir(Usuario, usuarios)
+    _inserir(Responsavel, responsaveis)
+
+    # ---- grupos ----
+    id_grupo = _proximo_id(Grupo)
+    grupos = []
+    for i in range(qtd_grupos):
+        fmin, fmax = CATEGORIAS[i % len(CATEGORIAS)]
+        grupos.append({
+            "id": id_grupo + i, "nome": f"Sub-{fmax:02d} Turma {i // len(CATEGORIAS) + 1}",
+            "faixa_etaria_min": fmin, "faixa_etaria_max": fmax, "descricao": None,
+        })
+    _inserir(Grupo, grupos)
+    grupos_por_categoria = {}
+    for g in grupos:
+        grupos_por_categoria.setdefault(g["faixa_etaria_max"], []).append(g["id"])
+
+    # ---- planos ----
+    id_plano = _proximo_id(Plano)
+    planos = [
+        {"id": id_plano, "nome": "Bench Mensal", "valor_mensal": 120, "dia_vencimento": 10,
+         "forma_pagamento_padrao": "PIX", "periodicidade_cobranca": "MENSAL", "ativo": True},
+        {"id": id_plano + 1, "nome": "Bench Mensal Fim de Mês", "valor_mensal": 150,
+         "dia_vencimento": 31, "forma_pagamento_padrao": "CREDITO",
+         "periodicidade_cobranca": "MENSAL", "ativo": True},
+        {"id": id_plano + 2, "nome": "Bench Trimestral", "valor_mensal": 100, "dia_vencimento": 5,
+         "forma_pagamento_padrao": "PIX", "periodicidade_cobranca": "TRIMESTRAL", "ativo": True},
+    ]
+    _inserir(Plano, planos)
+
+    # ---- atletas + vínculos ----
+    id_atleta = _proximo_id(Atleta)
+    inicio_planos = _subtrair_meses(hoje, meses_financeiro)
+    lista_atletas, vinc_resp, vinc_grupo, vinc_plano = [], [], [], []
+    plano_do_atleta = {}
+    atletas_do_grupo = {}
+    for i in range(atletas):
+        aid = id_atleta + i
+        resp = responsaveis[i % qtd_responsaveis]
+        idade = rnd.randint(6, 17)
+        nascimento = hoje - timedelta(days=idade * 365 + rnd.randint(0, 364))
+        ativo = rnd.random() < 0.9
+        lista_atletas.append({
+            "id": aid, "nome": _nome(rnd), "cpf": f"8{aid:010d}", "rg": None,
+            "data_nascimento": nascimento, "posicao": rnd.choice(POSICOES),
+            "telefone": resp["telefone"],
+            "validade_atestado": (
+                None if rnd.random() < 0.1 else hoje + timedelta(days=rnd.randint(-120, 365))
+            ),
+            "responsavel_nome": resp["nome"], "responsavel_cpf": resp["cpf"],
+            "responsavel_telefone": resp["telefone"], "responsavel_parentesco": "Responsável",
+            "status": "ATIVO" if ativo else "INATIVO", "criado_em": agora,
+        })
+        vinc_resp.append({"atleta_id": aid, "responsavel_id": resp["id"], "parentesco": "Responsável"})
+
+        categoria = next((fmax for fmin, fmax in CATEGORIAS if fmin <= idade <= fmax), 17)
+        gid = rnd.choice(grupos_por_categoria[categoria])
+        vinc_grupo.append({"atleta_id": aid, "grupo_id": gid, "ativo": ativo})
+        if ativo:
+            atletas_do_grupo.setdefault(gid, []).append(aid)
+
+        plano = planos[rnd.randrange(len(planos))]
+        vinc_plano.append({
+            "atleta_id": aid, "plano_id": plano["id"], "data_inicio": inicio_planos, "ativo": ativo,
+        })
+        if ativo:
+            plano_do_atleta[aid] = plano
+    _inserir(Atleta, lista_atletas)
+    _inserir(AtletaResponsavel, vinc_resp)
+    _inserir(AtletaGrupo, vinc_grupo)
+    _inserir(AtletaPlano, vinc_plano)
+
+    # ---- contas a receber (um lote por competência) ----
+    qtd_contas = 0
+    for m in range(meses_financeiro, -1, -1):
+        competencia = _subtrair_meses(hoje, m)
+        ultimo_dia = monthrange(competencia.year, competencia.month)[1]
+        contas = []
+        for aid, plano in plano_do_atleta.items():
+            if plano["periodicidade_cobranca"] == "TRIMESTRAL" and m % 3:
+                continue
+            vencimento = competencia.replace(day=min(plano["dia_vencimento"], ultimo_dia))
+            if vencimento >= hoje:
+                status = "PENDENTE"
+            else:
+                status = "PAGO" if rnd.random() < 0.85 else "ATRASADO"
+            contas.append({
+                "atleta_id": aid,
+                "descricao": f"Mensalidade {plano['nome']} {competencia.strftime('%m/%Y')}",
+                "competencia": competencia, "vencimento": vencimento,
+                "valor": plano["valor_mensal"], "status": status,
+                "metodo_pagamento": plano["forma_pagamento_padrao"],
+                "origem": ORIGEM_PLANO,
+                "pago_em": datetime.combine(vencimento, time(12)) if status == "PAGO" else None,
+                "criado_em": datetime.combine(competencia, time(8)),
+            })
+        _inserir(ContaReceber, contas)
+        qtd_contas += len(contas)
+
+    # ---- contas a pagar ----
+    _inserir(ContaPagar, [
+        {"fornecedor": f"Fornecedor {rnd.randint(1, 40)}", "descricao": "Despesa bench",
+         "vencimento": hoje - timedelta(days=rnd.randint(-30, 365)),
+         "valor": round(rnd.uniform(50, 3000), 2),
+         "status": rnd.choice(("PENDENTE", "PAGO", "PAGO")), "criado_em": agora}
+        for _ in range(despesas)
+    ])
+
+    # ---- atividades (metade no passado, metade no futuro) + presenças ----
+    id_atividade = _proximo_id(Atividade)
+    inicio = hoje - timedelta(weeks=semanas_atividades // 2)
+    atividades, presencas = [], []
+    for g in grupos:
+        for semana in range(semanas_atividades):
+            for k in range(atividades_por_semana):
+                data = inicio + timedelta(weeks=semana, days=k * 2)
+                atividade_id = id_atividade + len(atividades)
+                atividades.append({
+                    "id": atividade_id, "titulo": f"Treino {g['nome']}", "grupo_id": g["id"],
+                    "data": data, "hora_inicio": time(8 + (g["id"] % 10), 0),
+                    "local": "Campo 1", "descricao": None,
+                })
+                if data < hoje:
+                    for aid in atletas_do_grupo.get(g["id"], []):
+                        r = rnd.random()
+                        presencas.append({
+                            "atividade_id": atividade_id, "atleta_id": aid,
+                            "status": "PRESENTE" if r < 0.8 else ("AUSENTE" if r < 0.95 else "JUSTIFICADO"),
+                            "registrado_em": datetime.combine(data, time(20)),
+                        })
+    _inserir(Atividade, atividades)
+    _inserir(Presenca, presencas)
+
+    # INSERT em lote não passa pelos eventos da sessão
+    reindexar(db.session.connection(), somente_faltando=True)
+    marcar_historico(db.session.connection())
+    recalcular_frequencia(db.session.connection())
+    db.session.commit()
+
+    return {
+        "responsaveis": qtd_responsaveis,
+        "grupos": qtd_grupos,
+        "atletas": atletas,
+        "contas_receber": qtd_contas,
+        "atividades": len(atividades),
+        "presencas": len(presencas),
+    }
+
+
+def main():
+    from benchmarks._comum import criar_app_benchmark
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--atletas", type=int, default=10000)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    args = parser.parse_args()
+
+    app = criar_app_benchmark()
+    with app.app_context():
+        db.create_all()
+        print(gerar_dados(args.atletas, meses_financeiro=args.meses, semente=args.semente))
+
+
+if __name__ == "__main__":
+    main()
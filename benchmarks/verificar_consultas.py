@@ -0,0 +1,115 @@
+"""
+Orçamento de consultas SQL por rota: pega regressões de N+1.
+
+Para cada faixa (quantidade de atletas) monta um banco sintético, chama as
+rotas quentes pelo test client com o cache de indicadores frio
+(services/cache_dados.py) e confere, com limite_de_consultas:
+
+- que cada rota fica dentro do máximo de comandos SQL de orcamentos(); e
+- que a quantidade não cresce com o volume de dados (mesma contagem em
+  todas as faixas): consulta por linha é N+1 mesmo abaixo do teto.
+
+Termina com código de saída 1 se alguma rota estourar. Ao mudar uma rota
+de propósito, ajuste o máximo aqui no mesmo commit.
+
+Uso:
+    python -m benchmarks.verificar_consultas [--faixas 200,2000]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+from extensions import db
+from services.cache_dados import invalidar
+from services.instrumentacao_sql import limite_de_consultas
+
+from benchmarks._comum import criar_app_completo, login, login_responsavel
+from benchmarks.bench_rotas import _ids_exemplo
+from benchmarks.gerador import gerar_dados
+
+
+def orcamentos(ids):
+    """(rota, perfil, url, máximo de comandos SQL) das rotas quentes."""
+    return [
+        ("dashboard.index", "admin", "/", 6),
+        ("dashboard.index[parent]", "parent", "/", 3),
+        ("atletas.listar", "admin", "/atletas/listar", 6),
+        ("atletas.listar[nome]", "admin", "/atletas/listar?nome=Araujo", 6),
+        ("atletas.listar[pendencia]", "admin", "/atletas/listar?pendencia=financeira", 6),
+        ("atletas.listar[parent]", "parent", "/atletas/listar", 7),
+        ("financeiro.resumo", "admin", "/financeiro/resumo", 8),
+        ("financeiro.resumo[inadimplentes]", "admin", "/financeiro/resumo?inadimplentes=1", 8),
+        ("financeiro.resumo_responsavel", "parent", "/financeiro/responsavel", 5),
+        ("grupos.listar", "admin", "/grupos/listar", 5),
+        ("atividades.listar", "admin", "/atividades/listar", 5),
+        ("atividades.presencas", "admin", f"/atividades/{ids['atividade']}/presencas", 8),
+    ]
+
+
+def medir_faixa(atletas: int) -> dict:
+    """{rota: (consultas, máximo, erro ou None)} numa base nova com `atletas` atletas."""
+    pasta = tempfile.mkdtemp(prefix="verificar_consultas_")
+    app = criar_app_completo(f"sqlite:///{os.path.join(pasta, 'consultas.db')}")
+    app.logger.getChild("sql").setLevel(logging.ERROR)
+
+    with app.app_context():
+        gerar_dados(atletas)
+        ids = _ids_exemplo()
+        db.session.remove()
+
+    clientes = {
+        "admin": login(app.test_client()),
+        "parent": login_responsavel(app.test_client()),
+    }
+
+    resultado = {}
+    for rota, perfil, url, maximo in orcamentos(ids):
+        invalidar()  # cache frio: o pior caso da rota
+        erro = None
+        try:
+            with app.app_context(), limite_de_consultas(maximo) as registro:
+                resp = clientes[perfil].get(url)
+                resp.get_data()
+            if resp.status_code != 200:
+                erro = f"status {resp.status_code}"
+        except AssertionError as exc:
+            erro = str(exc)
+        resultado[rota] = (registro.consultas, maximo, erro)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--faixas", default="200,2000")
+    args = parser.parse_args()
+
+    faixas = [int(f) for f in args.faixas.split(",") if f]
+    por_faixa = {}
+    for atletas in faixas:
+        print(f"== {atletas} atletas ==")
+        por_faixa[atletas] = medir_faixa(atletas)
+        for rota, (consultas, maximo, erro) in por_faixa[atletas].items():
+            print(f"  {rota:<36} {consultas:>4} / {maximo:<4} {'OK' if not erro else 'ESTOUROU'}")
+
+    falhas = []
+    for atletas, resultado in por_faixa.items():
+        for rota, (_, _, erro) in resultado.items():
+            if erro:
+                falhas.append(f"{rota} ({atletas} atletas): {erro}")
+    for rota in por_faixa[faixas[0]]:
+        contagens = {a: por_faixa[a][rota][0] for a in faixas}
+        if len(set(contagens.values())) > 1:
+            falhas.append(f"{rota}: consultas crescem com os dados {contagens}")
+
+    if falhas:
+        print(f"\n{len(falhas)} problema(s):")
+        for f in falhas:
+            print(f"- {f}")
+        sys.exit(1)
+    print("\nTodas as rotas dentro do orçamento de consultas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Confere, com EXPLAIN, que as consultas quentes das rotas usam índice.
+
+Monta um banco sintético, roda EXPLAIN (SQLite: EXPLAIN QUERY PLAN;
+MySQL: EXPLAIN) em cada consulta da lista CONSULTAS e termina com código
+de saída 1 se alguma delas voltar a fazer varredura completa da tabela.
+
+Uso:
+    python -m benchmarks.verificar_indices [--atletas 2000]
+    BENCH_DATABASE_URL=mysql+pymysql://... python -m benchmarks.verificar_indices
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from extensions import db
+from models import (
+    Atividade,
+    Atleta,
+    AtletaGrupo,
+    AtletaPlano,
+    AtletaResponsavel,
+    ContaPagar,
+    ContaReceber,
+    Presenca,
+    Responsavel,
+)
+from services.cobrancas import ORIGEM_PLANO
+from services.frequencia import _consulta_presencas, frequencia_mensal, frequencia_sequencias
+from services.metricas import GRUPO_TODOS, metricas_mensais
+from services.paginacao import depois_de
+
+from benchmarks._comum import criar_app_benchmark
+from benchmarks.gerador import gerar_dados
+
+
+def _popular(qtd_atletas: int):
+    db.drop_all()
+    db.create_all()
+    gerar_dados(qtd_atletas, meses_financeiro=12)
+
+    # estatísticas atualizadas para o otimizador escolher como em produção
+    if db.engine.dialect.name == "sqlite":
+        db.session.execute(text("ANALYZE"))
+    else:
+        for tabela in db.metadata.sorted_tables:
+            db.session.execute(text(f"ANALYZE TABLE {tabela.name}"))
+    db.session.commit()
+
+
+def consultas():
+    """(rota, descrição, statement) das consultas quentes."""
+    hoje = date.today()
+    competencia = date(hoje.year, hoje.month, 1)
+
+    ja_cobrado = (
+        db.session.query(ContaReceber.id)
+        .filter(
+            ContaReceber.atleta_id == AtletaPlano.atleta_id,
+            ContaReceber.competencia == competencia,
+            ContaReceber.origem == ORIGEM_PLANO,
+        )
+        .exists()
+    )
+
+    return [
+        ("dashboard.index", "atletas ativos",
+         db.session.query(db.func.count(Atleta.id)).filter(Atleta.status == "ATIVO")),
+        ("dashboard.index", "receita paga",
+         db.session.query(db.func.sum(ContaReceber.valor)).filter(ContaReceber.status == "PAGO")),
+        ("dashboard.index", "documentos pendentes",
+         db.session.query(db.func.count(Atleta.id)).filter(
+             (Atleta.validade_atestado.is_(None)) | (Atleta.validade_atestado < hoje))),
+        ("dashboard.index", "inadimplentes",
+         db.session.query(db.func.count(db.func.distinct(ContaReceber.atleta_id)))
+         .filter(ContaReceber.status == "ATRASADO")),
+        ("dashboard.index", "próxima atividade",
+         Atividade.query.filter(Atividade.data >= hoje)
+         .order_by(Atividade.data, Atividade.hora_inicio).limit(1)),
+        ("dashboard.index", "série mensal (gráficos)",
+         db.select(metricas_mensais)
+         .where(metricas_mensais.c.grupo_id == GRUPO_TODOS, metricas_mensais.c.mes >= competencia)
+         .order_by(metricas_mensais.c.mes)),
+        ("financeiro.resumo", "listagem por vencimento",
+         ContaReceber.query.order_by(ContaReceber.vencimento.desc()).limit(200)),
+        ("financeiro.resumo", "somente inadimplentes",
+         ContaReceber.query.filter(ContaReceber.status == "ATRASADO")
+         .order_by(ContaReceber.vencimento.desc()).limit(200)),
+        ("financeiro.resumo", "despesas",
+         ContaPagar.query.order_by(ContaPagar.vencimento.desc()).limit(200)),
+        ("financeiro.resumo_responsavel", "contas dos filhos",
+         ContaReceber.query.filter(ContaReceber.atleta_id.in_([1, 2])).order_by(ContaReceber.vencimento.desc())),
+        ("financeiro.cobrar_whatsapp", "pendências do atleta",
+         ContaReceber.query.filter(ContaReceber.atleta_id == 1,
+                                   ContaReceber.status.in_(("PENDENTE", "ATRASADO")))),
+        ("atletas.listar", "vínculos do responsável",
+         AtletaResponsavel.query.join(AtletaResponsavel.responsavel).filter(Responsavel.usuario_id == 1)),
+        ("atletas.listar", "filtro por grupo",
+         Atleta.query.join(AtletaGrupo).filter(AtletaGrupo.grupo_id == 1).order_by(Atleta.nome)),
+        ("atletas.listar", "pendência financeira",
+         Atleta.query.filter(Atleta.sql_pend_financeira()).order_by(Atleta.nome)),
+        ("atletas.listar", "documentos pendentes",
+         Atleta.query.filter(Atleta.sql_docs_pendentes(hoje)).order_by(Atleta.nome)),
+        ("atletas.listar", "página seguinte (nome, id)",
+         Atleta.query.filter(depois_de((Atleta.nome, Atleta.id), ("M", 0)))
+         .order_by(Atleta.nome, Atleta.id).limit(51)),
+        ("atletas.listar", "faixa etária",
+         Atleta.query.filter(Atleta.sql_idade_entre(10, 11, hoje))),
+        ("atividades.presencas", "atletas do grupo",
+         AtletaGrupo.query.filter_by(grupo_id=1, ativo=True)),
+        ("atividades.presencas", "presenças da atividade",
+         Presenca.query.filter_by(atividade_id=1)),
+        ("atividades.listar", "janela da agenda",
+         Atividade.query.filter(Atividade.data >= hoje, Atividade.data < hoje + timedelta(days=7))
+         .order_by(Atividade.data, Atividade.hora_inicio, Atividade.id).limit(201)),
+        ("grupos.exportar_grupo", "atletas do grupo",
+         Atleta.query.join(AtletaGrupo, Atleta.id == AtletaGrupo.atleta_id)
+         .filter(AtletaGrupo.grupo_id == 1).order_by(Atleta.nome)),
+        ("job cobrancas_mensais", "anti-join da competência",
+         db.session.query(AtletaPlano.atleta_id).filter(AtletaPlano.ativo.is_(True), ~ja_cobrado)),
+        ("dashboard.index[coach]", "faltas seguidas",
+         db.select(frequencia_sequencias).where(frequencia_sequencias.c.faltas_seguidas >= 3)),
+        ("frequencia.grupo", "contadores do grupo no período",
+         db.select(frequencia_mensal)
+         .where(frequencia_mensal.c.grupo_id == 1, frequencia_mensal.c.mes >= competencia)),
+        ("atividades.presencas", "recontagem da frequência",
+         _consulta_presencas().where(Presenca.atleta_id.in_([1, 2]), Atividade.grupo_id.in_([1]))),
+        ("job metricas_mensais", "cobranças do mês",
+         db.select(db.func.sum(ContaReceber.valor))
+         .where(ContaReceber.vencimento >= competencia, ContaReceber.vencimento < competencia + timedelta(days=31))),
+        ("job metricas_mensais", "presenças do mês",
+         db.select(Atividade.grupo_id, db.func.count()).select_from(Presenca)
+         .join(Atividade, Atividade.id == Presenca.atividade_id)
+         .where(Atividade.data >= competencia, Atividade.data < competencia + timedelta(days=31))
+         .group_by(Atividade.grupo_id)),
+        ("job inadimplencia_diaria", "PENDENTE vencidas",
+         db.update(ContaReceber)
+         .where(ContaReceber.status == "PENDENTE", ContaReceber.vencimento < hoje)
+         .values(status="ATRASADO")),
+    ]
+
+
+def _explain(stmt):
+    stmt = getattr(stmt, "statement", stmt)
+    dialeto = db.engine.dialect
+    compilado = stmt.compile(dialect=dialeto, compile_kwargs={"render_postcompile": True})
+    prefixo = "EXPLAIN QUERY PLAN " if dialeto.name == "sqlite" else "EXPLAIN "
+    parametros = compilado.construct_params()
+    if compilado.positional:
+        parametros = tuple(parametros[nome] for nome in compilado.positiontup)
+    return (
+        db.session.connection()
+        .exec_driver_sql(prefixo + str(compilado), parametros)
+        .mappings()
+        .all()
+    )
+
+
+def varreduras_completas(plano) -> list:
+    """Tabelas lidas por inteiro, segundo o plano."""
+    tabelas = []
+    for linha in plano:
+        if "detail" in linha:  # SQLite
+            detalhe = linha["detail"]
+            if detalhe.startswith("SCAN ") and "USING" not in detalhe:
+                tabelas.append(detalhe.split()[1])
+        elif linha.get("type") == "ALL":  # MySQL
+            tabelas.append(linha.get("table"))
+    return tabelas
+
+
+def verificar(qtd_atletas: int) -> list:
+    app = criar_app_benchmark()
+    falhas = []
+    with app.app_context():
+        _popular(qtd_atletas)
+        for rota, descricao, stmt in consultas():
+            tabelas = varreduras_completas(_explain(stmt))
+            situacao = "OK" if not tabelas else "VARREDURA COMPLETA: " + ", ".join(tabelas)
+            print(f"{rota:<32} {descricao:<28} {situacao}")
+            if tabelas:
+                falhas.append((rota, descricao, tabelas))
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--atletas", type=int, default=2000)
+    args = parser.parse_args()
+
+    falhas = verificar(args.atletas)
+    if falhas:
+        print(f"\n{len(falhas)} consulta(s) sem índice.")
+        sys.exit(1)
+    print("\nTodas as consultas usam índice.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import os.path
+import re
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -14,6 +15,52 @@ class Config:
     # Flask-SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Exportações em segundo plano (services/exportacao_async.py)
+    EXPORTACAO_PASTA = os.getenv("EXPORTACAO_PASTA", os.path.join(BASE_DIR, "exportacoes"))
+    EXPORTACAO_PROCESSOS = int(os.getenv("EXPORTACAO_PROCESSOS", "2"))
+    EXPORTACAO_TTL_SEGUNDOS = int(os.getenv("EXPORTACAO_TTL_SEGUNDOS", "3600"))
+    # acima de quantas linhas cada formato vira "preparar e depois baixar"
+    EXPORTACAO_LIMITE_SINCRONO = {
+        "csv": 500000,  # CSV já sai em streaming
+        "excel": 20000,
+        "pdf": 5000,
+        "word": 2000,
+    }
+
+    # Cache das exportações diretas (services/cache_exportacao.py): o mesmo
+    # relatório/formato com os mesmos dados é servido do disco (ETag / 304).
+    EXPORTACAO_CACHE_ATIVO = os.getenv("EXPORTACAO_CACHE_ATIVO", "1") == "1"
+    EXPORTACAO_CACHE_PASTA = os.getenv(
+        "EXPORTACAO_CACHE_PASTA", os.path.join(BASE_DIR, "exportacoes", "cache")
+    )
+    EXPORTACAO_CACHE_MAX_MB = int(os.getenv("EXPORTACAO_CACHE_MAX_MB", "500"))
+
+    # Padrão "0": o deploy roda `flask banco migrar && flask banco seed` uma
+    # vez, antes de subir os workers, e o app se recusa a iniciar se ainda
+    # houver migração pendente. "1" aplica migrações e seed no boot: só para
+    # desenvolvimento com um processo (workers juntos disputariam o DDL).
+    MIGRAR_AO_INICIAR = os.getenv("MIGRAR_AO_INICIAR", "0") == "1"
+
+    # Agendador de jobs (cobrança automática etc.)
+    # Cada worker inicia a thread, mas só quem pega a trava no banco executa.
+    AGENDADOR_ATIVO = os.getenv("AGENDADOR_ATIVO", "1") == "1"
+    AGENDADOR_INTERVALO_SEGUNDOS = int(os.getenv("AGENDADOR_INTERVALO_SEGUNDOS", "60"))
+
+    # Instrumentação de SQL por requisição (log JSON + header opcional)
+    SQL_INSTRUMENTACAO = os.getenv("SQL_INSTRUMENTACAO", "1") == "1"
+    SQL_DEBUG_HEADER = os.getenv("SQL_DEBUG_HEADER", "0") == "1"
+    # a partir de quantas repetições do mesmo SELECT consideramos N+1
+    SQL_N_MAIS_1_LIMITE = int(os.getenv("SQL_N_MAIS_1_LIMITE", "5"))
+
+    # Indicadores em cache (services/cache_dados.py): invalidados por escrita
+    # nas tabelas de origem; o TTL só cobre escritas fora do SQLAlchemy
+    CACHE_DADOS_TTL_SEGUNDOS = int(os.getenv("CACHE_DADOS_TTL_SEGUNDOS", "60"))
+
+    # Sincronização da chamada offline (POST /atividades/presencas/sincronizar)
+    PRESENCAS_SYNC_LOTE_MAXIMO = int(os.getenv("PRESENCAS_SYNC_LOTE_MAXIMO", "500"))
+    # por quanto tempo guardar os ids já aplicados (reenvios idempotentes)
+    PRESENCAS_SYNC_RETENCAO_DIAS = int(os.getenv("PRESENCAS_SYNC_RETENCAO_DIAS", "30"))
+
     # ==== DADOS DO BANCO ====
     # 1º tenta as variáveis DB_* (as que você tem na tela do Railway)
     # 2º tenta as mysql* adicionadas automaticamente pelo serviço de banco
@@ -55,13 +102,37 @@ class Config:
         or "railway"
     )
 
-    SQLALCHEMY_DATABASE_URI = (
+    # DATABASE_URL tem prioridade sobre o MySQL montado acima.
+    # Ex.: DATABASE_URL=sqlite:///escolinha.db (SQLite embutido, modo WAL)
+    DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
+    if DATABASE_URL.startswith("mysql://"):
+        # Railway entrega mysql://; o driver usado aqui é o pymysql
+        DATABASE_URL = "mysql+pymysql://" + DATABASE_URL[len("mysql://"):]
+
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL or (
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
 
+    # SQLite: espera pela trava de escrita (ms) antes de dar "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # PRAGMAs aplicados em toda conexão SQLite nova (ver services/banco.py)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",  # leitores não bloqueiam o escritor
+        "synchronous": "NORMAL",  # seguro com WAL e bem mais rápido que FULL
+        "foreign_keys": "ON",  # igual ao InnoDB do MySQL
+        "cache_size": -20000,  # ~20 MB de cache de páginas
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,  # 256 MB
+    }
+
     # Logs pra conferir no Railway (sem expor senha)
-    print(
-        ">> SQLALCHEMY_DATABASE_URI (sem senha): "
-        f"mysql+pymysql://{DB_USER}:***@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    )
-    print(f">> DB_PASSWORD está vazio? {DB_PASSWORD == ''}")
+    if DATABASE_URL:
+        _url_sem_senha = re.sub(r"://([^:/@]+):[^@]*@", r"://\1:***@", DATABASE_URL)
+        print(f">> SQLALCHEMY_DATABASE_URI (sem senha): {_url_sem_senha}")
+    else:
+        print(
+            ">> SQLALCHEMY_DATABASE_URI (sem senha): "
+            f"mysql+pymysql://{DB_USER}:***@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        )
+        print(f">> DB_PASSWORD está vazio? {DB_PASSWORD == ''}")
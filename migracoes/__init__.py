@@ -0,0 +1,189 @@
+"""
+Migrações versionadas do banco.
+
+Cada arquivo mNNNN_descricao.py define VERSAO, DESCRICAO e upgrade(conn).
+As versões aplicadas ficam na tabela schema_migracoes. As migrações são
+escritas para serem idempotentes (checam antes de criar), porque bancos
+antigos foram montados só com db.create_all().
+
+No boot do servidor web (garantir_esquema) o app se recusa a subir com
+o banco desatualizado (MIGRAR_AO_INICIAR=0, padrão): o deploy roda antes,
+uma vez, fora dos workers:
+    flask banco migrar
+    flask banco seed
+Com MIGRAR_AO_INICIAR=1 as pendentes são aplicadas no boot (desenvolvimento,
+um processo só).
+"""
+import importlib
+import pkgutil
+import time
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+
+_metadata = MetaData()
+
+schema_migracoes = Table(
+    "schema_migracoes",
+    _metadata,
+    Column("versao", Integer, primary_key=True),
+    Column("descricao", String(255)),
+    Column("aplicada_em", DateTime),
+)
+
+
+def listar_migracoes():
+    modulos = []
+    for info in pkgutil.iter_modules(__path__):
+        if not info.name.startswith("m"):
+            continue
+        modulo = importlib.import_module(f"{__name__}.{info.name}")
+        modulos.append(modulo)
+    return sorted(modulos, key=lambda m: m.VERSAO)
+
+
+def versoes_aplicadas(conn) -> set:
+    return set(conn.execute(select(schema_migracoes.c.versao)).scalars())
+
+
+def migracoes_pendentes(engine=None):
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        schema_migracoes.create(conn, checkfirst=True)
+        aplicadas = versoes_aplicadas(conn)
+    return [m for m in listar_migracoes() if m.VERSAO not in aplicadas]
+
+
+def aplicar_migracoes(engine=None) -> list:
+    """Aplica as migrações pendentes, em ordem. Retorna as versões aplicadas."""
+    engine = engine or db.engine
+    aplicadas = []
+    for modulo in migracoes_pendentes(engine):
+        with engine.begin() as conn:
+            modulo.upgrade(conn)
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    schema_migracoes.insert().values(
+                        versao=modulo.VERSAO,
+                        descricao=modulo.DESCRICAO,
+                        aplicada_em=datetime.utcnow(),
+                    )
+                )
+        except IntegrityError:
+            # outro processo aplicou a mesma versão ao mesmo tempo
+            pass
+        aplicadas.append(modulo.VERSAO)
+    return aplicadas
+
+
+class EsquemaDesatualizado(RuntimeError):
+    """Banco com migrações pendentes e o boot configurado para não aplicá-las."""
+
+
+def garantir_esquema(aplicar: bool = True, tentativas: int = 5, espera: float = 2.0) -> list:
+    """
+    Boot: deixa o banco na última versão antes de atender requisições.
+
+    Com aplicar=False (padrão do boot) só confere e levanta
+    EsquemaDesatualizado. Se mesmo assim dois processos aplicarem juntos,
+    um pode falhar no meio do DDL do outro; nesse caso espera e confere de
+    novo as pendentes.
+    """
+    for tentativa in range(1, tentativas + 1):
+        pendentes = migracoes_pendentes()
+        if not pendentes:
+            return []
+        if not aplicar:
+            versoes = ", ".join(f"{m.VERSAO:04d}" for m in pendentes)
+            raise EsquemaDesatualizado(
+                f"Banco desatualizado (migrações pendentes: {versoes}). "
+                "Rode `flask banco migrar` ou suba com MIGRAR_AO_INICIAR=1."
+            )
+        try:
+            return aplicar_migracoes()
+        except Exception:
+            if tentativa == tentativas:
+                raise
+            time.sleep(espera)
+    return []
+
+
+# =========================
+# Helpers para as migrações
+# =========================
+
+def tabela_existe(conn, tabela: str) -> bool:
+    return inspect(conn).has_table(tabela)
+
+
+def indices_da_tabela(conn, tabela: str) -> set:
+    insp = inspect(conn)
+    nomes = {i["name"] for i in insp.get_indexes(tabela)}
+    nomes |= {u["name"] for u in insp.get_unique_constraints(tabela)}
+    return nomes
+
+
+def criar_tabela_se_faltar(conn, modelo) -> bool:
+    """Cria a tabela do model (com os índices dele) se ainda não existir."""
+    if tabela_existe(conn, modelo.__tablename__):
+        return False
+    modelo.__table__.create(conn)
+    return True
+
+
+def criar_indice_se_faltar(conn, tabela: str, nome: str, colunas, unico: bool = False):
+    if not tabela_existe(conn, tabela) or nome in indices_da_tabela(conn, tabela):
+        return False
+    tipo = "UNIQUE INDEX" if unico else "INDEX"
+    conn.execute(text(f"CREATE {tipo} {nome} ON {tabela} ({', '.join(colunas)})"))
+    return True
+
+
+def adicionar_coluna_se_faltar(conn, tabela: str, coluna: str, ddl_tipo: str):
+    if not tabela_existe(conn, tabela):
+        return False
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabela)}
+    if coluna in existentes:
+        return False
+    conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {ddl_tipo}"))
+    return True
+
+
+# =========================
+# CLI
+# =========================
+
+def registrar_cli(app):
+    import click
+
+    @app.cli.group("banco")
+    def banco_cli():
+        """Esquema do banco (migrações) e dados iniciais."""
+
+    @banco_cli.command("migrar")
+    def migrar_cmd():
+        """Aplica as migrações pendentes."""
+        versoes = aplicar_migracoes()
+        if versoes:
+            click.echo(f"Migrações aplicadas: {', '.join(str(v) for v in versoes)}")
+        else:
+            click.echo("Banco já está na última versão.")
+
+    @banco_cli.command("status")
+    def status_cmd():
+        """Lista as migrações e se já foram aplicadas."""
+        pendentes = {m.VERSAO for m in migracoes_pendentes()}
+        for m in listar_migracoes():
+            situacao = "pendente" if m.VERSAO in pendentes else "aplicada"
+            click.echo(f"{m.VERSAO:04d} {situacao:<9} {m.DESCRICAO}")
+
+    @banco_cli.command("seed")
+    def seed_cmd():
+        """Cria os dados iniciais (só se o banco não tiver usuários)."""
+        from seeds import seed_default_data
+
+        seed_default_data()
@@ -0,0 +1,218 @@
+"""
+Esquema base: as tabelas como eram antes das migrações versionadas (o que
+o antigo db.create_all() do boot criava).
+
+O DDL fica congelado aqui, e não lido dos models: colunas, índices e
+tabelas acrescentados depois entram pelas migrações seguintes, então um
+banco novo passa pelos mesmos passos que um banco antigo. Em banco já
+existente não altera nada (checkfirst).
+"""
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    Text,
+    Time,
+    UniqueConstraint,
+)
+
+VERSAO = 0
+DESCRICAO = "esquema base (tabelas originais)"
+
+_metadata = MetaData()
+
+Table(
+    "usuarios",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nome", String(150), nullable=False),
+    Column("email", String(150), unique=True, nullable=False),
+    Column("senha_hash", String(255), nullable=False),
+    Column("telefone", String(30)),
+    Column("role", Enum("ADMIN", "COACH", "PARENT", "SUPER_ADMIN"), nullable=False),
+    Column("ativo", Boolean),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "responsaveis",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=True),
+    Column("nome", String(150)),
+    Column("cpf", String(14), unique=True),
+    Column("telefone", String(30)),
+    Column("observacoes", String(255)),
+)
+
+Table(
+    "atletas",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nome", String(150), nullable=False),
+    Column("rg", String(20)),
+    Column("cpf", String(14)),
+    Column("data_nascimento", Date, nullable=False),
+    Column("posicao", String(50)),
+    Column("documento", String(50)),
+    Column("telefone_residencial", String(30)),
+    Column("telefone", String(30)),
+    Column("validade_atestado", Date),
+    Column("informacoes_adicionais", String(255)),
+    Column("responsavel_nome", String(150)),
+    Column("responsavel_cpf", String(14)),
+    Column("responsavel_telefone", String(30)),
+    Column("responsavel_parentesco", String(50)),
+    Column("status", Enum("ATIVO", "INATIVO")),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "atletas_fotos",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atleta_id", Integer, ForeignKey("atletas.id"), nullable=False),
+    Column("foto_path", String(255), nullable=False),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "atletas_responsaveis",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atleta_id", Integer, ForeignKey("atletas.id"), nullable=False),
+    Column("responsavel_id", Integer, ForeignKey("responsaveis.id"), nullable=False),
+    Column("parentesco", String(50)),
+)
+
+Table(
+    "grupos",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nome", String(100), nullable=False),
+    Column("faixa_etaria_min", Integer),
+    Column("faixa_etaria_max", Integer),
+    Column("descricao", String(255)),
+)
+
+Table(
+    "atletas_grupos",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atleta_id", Integer, ForeignKey("atletas.id"), nullable=False),
+    Column("grupo_id", Integer, ForeignKey("grupos.id"), nullable=False),
+    Column("ativo", Boolean),
+)
+
+Table(
+    "planos",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nome", String(100), nullable=False),
+    Column("valor_mensal", Numeric(10, 2), nullable=False),
+    Column("dia_vencimento", Integer, nullable=True),
+    Column("forma_pagamento_padrao", Enum("PIX", "CREDITO", "DEBITO", "DINHEIRO")),
+    Column("periodicidade_cobranca", Enum("MENSAL", "TRIMESTRAL", "SEMESTRAL", "ANUAL")),
+    Column("descricao", String(255)),
+    Column("ativo", Boolean),
+)
+
+Table(
+    "atletas_planos",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atleta_id", Integer, ForeignKey("atletas.id"), nullable=False),
+    Column("plano_id", Integer, ForeignKey("planos.id"), nullable=False),
+    Column("data_inicio", Date, nullable=False),
+    Column("data_fim", Date),
+    Column("ativo", Boolean),
+)
+
+Table(
+    "atividades",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("titulo", String(150), nullable=False),
+    Column("grupo_id", Integer, ForeignKey("grupos.id")),
+    Column("coach_id", Integer, ForeignKey("usuarios.id")),
+    Column("data", Date, nullable=False),
+    Column("hora_inicio", Time, nullable=False),
+    Column("hora_fim", Time),
+    Column("local", String(150)),
+    Column("descricao", String(255)),
+)
+
+Table(
+    "presencas",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atividade_id", Integer, ForeignKey("atividades.id"), nullable=False),
+    Column("atleta_id", Integer, ForeignKey("atletas.id"), nullable=False),
+    Column("status", Enum("PRESENTE", "AUSENTE", "JUSTIFICADO"), nullable=False),
+    Column("observacao", String(255)),
+    Column("registrado_em", DateTime),
+    UniqueConstraint("atividade_id", "atleta_id", name="uk_presenca_atividade_atleta"),
+)
+
+Table(
+    "contas_receber",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("atleta_id", Integer, ForeignKey("atletas.id")),
+    Column("descricao", String(255)),
+    Column("competencia", Date),
+    Column("vencimento", Date, nullable=False),
+    Column("valor", Numeric(10, 2), nullable=False),
+    Column("status", Enum("PENDENTE", "PAGO", "ATRASADO", "CANCELADO")),
+    Column("metodo_pagamento", Enum("PIX", "CREDITO", "DEBITO", "DINHEIRO", "ISENTO")),
+    Column("mercadopago_payment_id", String(100)),
+    Column("pago_em", DateTime),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "contas_pagar",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fornecedor", String(150), nullable=False),
+    Column("descricao", String(255)),
+    Column("vencimento", Date, nullable=False),
+    Column("valor", Numeric(10, 2), nullable=False),
+    Column("status", Enum("PENDENTE", "PAGO", "ATRASADO", "CANCELADO")),
+    Column("pago_em", DateTime),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "fluxo_caixa",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("data_movimento", Date, nullable=False),
+    Column("tipo", Enum("ENTRADA", "SAIDA"), nullable=False),
+    Column("origem", Enum("MENSALIDADE", "OUTRO_RECEBIMENTO", "CONTA_PAGAR", "AJUSTE"), nullable=False),
+    Column("referencia_id", Integer),
+    Column("descricao", String(255)),
+    Column("valor", Numeric(10, 2), nullable=False),
+    Column("criado_em", DateTime),
+)
+
+Table(
+    "mp_webhook_logs",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("evento", String(50)),
+    Column("raw_body", Text),
+    Column("recebido_em", DateTime),
+)
+
+
+def upgrade(conn):
+    _metadata.create_all(conn, checkfirst=True)
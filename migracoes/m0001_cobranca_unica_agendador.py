@@ -0,0 +1,38 @@
+"""
+Cobrança única por atleta/competência e ajustes das tabelas do agendador.
+"""
+from sqlalchemy import text
+
+from migracoes import adicionar_coluna_se_faltar, criar_indice_se_faltar, indices_da_tabela, tabela_existe
+
+VERSAO = 1
+DESCRICAO = "uk_conta_receber_atleta_competencia, ix status/vencimento, job_leases.marca"
+
+
+def upgrade(conn):
+    if tabela_existe(conn, "contas_receber"):
+        if "uk_conta_receber_atleta_competencia" not in indices_da_tabela(conn, "contas_receber"):
+            # cobranças avulsas antigas repetiam a competência do mês: mantém a
+            # mais antiga e tira a competência das demais antes da constraint
+            conn.execute(
+                text(
+                    "UPDATE contas_receber SET competencia = NULL WHERE id IN ("
+                    " SELECT id FROM ("
+                    "  SELECT c.id FROM contas_receber c"
+                    "  JOIN contas_receber o ON o.atleta_id = c.atleta_id"
+                    "   AND o.competencia = c.competencia AND o.id < c.id"
+                    " ) AS duplicadas)"
+                )
+            )
+        criar_indice_se_faltar(
+            conn,
+            "contas_receber",
+            "uk_conta_receber_atleta_competencia",
+            ["atleta_id", "competencia"],
+            unico=True,
+        )
+        criar_indice_se_faltar(
+            conn, "contas_receber", "ix_contas_receber_status_vencimento", ["status", "vencimento"]
+        )
+
+    adicionar_coluna_se_faltar(conn, "job_leases", "marca", "VARCHAR(100)")
@@ -0,0 +1,27 @@
+"""
+Índices das consultas mais usadas pelas rotas (ver models.py).
+Conferidos por benchmarks/verificar_indices.py.
+"""
+from migracoes import criar_indice_se_faltar
+
+VERSAO = 2
+DESCRICAO = "índices das consultas quentes (atletas, grupos, planos, atividades, financeiro)"
+
+INDICES = [
+    ("responsaveis", "ix_responsaveis_usuario_id", ["usuario_id"]),
+    ("atletas_responsaveis", "ix_atletas_responsaveis_responsavel", ["responsavel_id", "atleta_id"]),
+    ("atletas_responsaveis", "ix_atletas_responsaveis_atleta", ["atleta_id"]),
+    ("atletas", "ix_atletas_status", ["status"]),
+    ("atletas", "ix_atletas_validade_atestado", ["validade_atestado"]),
+    ("atletas", "ix_atletas_nome", ["nome"]),
+    ("atletas_grupos", "ix_atletas_grupos_grupo_ativo", ["grupo_id", "ativo"]),
+    ("atletas_planos", "ix_atletas_planos_ativo", ["ativo", "atleta_id"]),
+    ("atividades", "ix_atividades_data_hora", ["data", "hora_inicio"]),
+    ("contas_receber", "ix_contas_receber_vencimento", ["vencimento"]),
+    ("contas_pagar", "ix_contas_pagar_vencimento", ["vencimento"]),
+]
+
+
+def upgrade(conn):
+    for tabela, nome, colunas in INDICES:
+        criar_indice_se_faltar(conn, tabela, nome, colunas)
@@ -0,0 +1,13 @@
+"""
+Tabela das exportações em segundo plano.
+"""
+from migracoes import criar_tabela_se_faltar
+
+VERSAO = 3
+DESCRICAO = "exportacao_tarefas (exportações em segundo plano)"
+
+
+def upgrade(conn):
+    from models import ExportacaoTarefa
+
+    criar_tabela_se_faltar(conn, ExportacaoTarefa)
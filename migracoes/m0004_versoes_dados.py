@@ -0,0 +1,24 @@
+"""
+Versão dos dados por tabela (services/versoes.py), usada para invalidar
+caches de exportação e de indicadores.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+
+VERSAO = 4
+DESCRICAO = "versoes_dados (versão por tabela para invalidar caches)"
+
+
+def upgrade(conn):
+    from services.versoes import TABELAS_MONITORADAS, _tabela_existe, versoes_dados
+
+    versoes_dados.create(conn, checkfirst=True)
+    _tabela_existe.clear()  # os eventos passam a incrementar a partir de agora
+    existentes = set(conn.execute(select(versoes_dados.c.tabela)).scalars())
+    novas = [t for t in TABELAS_MONITORADAS if t not in existentes]
+    if novas:
+        conn.execute(
+            versoes_dados.insert(),
+            [{"tabela": t, "versao": 0, "atualizado_em": datetime.utcnow()} for t in novas],
+        )
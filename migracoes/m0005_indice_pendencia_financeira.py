@@ -0,0 +1,15 @@
+"""
+Índice (atleta_id, status) em contas_receber: o EXISTS de pendência
+financeira da listagem de atletas (Atleta.sql_pend_financeira) fica
+só no índice, sem ler as linhas das contas.
+"""
+from migracoes import criar_indice_se_faltar
+
+VERSAO = 5
+DESCRICAO = "índice de pendência financeira por atleta (contas_receber.atleta_id, status)"
+
+
+def upgrade(conn):
+    criar_indice_se_faltar(
+        conn, "contas_receber", "ix_contas_receber_atleta_status", ["atleta_id", "status"]
+    )
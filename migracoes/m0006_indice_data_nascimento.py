@@ -0,0 +1,12 @@
+"""
+Índice em atletas.data_nascimento: os filtros de idade e de faixa etária
+da listagem (Atleta.sql_idade_entre) viram intervalo de datas.
+"""
+from migracoes import criar_indice_se_faltar
+
+VERSAO = 6
+DESCRICAO = "índice de data de nascimento (filtros de idade)"
+
+
+def upgrade(conn):
+    criar_indice_se_faltar(conn, "atletas", "ix_atletas_data_nascimento", ["data_nascimento"])
@@ -0,0 +1,19 @@
+"""
+Busca por nome sem acento (services/busca.py): coluna nome_busca em
+atletas e responsaveis, tabela de trigramas busca_termos e indexação dos
+nomes que já existem.
+"""
+from migracoes import adicionar_coluna_se_faltar, criar_indice_se_faltar
+
+VERSAO = 7
+DESCRICAO = "busca por nome: nome_busca + busca_termos (trigramas)"
+
+
+def upgrade(conn):
+    from services.busca import busca_termos, reindexar
+
+    for tabela in ("atletas", "responsaveis"):
+        adicionar_coluna_se_faltar(conn, tabela, "nome_busca", "VARCHAR(150)")
+        criar_indice_se_faltar(conn, tabela, f"ix_{tabela}_nome_busca", ["nome_busca"])
+    busca_termos.create(conn, checkfirst=True)
+    reindexar(conn)
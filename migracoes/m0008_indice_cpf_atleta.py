@@ -0,0 +1,12 @@
+"""
+Índice em atletas.cpf: o seletor de atletas (/busca/atletas) também
+busca pelo começo do CPF.
+"""
+from migracoes import criar_indice_se_faltar
+
+VERSAO = 8
+DESCRICAO = "índice de CPF do atleta (seletor de atletas)"
+
+
+def upgrade(conn):
+    criar_indice_se_faltar(conn, "atletas", "ix_atletas_cpf", ["cpf"])
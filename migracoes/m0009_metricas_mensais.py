@@ -0,0 +1,16 @@
+"""
+Indicadores mensais por grupo (services/metricas.py): tabela do histórico
+e fila de meses a recalcular. Todo o histórico existente fica anotado; o
+job metricas_mensais (ou `flask metricas atualizar`) faz a apuração.
+"""
+VERSAO = 9
+DESCRICAO = "metricas_mensais + metricas_pendencias (histórico por mês/grupo)"
+
+
+def upgrade(conn):
+    from services.metricas import _tabela_existe, marcar_historico, metricas_mensais, metricas_pendencias
+
+    metricas_mensais.create(conn, checkfirst=True)
+    metricas_pendencias.create(conn, checkfirst=True)
+    _tabela_existe.clear()  # os eventos passam a anotar a partir de agora
+    marcar_historico(conn)
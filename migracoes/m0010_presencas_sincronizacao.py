@@ -0,0 +1,18 @@
+"""
+Chamada offline (services/presencas.py): horário da última alteração de
+cada presença (last-write-wins) e ids das alterações já sincronizadas.
+"""
+from sqlalchemy import text
+
+from migracoes import adicionar_coluna_se_faltar
+
+VERSAO = 10
+DESCRICAO = "presencas.alterado_em + presencas_sincronizadas (chamada offline)"
+
+
+def upgrade(conn):
+    from services.presencas import presencas_sincronizadas
+
+    if adicionar_coluna_se_faltar(conn, "presencas", "alterado_em", "DATETIME"):
+        conn.execute(text("UPDATE presencas SET alterado_em = registrado_em"))
+    presencas_sincronizadas.create(conn, checkfirst=True)
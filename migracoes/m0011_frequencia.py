@@ -0,0 +1,17 @@
+"""
+Frequência nos treinos (services/frequencia.py): índice das presenças por
+atleta, tabelas de contadores e contagem das presenças que já existem.
+"""
+from migracoes import criar_indice_se_faltar
+
+VERSAO = 11
+DESCRICAO = "frequencia_mensal + frequencia_sequencias (contadores de presença)"
+
+
+def upgrade(conn):
+    from services.frequencia import frequencia_mensal, frequencia_sequencias, recalcular
+
+    criar_indice_se_faltar(conn, "presencas", "ix_presencas_atleta", ["atleta_id"])
+    frequencia_mensal.create(conn, checkfirst=True)
+    frequencia_sequencias.create(conn, checkfirst=True)
+    recalcular(conn)
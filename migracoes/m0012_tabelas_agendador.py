@@ -0,0 +1,17 @@
+"""
+Tabelas do agendador (job_leases, job_execucoes).
+
+Bancos antigos já as têm: eram criadas pelo esquema base quando ele lia
+os models. Com o esquema base congelado, um banco novo passa a criá-las aqui.
+"""
+from migracoes import criar_tabela_se_faltar
+
+VERSAO = 12
+DESCRICAO = "job_leases + job_execucoes (agendador)"
+
+
+def upgrade(conn):
+    from models import JobExecucao, JobLease
+
+    criar_tabela_se_faltar(conn, JobLease)
+    criar_tabela_se_faltar(conn, JobExecucao)
@@ -0,0 +1,43 @@
+"""
+metricas_mensais.atletas_ativos passa a aceitar NULL (mês passado sem foto,
+ver services/metricas.py) e perde os valores que a m0009 inventou: os
+meses anteriores à sua aplicação foram apurados com o status de hoje.
+
+O SQLite não altera NOT NULL de coluna: a tabela é refeita com os dados.
+"""
+from datetime import date
+
+from sqlalchemy import select, text
+
+from migracoes import schema_migracoes, tabela_existe
+
+VERSAO = 13
+DESCRICAO = "metricas_mensais.atletas_ativos opcional; limpa fotos retroativas"
+
+
+def upgrade(conn):
+    from services.metricas import inicio_mes, metricas_mensais
+
+    if not tabela_existe(conn, "metricas_mensais"):
+        return
+
+    if conn.dialect.name == "sqlite":
+        colunas = ", ".join(c.name for c in metricas_mensais.columns)
+        conn.execute(text("ALTER TABLE metricas_mensais RENAME TO metricas_mensais_antiga"))
+        metricas_mensais.create(conn)
+        conn.execute(text(
+            f"INSERT INTO metricas_mensais ({colunas}) SELECT {colunas} FROM metricas_mensais_antiga"
+        ))
+        conn.execute(text("DROP TABLE metricas_mensais_antiga"))
+    else:
+        conn.execute(text("ALTER TABLE metricas_mensais MODIFY atletas_ativos INTEGER NULL"))
+
+    aplicada_em = conn.execute(
+        select(schema_migracoes.c.aplicada_em).where(schema_migracoes.c.versao == 9)
+    ).scalar()
+    desde = inicio_mes(aplicada_em) if aplicada_em else inicio_mes(date.today())
+    conn.execute(
+        metricas_mensais.update()
+        .where(metricas_mensais.c.mes < desde)
+        .values(atletas_ativos=None)
+    )
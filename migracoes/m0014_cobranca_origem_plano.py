@@ -0,0 +1,39 @@
+"""
+Cobrança única só para as geradas pelo plano: contas_receber.origem
+("PLANO" no motor de cobrança, NULL nas avulsas) entra na chave única, e
+cobranças avulsas (uniforme, torneio, parcelas) convivem com a
+mensalidade do mesmo mês.
+
+As cobranças que já têm competência são marcadas como do plano: a m0001
+deixou uma por atleta/competência, e é essa que o motor já considera
+cobrada.
+"""
+from sqlalchemy import text
+
+from migracoes import adicionar_coluna_se_faltar, criar_indice_se_faltar, indices_da_tabela, tabela_existe
+
+VERSAO = 14
+DESCRICAO = "contas_receber.origem; uk_conta_receber_plano_competencia"
+
+
+def upgrade(conn):
+    if not tabela_existe(conn, "contas_receber"):
+        return
+
+    if adicionar_coluna_se_faltar(conn, "contas_receber", "origem", "VARCHAR(20)"):
+        conn.execute(
+            text("UPDATE contas_receber SET origem = 'PLANO' WHERE competencia IS NOT NULL")
+        )
+
+    criar_indice_se_faltar(
+        conn,
+        "contas_receber",
+        "uk_conta_receber_plano_competencia",
+        ["atleta_id", "competencia", "origem"],
+        unico=True,
+    )
+    if "uk_conta_receber_atleta_competencia" in indices_da_tabela(conn, "contas_receber"):
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("DROP INDEX uk_conta_receber_atleta_competencia"))
+        else:
+            conn.execute(text("DROP INDEX uk_conta_receber_atleta_competencia ON contas_receber"))
@@ -0,0 +1,24 @@
+"""
+atletas.cpf só com dígitos, como o seed, o gerador e agora o formulário
+gravam: a busca pelo começo do CPF (/busca/atletas) compara dígitos com
+dígitos. CPFs digitados com máscara ("123.456.789-00") perdem pontos,
+traço e espaços.
+"""
+from sqlalchemy import text
+
+from migracoes import tabela_existe
+
+VERSAO = 15
+DESCRICAO = "atletas.cpf só com dígitos"
+
+
+def upgrade(conn):
+    if not tabela_existe(conn, "atletas"):
+        return
+    conn.execute(
+        text(
+            "UPDATE atletas"
+            " SET cpf = REPLACE(REPLACE(REPLACE(cpf, '.', ''), '-', ''), ' ', '')"
+            " WHERE cpf LIKE '%.%' OR cpf LIKE '%-%' OR cpf LIKE '% %'"
+        )
+    )
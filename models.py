@@ -1,7 +1,11 @@
 from extensions import db
 from flask_login import UserMixin
+from sqlalchemy.orm import query_expression
 from datetime import datetime, date
 
+# status de ContaReceber que contam como pendência financeira
+STATUS_EM_ABERTO = ("PENDENTE", "ATRASADO")
+
 
 # =========================
 # USUÁRIOS & RESPONSÁVEIS
@@ -40,6 +44,8 @@ class Responsavel(db.Model):
 
     # Campos usados nas rotas de cadastro/login de responsável
     nome = db.Column(db.String(150))
+    # nome sem acento/minúsculo, mantido por services/busca.py
+    nome_busca = db.Column(db.String(150))
     cpf = db.Column(db.String(14), unique=True)
     telefone = db.Column(db.String(30))
 
@@ -47,6 +53,19 @@ class Responsavel(db.Model):
 
     atletas = db.relationship("AtletaResponsavel", back_populates="responsavel")
 
+    __table_args__ = (
+        db.Index("ix_responsaveis_usuario_id", "usuario_id"),
+        db.Index("ix_responsaveis_nome_busca", "nome_busca"),
+    )
+
+
+def _anos_antes(d, anos):
+    """Mesma data `anos` anos antes (29/02 vira 28/02 em ano não bissexto)."""
+    try:
+        return d.replace(year=d.year - anos)
+    except ValueError:
+        return d.replace(year=d.year - anos, day=28)
+
 
 # =========================
 # ATLETAS
@@ -58,6 +77,8 @@ class Atleta(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
+    # nome sem acento/minúsculo, mantido por services/busca.py
+    nome_busca = db.Column(db.String(150))
 
     # novos campos
     rg = db.Column(db.String(20))
@@ -88,6 +109,53 @@ class Atleta(db.Model):
     planos = db.relationship("AtletaPlano", back_populates="atleta")
     financeiro = db.relationship("ContaReceber", backref="atleta", lazy=True)
 
+    # preenchido pela listagem (with_expression(Atleta.pend_financeira, ...))
+    # para a página inteira vir numa consulta só; None quando não carregado
+    pend_financeira = query_expression()
+
+    __table_args__ = (
+        db.Index("ix_atletas_status", "status"),
+        db.Index("ix_atletas_validade_atestado", "validade_atestado"),
+        db.Index("ix_atletas_nome", "nome"),
+        db.Index("ix_atletas_data_nascimento", "data_nascimento"),
+        db.Index("ix_atletas_nome_busca", "nome_busca"),
+        db.Index("ix_atletas_cpf", "cpf"),
+    )
+
+    # ---- filtros em SQL ----
+
+    @staticmethod
+    def sql_pend_financeira():
+        """EXISTS de conta em aberto do atleta (coluna ou filtro da consulta)."""
+        return (
+            db.exists()
+            .where(ContaReceber.atleta_id == Atleta.id)
+            .where(ContaReceber.status.in_(STATUS_EM_ABERTO))
+        )
+
+    @staticmethod
+    def sql_docs_pendentes(hoje=None):
+        """Mesmo critério de docs_pendentes, como filtro da consulta."""
+        hoje = hoje or date.today()
+        return db.or_(Atleta.validade_atestado.is_(None), Atleta.validade_atestado < hoje)
+
+    @staticmethod
+    def sql_idade_entre(minimo=None, maximo=None, hoje=None):
+        """
+        Idade (em anos completos) entre minimo e maximo, inclusive, como
+        intervalo de data_nascimento (usa o índice, sem calcular a idade
+        linha a linha). None em um dos lados deixa o intervalo aberto.
+        """
+        hoje = hoje or date.today()
+        condicoes = []
+        if minimo is not None:
+            # fez `minimo` anos até hoje
+            condicoes.append(Atleta.data_nascimento <= _anos_antes(hoje, minimo))
+        if maximo is not None:
+            # ainda não fez `maximo + 1` anos
+            condicoes.append(Atleta.data_nascimento > _anos_antes(hoje, maximo + 1))
+        return db.and_(db.true(), *condicoes)
+
     # ---- helpers para telas ----
 
     @property
@@ -102,13 +170,16 @@ class Atleta(db.Model):
 
     @property
     def tem_pend_financeira(self):
-        # True se tiver alguma conta pendente ou atrasada
-        if not self.financeiro:
-            return False
-        for c in self.financeiro:
-            if c.status in ("PENDENTE", "ATRASADO"):
-                return True
-        return False
+        # True se tiver alguma conta pendente ou atrasada.
+        # Na listagem o valor já vem na consulta; fora dela, um EXISTS
+        # (sem carregar todas as contas do atleta).
+        if self.pend_financeira is not None:
+            return bool(self.pend_financeira)
+        return db.session.query(
+            db.exists()
+            .where(ContaReceber.atleta_id == self.id)
+            .where(ContaReceber.status.in_(STATUS_EM_ABERTO))
+        ).scalar()
 
     @property
     def docs_pendentes(self):
@@ -142,6 +213,11 @@ class AtletaResponsavel(db.Model):
     atleta = db.relationship("Atleta", back_populates="responsaveis")
     responsavel = db.relationship("Responsavel", back_populates="atletas")
 
+    __table_args__ = (
+        db.Index("ix_atletas_responsaveis_responsavel", "responsavel_id", "atleta_id"),
+        db.Index("ix_atletas_responsaveis_atleta", "atleta_id"),
+    )
+
 
 # =========================
 # GRUPOS & PLANOS
@@ -172,6 +248,10 @@ class AtletaGrupo(db.Model):
     atleta = db.relationship("Atleta", back_populates="grupos")
     grupo = db.relationship("Grupo", back_populates="atletas")
 
+    __table_args__ = (
+        db.Index("ix_atletas_grupos_grupo_ativo", "grupo_id", "ativo"),
+    )
+
 
 class Plano(db.Model):
     __tablename__ = "planos"
@@ -207,6 +287,10 @@ class AtletaPlano(db.Model):
     atleta = db.relationship("Atleta", back_populates="planos")
     plano = db.relationship("Plano", back_populates="atletas")
 
+    __table_args__ = (
+        db.Index("ix_atletas_planos_ativo", "ativo", "atleta_id"),
+    )
+
 
 # =========================
 # ATIVIDADES & PRESENÇAS
@@ -228,6 +312,10 @@ class Atividade(db.Model):
 
     presencas = db.relationship("Presenca", backref="atividade", lazy=True)
 
+    __table_args__ = (
+        db.Index("ix_atividades_data_hora", "data", "hora_inicio"),
+    )
+
 
 class Presenca(db.Model):
     __tablename__ = "presencas"
@@ -241,11 +329,16 @@ class Presenca(db.Model):
     )
     observacao = db.Column(db.String(255))
     registrado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    # horário da última alteração (do aparelho, na sincronização offline):
+    # decide quem vence quando duas alterações chegam fora de ordem
+    alterado_em = db.Column(db.DateTime, default=datetime.utcnow)
 
     atleta = db.relationship("Atleta")
 
     __table_args__ = (
         db.UniqueConstraint("atividade_id", "atleta_id", name="uk_presenca_atividade_atleta"),
+        # presenças de um atleta (recontagem da frequência, services/frequencia.py)
+        db.Index("ix_presencas_atleta", "atleta_id"),
     )
 
 
@@ -274,6 +367,24 @@ class ContaReceber(db.Model):
     mercadopago_payment_id = db.Column(db.String(100))
     pago_em = db.Column(db.DateTime)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    # "PLANO" nas cobranças geradas pelo motor (services/cobrancas.py);
+    # NULL nas avulsas lançadas à mão (uniforme, torneio, parcelas)
+    origem = db.Column(db.String(20))
+
+    __table_args__ = (
+        # uma cobrança de plano por atleta/competência (evita cobrança em dobro
+        # quando dois workers geram a mesma competência ao mesmo tempo); com
+        # origem NULL as avulsas ficam fora da unicidade
+        db.UniqueConstraint(
+            "atleta_id", "competencia", "origem", name="uk_conta_receber_plano_competencia"
+        ),
+        # job de inadimplência (PENDENTE -> ATRASADO) e filtros por status
+        db.Index("ix_contas_receber_status_vencimento", "status", "vencimento"),
+        # listagens ordenadas por vencimento (resumo, exportação)
+        db.Index("ix_contas_receber_vencimento", "vencimento"),
+        # pendência financeira por atleta (Atleta.sql_pend_financeira)
+        db.Index("ix_contas_receber_atleta_status", "atleta_id", "status"),
+    )
 
 
 class ContaPagar(db.Model):
@@ -291,6 +402,10 @@ class ContaPagar(db.Model):
     pago_em = db.Column(db.DateTime)
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_contas_pagar_vencimento", "vencimento"),
+    )
+
 
 class FluxoCaixa(db.Model):
     __tablename__ = "fluxo_caixa"
@@ -315,3 +430,72 @@ class MpWebhookLog(db.Model):
     evento = db.Column(db.String(50))
     raw_body = db.Column(db.Text)
     recebido_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# =========================
+# AGENDADOR (JOBS PERIÓDICOS)
+# =========================
+
+
+class JobLease(db.Model):
+    """
+    Trava (lease) por job no banco: só o worker que conseguir "alugar" a
+    linha até expira_em executa o job. proxima_execucao evita que outro
+    worker rode o mesmo job logo em seguida.
+    """
+
+    __tablename__ = "job_leases"
+
+    nome = db.Column(db.String(100), primary_key=True)
+    dono = db.Column(db.String(150))
+    expira_em = db.Column(db.DateTime, nullable=False)
+    proxima_execucao = db.Column(db.DateTime, nullable=False)
+
+    # marca d'água livre do job (ex.: última data já processada)
+    marca = db.Column(db.String(100))
+
+
+class JobExecucao(db.Model):
+    __tablename__ = "job_execucoes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(100), nullable=False, index=True)
+    dono = db.Column(db.String(150))
+    status = db.Column(
+        db.Enum("EXECUTANDO", "SUCESSO", "ERRO"),
+        nullable=False,
+        default="EXECUTANDO",
+    )
+    resultado = db.Column(db.Text)
+    iniciado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    finalizado_em = db.Column(db.DateTime)
+
+
+class ExportacaoTarefa(db.Model):
+    """Exportação feita em segundo plano (services/exportacao_async.py)."""
+
+    __tablename__ = "exportacao_tarefas"
+    __table_args__ = (
+        db.Index("ix_exportacao_tarefas_expira_em", "expira_em"),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), index=True)
+    relatorio = db.Column(db.String(50), nullable=False)
+    formato = db.Column(db.String(10), nullable=False)
+    parametros = db.Column(db.Text)  # JSON
+    status = db.Column(
+        db.Enum("PENDENTE", "EXECUTANDO", "CONCLUIDA", "ERRO"),
+        nullable=False,
+        default="PENDENTE",
+    )
+    progresso = db.Column(db.Integer, nullable=False, default=0)  # linhas processadas
+    total = db.Column(db.Integer)  # linhas do relatório
+    arquivo = db.Column(db.String(255))  # caminho no diretório de resultados
+    nome_arquivo = db.Column(db.String(255))  # nome do download
+    tamanho_bytes = db.Column(db.Integer)
+    erro = db.Column(db.Text)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime)
+    finalizado_em = db.Column(db.DateTime)
+    expira_em = db.Column(db.DateTime, nullable=False)
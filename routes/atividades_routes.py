@@ -1,10 +1,16 @@
 # routes/atividades_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import joinedload
 
 from extensions import db
 from models import Atividade, Grupo, Presenca, AtletaGrupo, Atleta
+from services.frequencia import atualizar_frequencia, chaves_das_atividades
+from services.metricas import inicio_mes, proximo_mes
+from services.paginacao import paginar
+from services.presencas import STATUS_PRESENCA, gravar_presencas, sincronizar_presencas
 
 atividades_bp = Blueprint("atividades", __name__, url_prefix="/atividades")
 
@@ -17,29 +23,157 @@ def _require_staff():
     return current_user.role in ("ADMIN", "COACH", "SUPER_ADMIN")
 
 
+# agenda: a tela mostra uma janela de datas (semana ou mês) e pagina dentro
+# dela pela chave (data, hora_inicio, id), que o índice ix_atividades_data_hora
+# cobre; nunca carrega a tabela inteira
+VISOES_AGENDA = ("semana", "mes")
+ORDEM_AGENDA = (Atividade.data, Atividade.hora_inicio, Atividade.id)
+ATIVIDADES_POR_PAGINA = 200
+
+# feed JSON do calendário: janela máxima e itens por resposta
+FEED_JANELA_MAXIMA_DIAS = 62
+FEED_LIMITE_PADRAO = 200
+FEED_LIMITE_MAXIMO = 500
+
+
+def _data_param(nome, padrao=None):
+    """Data YYYY-MM-DD da query string (aceita também um datetime ISO)."""
+    valor = (request.args.get(nome) or "").strip()
+    if not valor:
+        return padrao
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        return padrao
+
+
+def _janela(visao, ancora):
+    """[inicio, fim) da semana (segunda a domingo) ou do mês que contém `ancora`."""
+    if visao == "mes":
+        inicio = inicio_mes(ancora)
+        return inicio, proximo_mes(inicio)
+    inicio = ancora - timedelta(days=ancora.weekday())
+    return inicio, inicio + timedelta(days=7)
+
+
+def _atividades_na_janela(inicio, fim, grupo_id=None):
+    """Atividades com data em [inicio, fim), já com o grupo (sem N+1 no template)."""
+    query = Atividade.query.options(joinedload(Atividade.grupo)).filter(
+        Atividade.data >= inicio, Atividade.data < fim
+    )
+    if grupo_id:
+        query = query.filter(Atividade.grupo_id == grupo_id)
+    return query
+
+
 @atividades_bp.route("/listar")
 @login_required
 def listar():
     """
-    Lista todas as atividades cadastradas, agrupando por dia.
-    - Ordena da mais recente para a mais antiga.
-    - Envia 'atividades' e 'atividades_por_dia' para o template.
+    Agenda em calendário: ?visao=semana|mes&data=YYYY-MM-DD&grupo=<id>
+
+    - 'data' é qualquer dia da janela (padrão: hoje); anterior/próxima
+      navegam pela data de início da janela vizinha.
+    - Janelas com mais de ATIVIDADES_POR_PAGINA atividades continuam por
+      cursor (?cursor=), do mesmo jeito das outras listagens.
     """
-    atividades = (
-        Atividade.query.order_by(Atividade.data.desc(), Atividade.hora_inicio.desc()).all()
+    visao = request.args.get("visao")
+    if visao not in VISOES_AGENDA:
+        visao = "semana"
+    grupo_id = request.args.get("grupo", type=int)
+    hoje = date.today()
+    inicio, fim = _janela(visao, _data_param("data", hoje))
+
+    pagina = paginar(
+        _atividades_na_janela(inicio, fim, grupo_id),
+        ORDEM_AGENDA,
+        cursor=request.args.get("cursor") or None,
+        por_pagina=ATIVIDADES_POR_PAGINA,
     )
-
     atividades_por_dia = {}
-    for a in atividades:
+    for a in pagina.itens:
         atividades_por_dia.setdefault(a.data, []).append(a)
 
+    # grade de semanas inteiras (segunda a domingo) cobrindo a janela
+    semanas = []
+    dia = inicio - timedelta(days=inicio.weekday())
+    while dia < fim:
+        semanas.append([dia + timedelta(days=i) for i in range(7)])
+        dia += timedelta(days=7)
+
+    args = {"visao": visao, "data": inicio.isoformat()}
+    if grupo_id:
+        args["grupo"] = grupo_id
+
     return render_template(
         "atividades_listar.html",
-        atividades=atividades,
+        visao=visao,
+        inicio=inicio,
+        fim=fim,
+        hoje=hoje,
+        semanas=semanas,
         atividades_por_dia=atividades_por_dia,
+        pagina=pagina,
+        args=args,
+        anterior=_janela(visao, inicio - timedelta(days=1))[0],
+        proxima=fim,
+        grupo_id=grupo_id,
+        grupos=Grupo.query.order_by(Grupo.nome).all(),
     )
 
 
+@atividades_bp.route("/calendario.json")
+@login_required
+def calendario_json():
+    """
+    Feed do calendário: ?inicio=YYYY-MM-DD&fim=YYYY-MM-DD&grupo=<id>&limite=&cursor=
+
+    Janela [inicio, fim) de no máximo FEED_JANELA_MAXIMA_DIAS dias (padrão:
+    a semana atual), em ordem de data e horário; 'proximo' traz o cursor
+    quando a janela não coube numa resposta.
+    """
+    inicio = _data_param("inicio") or _janela("semana", date.today())[0]
+    fim = _data_param("fim") or inicio + timedelta(days=7)
+    if fim <= inicio:
+        return jsonify({"erro": "'fim' deve ser depois de 'inicio'"}), 400
+    if (fim - inicio).days > FEED_JANELA_MAXIMA_DIAS:
+        return jsonify({"erro": f"janela de no máximo {FEED_JANELA_MAXIMA_DIAS} dias"}), 400
+
+    try:
+        limite = int(request.args.get("limite", FEED_LIMITE_PADRAO))
+    except ValueError:
+        limite = FEED_LIMITE_PADRAO
+    limite = max(1, min(limite, FEED_LIMITE_MAXIMO))
+
+    pagina = paginar(
+        _atividades_na_janela(inicio, fim, request.args.get("grupo", type=int)),
+        ORDEM_AGENDA,
+        cursor=request.args.get("cursor") or None,
+        por_pagina=limite,
+    )
+    itens = [
+        {
+            "id": a.id,
+            "titulo": a.titulo,
+            "data": a.data.isoformat(),
+            "hora_inicio": a.hora_inicio.strftime("%H:%M"),
+            "hora_fim": a.hora_fim.strftime("%H:%M") if a.hora_fim else None,
+            "grupo_id": a.grupo_id,
+            "grupo": a.grupo.nome if a.grupo else None,
+            "local": a.local,
+            "url_presencas": url_for("atividades.presencas", atividade_id=a.id),
+            "url_editar": url_for("atividades.editar", atividade_id=a.id),
+        }
+        for a in pagina.itens
+    ]
+    return jsonify({
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "itens": itens,
+        "proximo": pagina.proximo,
+    })
+
+
 @atividades_bp.route("/nova", methods=["GET", "POST"])
 @login_required
 def nova():
@@ -145,6 +279,13 @@ def editar(atividade_id):
             flash("Hora de início inválida.", "danger")
             return redirect(url_for("atividades.editar", atividade_id=atividade.id))
 
+        # mudar grupo/data/hora mexe nos contadores de frequência das
+        # presenças já registradas (antes e depois da mudança)
+        mudou_chamada = (atividade.grupo_id, atividade.data, atividade.hora_inicio) != (
+            grupo_id, data_atividade, hora_inicio
+        )
+        chaves = chaves_das_atividades([atividade.id]) if mudou_chamada else set()
+
         atividade.titulo = titulo
         atividade.grupo_id = grupo_id
         atividade.data = data_atividade
@@ -152,6 +293,9 @@ def editar(atividade_id):
         atividade.local = local
         atividade.descricao = descricao
 
+        if mudou_chamada:
+            db.session.flush()
+            atualizar_frequencia(chaves | chaves_das_atividades([atividade.id]))
         db.session.commit()
         flash("Atividade atualizada com sucesso!", "success")
         return redirect(url_for("atividades.listar"))
@@ -167,6 +311,7 @@ def presencas(atividade_id):
     Registro de presença por atividade:
     - Lista atletas do grupo vinculado à atividade
     - Permite marcar status + observação
+    - Grava só as presenças novas ou alteradas
     """
     if not _require_staff():
         flash("Você não tem permissão para registrar presenças.", "danger")
@@ -186,24 +331,21 @@ def presencas(atividade_id):
     )
 
     if request.method == "POST":
-        # Remove presenças antigas para recriar o registro do dia
-        Presenca.query.filter_by(atividade_id=atividade.id).delete()
-
+        chamada = {}
         for atleta in atletas:
             status = request.form.get(f"status_{atleta.id}")
-            obs = request.form.get(f"observacao_{atleta.id}")
-            if not status:
+            if status not in STATUS_PRESENCA:
                 continue
-            p = Presenca(
-                atividade_id=atividade.id,
-                atleta_id=atleta.id,
-                status=status,
-                observacao=(obs or "").strip() or None,
-            )
-            db.session.add(p)
+            obs = request.form.get(f"observacao_{atleta.id}")
+            chamada[atleta.id] = (status, (obs or "").strip() or None)
 
+        # só grava o que mudou (services/presencas.py)
+        alteradas = gravar_presencas(atividade.id, chamada)
         db.session.commit()
-        flash("Presenças registradas com sucesso!", "success")
+        if alteradas:
+            flash(f"Presenças registradas: {alteradas} alteração(ões).", "success")
+        else:
+            flash("Nenhuma alteração nas presenças.", "info")
         return redirect(url_for("atividades.listar"))
 
     presencas_existentes = {
@@ -216,3 +358,44 @@ def presencas(atividade_id):
         atletas=atletas,
         presencas=presencas_existentes,
     )
+
+
+@atividades_bp.route("/presencas/sincronizar", methods=["POST"])
+@login_required
+def sincronizar():
+    """
+    Sincronização da chamada offline (static/js/presencas_offline.js).
+    Corpo: {"alteracoes": [{"id", "atividade_id", "atleta_id", "status",
+    "observacao", "em"}, ...]}, de várias atividades no mesmo lote.
+    Resposta: um resultado por alteração (services/presencas.py).
+    """
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+
+    dados = request.get_json(silent=True) or {}
+    alteracoes = dados.get("alteracoes")
+    if not isinstance(alteracoes, list):
+        return jsonify({"erro": "envie {\"alteracoes\": [...]}"}), 400
+    limite = current_app.config.get("PRESENCAS_SYNC_LOTE_MAXIMO", 500)
+    if len(alteracoes) > limite:
+        return jsonify({"erro": f"no máximo {limite} alterações por lote"}), 413
+
+    resultados = sincronizar_presencas(alteracoes)
+    db.session.commit()
+    return jsonify({
+        "resultados": resultados,
+        "aplicadas": sum(1 for r in resultados if r["situacao"] == "aplicada"),
+    })
+
+
+@atividades_bp.route("/sw.js")
+def service_worker():
+    """
+    Service worker da chamada offline, servido em /atividades/ para que o
+    escopo dele cubra as páginas de presença.
+    """
+    resposta = send_from_directory(
+        current_app.static_folder, "js/sw_presencas.js", mimetype="application/javascript"
+    )
+    resposta.headers["Cache-Control"] = "no-cache"
+    return resposta
@@ -6,22 +6,19 @@ from flask import (
     url_for,
     flash,
     current_app,
-    make_response,
 )
 from flask_login import login_required, current_user
+from sqlalchemy.orm import with_expression
 from extensions import db
 from models import Atleta, Grupo, AtletaGrupo, AtletaFoto, Responsavel, AtletaResponsavel
-from datetime import datetime, date
+from datetime import datetime
 import os
 import base64
 from werkzeug.utils import secure_filename
 from urllib.parse import quote
-import io
-import pandas as pd
-from docx import Document
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from reportlab.lib import colors
+from services.cache_exportacao import exportar_relatorio
+from services.busca import digitos_cpf, filtro_busca
+from services.paginacao import paginar
 
 atletas_bp = Blueprint("atletas", __name__, url_prefix="/atletas")
 
@@ -54,98 +51,28 @@ def salvar_foto_base64(foto_base64, atleta_id):
     db.session.add(foto)
 
 
-def gerar_arquivo_tabular(nome_base, formato, headers, rows):
-    """
-    Gera arquivo em CSV, Excel (xlsx), Word (docx) ou PDF a partir
-    de headers (lista de strings) e rows (lista de listas).
-    """
-    formato = (formato or "csv").lower()
-
-    # CSV
-    if formato == "csv":
-        linhas = [";".join(headers)]
-        for r in rows:
-            linha = ";".join("" if v is None else str(v) for v in r)
-            linhas.append(linha)
-        csv_data = "\n".join(linhas)
-        resp = make_response(csv_data)
-        resp.headers["Content-Type"] = "text/csv; charset=utf-8"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.csv"'
-        return resp
-
-    # Excel (xlsx)
-    if formato == "excel":
-        df = pd.DataFrame(rows, columns=headers)
-        buf = io.BytesIO()
-        with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Dados")
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = (
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.xlsx"'
-        return resp
-
-    # Word (docx)
-    if formato == "word":
-        doc = Document()
-        doc.add_heading(nome_base, level=1)
-
-        table = doc.add_table(rows=1, cols=len(headers))
-        hdr_cells = table.rows[0].cells
-        for i, h in enumerate(headers):
-            hdr_cells[i].text = h
-
-        for r in rows:
-            row_cells = table.add_row().cells
-            for i, v in enumerate(r):
-                row_cells[i].text = "" if v is None else str(v)
-
-        buf = io.BytesIO()
-        doc.save(buf)
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = (
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.docx"'
-        return resp
-
-    # PDF
-    if formato == "pdf":
-        buf = io.BytesIO()
-        doc = SimpleDocTemplate(buf, pagesize=A4)
-        data = [headers] + [[("" if v is None else str(v)) for v in r] for r in rows]
-        table = Table(data)
-        style = TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e293b")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ]
-        )
-        table.setStyle(style)
-        doc.build([table])
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = "application/pdf"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.pdf"'
-        return resp
+ATLETAS_POR_PAGINA = 50
+
+
+def _int_ou_none(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
 
-    # fallback: CSV
-    return gerar_arquivo_tabular(nome_base, "csv", headers, rows)
+def _faixa(valor):
+    """"8-10" -> (8, 10); "8-" -> (8, None); inválido -> (None, None)."""
+    minimo, _, maximo = (valor or "").partition("-")
+    return _int_ou_none(minimo), _int_ou_none(maximo)
 
 
 @atletas_bp.route("/listar")
 @login_required
 def listar():
     """
-    Lista alunos com filtros por nome, grupo, idade e documentos pendentes.
+    Lista alunos com filtros por nome, grupo, idade / faixa etária e
+    pendências (financeira ou de documentos), paginada por (nome, id).
     - Pais: visualizam apenas seus filhos.
     - Admin / Coach / Super Admin: visualizam todos os atletas.
     """
@@ -169,9 +96,9 @@ def listar():
     else:
         query = Atleta.query
 
-    # Filtro por nome
+    # Filtro por nome (sem acento, pelo índice de trigramas)
     if nome:
-        query = query.filter(Atleta.nome.ilike(f"%{nome}%"))
+        query = query.filter(filtro_busca(Atleta, nome))
 
     # Filtro por grupo
     if grupo_id:
@@ -181,52 +108,63 @@ def listar():
         except ValueError:
             pass
 
-    atletas = query.order_by(Atleta.nome).all()
-
-    # Filtro por idade (em anos) aplicado em memória
-    idade = None
-    if idade_str:
-        try:
-            idade = int(idade_str)
-        except ValueError:
-            idade = None
-
+    # Pendências (financeira / documentos), filtradas no banco.
+    # docs=pendente é o link antigo do dashboard.
+    pendencia = (request.args.get("pendencia") or "").strip()
+    if not pendencia and (request.args.get("docs") or "").strip() == "pendente":
+        pendencia = "documentos"
+    if pendencia == "financeira":
+        query = query.filter(Atleta.sql_pend_financeira())
+    elif pendencia == "documentos":
+        query = query.filter(Atleta.sql_docs_pendentes())
+
+    # a coluna "Financeiro" vem junto (EXISTS por linha), sem uma consulta
+    # de contas por atleta
+    query = query.options(with_expression(Atleta.pend_financeira, Atleta.sql_pend_financeira()))
+
+    # Idade exata ou faixa etária (a dos grupos), como intervalo de datas
+    idade = _int_ou_none(idade_str)
+    faixa = (request.args.get("faixa") or "").strip()
+    faixa_min, faixa_max = _faixa(faixa)
     if idade is not None:
-        hoje = date.today()
-        filtrados = []
-        for a in atletas:
-            if a.data_nascimento:
-                anos = (
-                    hoje.year
-                    - a.data_nascimento.year
-                    - (
-                        (hoje.month, hoje.day)
-                        < (a.data_nascimento.month, a.data_nascimento.day)
-                    )
-                )
-                if anos == idade:
-                    filtrados.append(a)
-        atletas = filtrados
-
-    # Filtro por documentos pendentes vindo do dashboard (docs=pendente)
-    docs = (request.args.get("docs") or "").strip()
-    if docs == "pendente":
-        atletas = [a for a in atletas if getattr(a, "docs_pendentes", False)]
+        query = query.filter(Atleta.sql_idade_entre(idade, idade))
+    elif faixa_min is not None or faixa_max is not None:
+        query = query.filter(Atleta.sql_idade_entre(faixa_min, faixa_max))
+
+    pagina = paginar(
+        query,
+        (Atleta.nome, Atleta.id),
+        cursor=request.args.get("cursor"),
+        por_pagina=ATLETAS_POR_PAGINA,
+    )
 
     filtros = {
         "nome": nome,
         "grupo_id": grupo_id,
         "idade": idade_str,
-        "docs": docs,
+        "faixa": faixa,
+        "pendencia": pendencia,
     }
 
     grupos = Grupo.query.order_by(Grupo.nome).all()
+    faixas = sorted(
+        {
+            (g.faixa_etaria_min, g.faixa_etaria_max)
+            for g in grupos
+            if g.faixa_etaria_min is not None or g.faixa_etaria_max is not None
+        },
+        key=lambda f: (f[0] or 0, f[1] or 999),
+    )
 
     return render_template(
         "atletas_listar.html",
-        atletas=atletas,
+        atletas=pagina.itens,
+        pagina=pagina,
+        # filtros atuais, para os links de página
+        args_filtro={k: v for k, v in request.args.items() if k != "cursor"},
         filtros=filtros,
         grupos=grupos,
+        faixas=faixas,
     )
 
 @atletas_bp.route("/novo", methods=["GET", "POST"])
@@ -240,7 +178,7 @@ def novo():
         posicao = (request.form.get("posicao") or "").strip() or None
 
         rg = (request.form.get("rg") or "").strip() or None
-        cpf = (request.form.get("cpf") or "").strip() or None
+        cpf = digitos_cpf(request.form.get("cpf")) or None
 
         telefone = (request.form.get("telefone") or "").strip() or None
         validade_atestado_str = request.form.get("validade_atestado") or None
@@ -319,7 +257,7 @@ def editar(atleta_id):
         posicao = (request.form.get("posicao") or "").strip() or None
 
         rg = (request.form.get("rg") or "").strip() or None
-        cpf = (request.form.get("cpf") or "").strip() or None
+        cpf = digitos_cpf(request.form.get("cpf")) or None
 
         telefone = (request.form.get("telefone") or "").strip() or None
         validade_atestado_str = request.form.get("validade_atestado") or None
@@ -395,24 +333,7 @@ def editar(atleta_id):
 def exportar():
     formato = request.args.get("formato", "csv")
 
-    atletas = Atleta.query.order_by(Atleta.nome).all()
-    headers = ["Nome", "Data de nascimento", "Posição", "Responsável", "Telefone"]
-
-    rows = []
-    for a in atletas:
-        dn = a.data_nascimento.strftime("%d/%m/%Y") if a.data_nascimento else ""
-        telefone = a.responsavel_telefone or a.telefone or ""
-        rows.append(
-            [
-                a.nome or "",
-                dn,
-                a.posicao or "",
-                a.responsavel_nome or "",
-                telefone,
-            ]
-        )
-
-    return gerar_arquivo_tabular("alunos", formato, headers, rows)
+    return exportar_relatorio("alunos", formato)
 
 
 @atletas_bp.route("/importar", methods=["GET", "POST"])
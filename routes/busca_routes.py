@@ -0,0 +1,88 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from extensions import db
+from models import Atleta, AtletaResponsavel, Responsavel
+
+from services.busca import buscar, buscar_pagina, intervalo_prefixo, normalizar, prefixo_cpf
+from services.paginacao import paginar
+
+busca_bp = Blueprint("busca", __name__, url_prefix="/busca")
+
+# autocomplete: itens por resposta (padrão e teto)
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+
+def _require_staff():
+    return current_user.role in ("ADMIN", "COACH", "SUPER_ADMIN")
+
+
+def _parametros():
+    q = (request.args.get("q") or "").strip()
+    try:
+        limite = int(request.args.get("limite", LIMITE_PADRAO))
+    except ValueError:
+        limite = LIMITE_PADRAO
+    return q, max(1, min(limite, LIMITE_MAXIMO))
+
+
+@busca_bp.route("/atletas")
+@login_required
+def atletas():
+    """
+    Autocomplete / seletor de atletas, paginado:
+    ?q=<nome ou começo do CPF>&limite=10&cursor=<proximo>&ativos=1
+
+    Nome ignora acentos e maiúsculas; só dígitos (3 ou mais) buscam pelo
+    começo do CPF. Por padrão só atletas ativos (ativos=0 traz todos).
+    Pais só veem os próprios filhos.
+    """
+    q, limite = _parametros()
+    cursor = request.args.get("cursor") or None
+
+    query = Atleta.query
+    if request.args.get("ativos", "1") != "0":
+        query = query.filter(Atleta.status == "ATIVO")
+    if current_user.role == "PARENT":
+        filhos = (
+            db.session.query(AtletaResponsavel.atleta_id)
+            .join(AtletaResponsavel.responsavel)
+            .filter(Responsavel.usuario_id == current_user.id)
+        )
+        query = query.filter(Atleta.id.in_(filhos))
+
+    cpf = prefixo_cpf(q)
+    if cpf:
+        query = query.filter(intervalo_prefixo(Atleta.cpf, cpf))
+        pagina = paginar(query, (Atleta.nome_busca, Atleta.id), cursor=cursor, por_pagina=limite)
+    else:
+        pagina = buscar_pagina(Atleta, q, cursor=cursor, limite=limite, query=query)
+
+    itens = [
+        {
+            "id": a.id,
+            "nome": a.nome,
+            "idade": a.idade_anos,
+            "responsavel": a.responsavel_nome,
+        }
+        for a in pagina.itens
+    ]
+    return jsonify({"q": q, "itens": itens, "proximo": pagina.proximo})
+
+
+@busca_bp.route("/responsaveis")
+@login_required
+def responsaveis():
+    """Autocomplete de responsáveis (só equipe): ?q=<texto>&limite=10."""
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+
+    q, limite = _parametros()
+    if not normalizar(q):
+        return jsonify({"q": q, "itens": []})
+
+    itens = [
+        {"id": r.id, "nome": r.nome, "telefone": r.telefone}
+        for r in buscar(Responsavel, q, limite=limite)
+    ]
+    return jsonify({"q": q, "itens": itens})
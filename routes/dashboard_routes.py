@@ -1,8 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, request, url_for
 from flask_login import login_required, current_user
 from datetime import date
 from extensions import db
-from models import Atleta, ContaReceber, Atividade
+from models import Atleta, ContaReceber, Atividade, Grupo
+from services.cache_dados import em_cache
+from services.frequencia import faltas_seguidas, frequencia_grupos
+from services.metricas import GRUPO_TODOS, serie_mensal
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -14,54 +17,104 @@ def index():
     if current_user.role in ("ADMIN", "SUPER_ADMIN"):
         return admin_dashboard()
     elif current_user.role == "COACH":
-        return render_template("dashboard_coach.html")
+        return coach_dashboard()
     elif current_user.role == "PARENT":
         return render_template("dashboard_parent.html")
     else:
         return redirect(url_for("auth.login"))
 
 
-def admin_dashboard():
-    hoje = date.today()
+def _kpis_admin(hoje):
+    """
+    Indicadores do painel do admin numa consulta só: uma agregação
+    condicional por tabela (atletas, contas_receber), cruzadas numa linha,
+    mais o próximo treino. Fica em cache até a próxima escrita em atletas,
+    contas_receber, atividades ou grupos (services/cache_dados.py); a data
+    entra na chave porque "documentos vencidos" e "próximo treino" mudam
+    com o dia.
+    """
 
-    total_atletas_ativos = Atleta.query.filter_by(status="ATIVO").count()
+    def calcular():
+        atletas = db.select(
+            db.func.count(db.case((Atleta.status == "ATIVO", 1))).label("ativos"),
+            db.func.count(db.case((Atleta.sql_docs_pendentes(hoje), 1))).label("docs"),
+        ).subquery()
+        contas = db.select(
+            db.func.sum(
+                db.case((ContaReceber.status == "PAGO", ContaReceber.valor), else_=0)
+            ).label("receita"),
+            db.func.count(
+                db.distinct(db.case((ContaReceber.status == "ATRASADO", ContaReceber.atleta_id)))
+            ).label("inadimplentes"),
+        ).subquery()
+        proxima = (
+            db.select(
+                Atividade.titulo,
+                Atividade.data,
+                Atividade.hora_inicio,
+                Grupo.nome.label("grupo_nome"),
+            )
+            .outerjoin(Grupo, Grupo.id == Atividade.grupo_id)
+            .where(Atividade.data >= hoje)
+            .order_by(Atividade.data, Atividade.hora_inicio)
+            .limit(1)
+            .subquery()
+        )
 
-    # Receita total paga
-    receita_paga = (
-        db.session.query(db.func.coalesce(db.func.sum(ContaReceber.valor), 0))
-        .filter(ContaReceber.status == "PAGO")
-        .scalar()
-    )
-    receita_paga = float(receita_paga or 0)
-
-    # Documentos pendentes (critério simples: atestado sem validade ou vencido)
-    documentos_pendentes = (
-        Atleta.query.filter(
-            (Atleta.validade_atestado.is_(None))
-            | (Atleta.validade_atestado < hoje)
-        ).count()
-    )
+        linha = db.session.execute(
+            db.select(atletas, contas, proxima).select_from(
+                atletas.join(contas, db.true()).outerjoin(proxima, db.true())
+            )
+        ).one()
 
-    # Quantidade de alunos inadimplentes (contas pendentes/atrasadas, distintos por atleta)
-    qtd_inadimplentes = (
-        db.session.query(db.func.count(db.func.distinct(ContaReceber.atleta_id)))
-        .filter(ContaReceber.status.in_(("PENDENTE", "ATRASADO")))
-        .scalar()
-        or 0
-    )
+        proxima_atividade = None
+        if linha.titulo is not None:
+            proxima_atividade = {
+                "titulo": linha.titulo,
+                "data": linha.data,
+                "hora_inicio": linha.hora_inicio,
+                "grupo_nome": linha.grupo_nome,
+            }
+        return {
+            "total_atletas_ativos": int(linha.ativos or 0),
+            "documentos_pendentes": int(linha.docs or 0),
+            "receita_paga": float(linha.receita or 0),
+            "qtd_inadimplentes": int(linha.inadimplentes or 0),
+            "proxima_atividade": proxima_atividade,
+        }
 
-    # Próximo treino
-    proxima_atividade = (
-        Atividade.query.filter(Atividade.data >= hoje)
-        .order_by(Atividade.data, Atividade.hora_inicio)
-        .first()
+    return em_cache(
+        f"dashboard.kpis:{hoje.isoformat()}",
+        ["atletas", "contas_receber", "atividades", "grupos"],
+        calcular,
     )
 
+
+def admin_dashboard():
+    hoje = date.today()
+    grupo_id = request.args.get("grupo", type=int) or GRUPO_TODOS
+
+    # gráficos: só a tabela de resumo mensal (services/metricas.py), então o
+    # custo não cresce com o histórico
     return render_template(
         "dashboard_admin.html",
-        total_atletas_ativos=total_atletas_ativos,
-        receita_paga=receita_paga,
-        documentos_pendentes=documentos_pendentes,
-        qtd_inadimplentes=qtd_inadimplentes,
-        proxima_atividade=proxima_atividade,
+        **_kpis_admin(hoje),
+        grupos=db.session.execute(db.select(Grupo.id, Grupo.nome).order_by(Grupo.nome)).all(),
+        grupo_id=grupo_id,
+        serie=serie_mensal(grupo_id, ate=hoje),
+    )
+
+
+# alerta do painel do professor: a partir de quantas faltas seguidas
+FALTAS_SEGUIDAS_ALERTA = 3
+
+
+def coach_dashboard():
+    # só as tabelas de contadores de frequência (services/frequencia.py)
+    return render_template(
+        "dashboard_coach.html",
+        hoje=date.today(),
+        faltas_minimo=FALTAS_SEGUIDAS_ALERTA,
+        alertas=faltas_seguidas(FALTAS_SEGUIDAS_ALERTA, limite=20),
+        frequencia=frequencia_grupos(date.today()),
     )
@@ -0,0 +1,116 @@
+from flask import Blueprint, current_app, g, jsonify, request, send_file, url_for
+from flask_login import login_required, current_user
+from markupsafe import Markup, escape
+
+from extensions import db
+from models import ExportacaoTarefa
+from services.exportacao import GERADORES
+from services.exportacao_async import enfileirar, mimetype, status_tarefa
+from services.relatorios import (
+    RELATORIOS,
+    RelatorioInvalido,
+    contar_linhas,
+    montar_relatorio,
+    pode_exportar,
+)
+
+exportacoes_bp = Blueprint("exportacoes", __name__, url_prefix="/exportacoes")
+
+
+def _tarefa_do_usuario(tarefa_id):
+    tarefa = db.session.get(ExportacaoTarefa, tarefa_id)
+    if tarefa is None or tarefa.usuario_id != current_user.id:
+        return None
+    return tarefa
+
+
+def _links(tarefa):
+    return {
+        "status_url": url_for("exportacoes.status", tarefa_id=tarefa.id),
+        "download_url": url_for("exportacoes.download", tarefa_id=tarefa.id),
+    }
+
+
+@exportacoes_bp.route("/<relatorio>", methods=["POST"])
+@login_required
+def enfileirar_exportacao(relatorio):
+    """
+    Enfileira a exportação (relatorio + formato + parâmetros, ex. grupo_id).
+    Responde 202 com as URLs de status e de download.
+    """
+    if relatorio not in RELATORIOS:
+        return jsonify({"erro": "relatório desconhecido"}), 404
+    formato = (request.values.get("formato") or "csv").lower()
+    if formato not in GERADORES:
+        return jsonify({"erro": "formato inválido"}), 400
+    if not pode_exportar(relatorio, current_user):
+        return jsonify({"erro": "sem permissão para este relatório"}), 403
+
+    parametros = {}
+    if request.values.get("grupo_id"):
+        parametros["grupo_id"] = request.values.get("grupo_id")
+    try:
+        # valida os parâmetros agora, para o erro aparecer na hora
+        montar_relatorio(relatorio, parametros)
+    except RelatorioInvalido as exc:
+        return jsonify({"erro": str(exc)}), 400
+
+    tarefa = enfileirar(
+        current_app._get_current_object(), relatorio, formato, parametros,
+        usuario_id=current_user.id,
+    )
+    return jsonify({**status_tarefa(tarefa), **_links(tarefa)}), 202
+
+
+@exportacoes_bp.route("/<tarefa_id>/status")
+@login_required
+def status(tarefa_id):
+    tarefa = _tarefa_do_usuario(tarefa_id)
+    if tarefa is None:
+        return jsonify({"erro": "exportação não encontrada ou expirada"}), 404
+    return jsonify({**status_tarefa(tarefa), **_links(tarefa)})
+
+
+@exportacoes_bp.route("/<tarefa_id>/download")
+@login_required
+def download(tarefa_id):
+    tarefa = _tarefa_do_usuario(tarefa_id)
+    if tarefa is None:
+        return jsonify({"erro": "exportação não encontrada ou expirada"}), 404
+    if tarefa.status != "CONCLUIDA":
+        return jsonify(status_tarefa(tarefa)), 409
+    resp = send_file(tarefa.arquivo, as_attachment=True, download_name=tarefa.nome_arquivo)
+    # depois do send_file: com mimetype= o Werkzeug repete o charset do CSV
+    resp.headers["Content-Type"] = mimetype(tarefa)
+    return resp
+
+
+# =========================
+# Helper de template
+# =========================
+
+def _linhas_do_relatorio(relatorio, parametros):
+    """COUNT do relatório, uma vez por requisição."""
+    cache = g.setdefault("_linhas_relatorios", {})
+    chave = (relatorio, tuple(sorted(parametros.items())))
+    if chave not in cache:
+        _, _, consulta, _ = montar_relatorio(relatorio, parametros)
+        cache[chave] = contar_linhas(consulta)
+    return cache[chave]
+
+
+@exportacoes_bp.app_template_global()
+def preparar_exportacao(relatorio, formato, **parametros):
+    """
+    Atributo data-preparar para o botão de exportação quando o relatório é
+    grande demais para o formato (Config.EXPORTACAO_LIMITE_SINCRONO): o JS
+    (static/js/exportacoes.js) troca o download direto por "preparar e
+    depois baixar". Para relatórios pequenos não devolve nada.
+    """
+    limite = current_app.config.get("EXPORTACAO_LIMITE_SINCRONO", {}).get(formato)
+    if limite is None or _linhas_do_relatorio(relatorio, parametros) <= limite:
+        return ""
+    url = url_for(
+        "exportacoes.enfileirar_exportacao", relatorio=relatorio, formato=formato, **parametros
+    )
+    return Markup(f' data-preparar="{escape(url)}"')
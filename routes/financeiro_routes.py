@@ -5,9 +5,9 @@ from flask import (
     redirect,
     url_for,
     flash,
-    make_response,
 )
 from flask_login import login_required, current_user
+from sqlalchemy.orm import contains_eager
 
 from extensions import db
 from models import (
@@ -16,20 +16,18 @@ from models import (
     Atleta,
     Responsavel,
     ContaPagar,
-    AtletaPlano,
-    Plano,
 )
+from services.busca import filtro_busca
+from services.cache_dados import em_cache
+from services.cobrancas import gerar_cobrancas_competencia
+from services.inadimplencia import status_por_vencimento
+from services.paginacao import paginar
 from urllib.parse import quote
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 import os
 
 # exportação multi-formato
-import io
-import pandas as pd
-from docx import Document
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from reportlab.lib import colors
+from services.cache_exportacao import exportar_relatorio
 
 
 financeiro_bp = Blueprint("financeiro", __name__, url_prefix="/financeiro")
@@ -42,182 +40,20 @@ def _require_admin():
     return True
 
 
-def gerar_arquivo_tabular(nome_base, formato, headers, rows):
-    formato = (formato or "csv").lower()
-
-    # CSV
-    if formato == "csv":
-        linhas = [";".join(headers)]
-        for r in rows:
-            linha = ";".join("" if v is None else str(v) for v in r)
-            linhas.append(linha)
-        csv_data = "\n".join(linhas)
-        resp = make_response(csv_data)
-        resp.headers["Content-Type"] = "text/csv; charset=utf-8"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.csv"'
-        return resp
-
-    # Excel
-    if formato == "excel":
-        df = pd.DataFrame(rows, columns=headers)
-        buf = io.BytesIO()
-        with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Dados")
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = (
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.xlsx"'
-        return resp
-
-    # Word
-    if formato == "word":
-        doc = Document()
-        doc.add_heading(nome_base, level=1)
-        table = doc.add_table(rows=1, cols=len(headers))
-        hdr_cells = table.rows[0].cells
-        for i, h in enumerate(headers):
-            hdr_cells[i].text = h
-        for r in rows:
-            row_cells = table.add_row().cells
-            for i, v in enumerate(r):
-                row_cells[i].text = "" if v is None else str(v)
-        buf = io.BytesIO()
-        doc.save(buf)
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = (
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.docx"'
-        return resp
-
-    # PDF
-    if formato == "pdf":
-        buf = io.BytesIO()
-        doc = SimpleDocTemplate(buf, pagesize=A4)
-        data = [headers] + [[("" if v is None else str(v)) for v in r] for r in rows]
-        table = Table(data)
-        style = TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e293b")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ]
-        )
-        table.setStyle(style)
-        doc.build([table])
-        buf.seek(0)
-        resp = make_response(buf.getvalue())
-        resp.headers["Content-Type"] = "application/pdf"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{nome_base}.pdf"'
-        return resp
-
-    # fallback
-    return gerar_arquivo_tabular(nome_base, "csv", headers, rows)
-
-
 # =========================
 # Cobrança automática
 # =========================
 
-def primeiro_dia_util(ano: int, mes: int) -> date:
-    """
-    Retorna o primeiro dia útil (segunda a sexta) do mês/ano informado.
-    """
-    d = date(ano, mes, 1)
-    # weekday(): 0=segunda ... 6=domingo
-    while d.weekday() >= 5:  # 5=sábado, 6=domingo
-        d += timedelta(days=1)
-    return d
-
-
 def _gerar_cobrancas_para_mes(ano: int, mes: int) -> int:
     """
     Gera cobranças (ContaReceber) para todos atletas com plano ativo
     na competência ano/mes. Não duplica se já existir para o mês.
     Retorna a quantidade criada.
-    """
-    competencia = date(ano, mes, 1)
-    planos_ativos = AtletaPlano.query.filter_by(ativo=True).all()
-    criadas = 0
-
-    for ap in planos_ativos:
-        plano = ap.plano
-        atleta = ap.atleta
-
-        if not plano or not atleta:
-            continue
-
-        # não gera duplicado
-        existente = ContaReceber.query.filter_by(
-            atleta_id=atleta.id,
-            competencia=competencia,
-        ).first()
-        if existente:
-            continue
-
-        dia_venc = plano.dia_vencimento or 10
-        vencimento = date(ano, mes, dia_venc)
-
-        conta = ContaReceber(
-            atleta_id=atleta.id,
-            descricao=f"Mensalidade {plano.nome} {competencia.strftime('%m/%Y')}",
-            competencia=competencia,
-            vencimento=vencimento,
-            valor=plano.valor_mensal,
-            status="PENDENTE",
-            metodo_pagamento=plano.forma_pagamento_padrao,
-        )
-        db.session.add(conta)
-        criadas += 1
-
-    if criadas > 0:
-        db.session.commit()
-    return criadas
-
 
-# guarda em memória qual competência já processamos
-_ultima_competencia_processada = None
-
-
-@financeiro_bp.before_app_request
-def _auto_gerar_cobrancas_mes_atual():
-    """
-    Roda automaticamente a geração de cobranças no primeiro dia útil
-    do mês, na primeira requisição autenticada que bater na aplicação.
-
-    - Só roda se:
-        * usuário estiver logado (qualquer papel)
-        * hoje >= primeiro dia útil do mês
-        * ainda não processamos esta competência neste processo
+    A geração é feita pelo motor em services/cobrancas.py (anti-join +
+    INSERT em lote), respeitando a periodicidade do plano.
     """
-    global _ultima_competencia_processada
-
-    if not current_user.is_authenticated:
-        return
-
-    hoje = date.today()
-    competencia = date(hoje.year, hoje.month, 1)
-    primeiro_util = primeiro_dia_util(hoje.year, hoje.month)
-
-    # ainda não chegou o primeiro dia útil -> não gera nada
-    if hoje < primeiro_util:
-        return
-
-    if _ultima_competencia_processada == competencia:
-        return
-
-    criadas = _gerar_cobrancas_para_mes(hoje.year, hoje.month)
-    _ultima_competencia_processada = competencia
-
-    # sem flash aqui pra não poluir a experiência do usuário final
-    # (se quiser logar, pode usar print ou logging)
+    return gerar_cobrancas_competencia(ano, mes)
 
 
 @financeiro_bp.route("/gerar_cobrancas_automaticas")
@@ -253,6 +89,33 @@ def gerar_cobrancas_automaticas():
 # RESUMO FINANCEIRO
 # =========================
 
+LANCAMENTOS_POR_PAGINA = 50
+
+
+def _kpis_financeiros():
+    """
+    Total pago, total em aberto e alunos inadimplentes numa passada só
+    pela tabela (agregação condicional), em cache até a próxima escrita
+    em contas_receber (services/cache_dados.py).
+    """
+
+    def calcular():
+        pago = ContaReceber.status == "PAGO"
+        atrasado = ContaReceber.status == "ATRASADO"
+        linha = db.session.query(
+            db.func.sum(db.case((pago, ContaReceber.valor), else_=0)),
+            db.func.sum(db.case((pago, 0), else_=ContaReceber.valor)),
+            db.func.count(db.distinct(db.case((atrasado, ContaReceber.atleta_id)))),
+        ).one()
+        return {
+            "total_pago": float(linha[0] or 0),
+            "total_pendente": float(linha[1] or 0),
+            "qtd_inad": int(linha[2] or 0),
+        }
+
+    return em_cache("financeiro.kpis", ["contas_receber"], calcular)
+
+
 @financeiro_bp.route("/resumo")
 @login_required
 def resumo():
@@ -265,6 +128,10 @@ def resumo():
             qtd_inad=0,
             itens=[],
             despesas=[],
+            pagina_itens=None,
+            pagina_despesas=None,
+            args_itens={},
+            args_despesas={},
             filtros={"nome": "", "status": "TODOS", "inadimplentes": "0"},
         )
 
@@ -272,38 +139,35 @@ def resumo():
     status = request.args.get("status") or "TODOS"
     so_inadimplentes = request.args.get("inadimplentes") == "1"
 
-    query = ContaReceber.query.join(ContaReceber.atleta, isouter=True)
+    query = ContaReceber.query.outerjoin(ContaReceber.atleta).options(
+        contains_eager(ContaReceber.atleta)
+    )
 
     if so_inadimplentes:
-        query = query.filter(ContaReceber.status.in_(("PENDENTE", "ATRASADO")))
+        # o job de inadimplência mantém ATRASADO em dia (services/inadimplencia.py)
+        query = query.filter(ContaReceber.status == "ATRASADO")
     elif status != "TODOS":
         query = query.filter(ContaReceber.status == status)
 
     if nome:
-        query = query.filter(Atleta.nome.ilike(f"%{nome}%"))
-
-    itens = query.order_by(ContaReceber.vencimento.desc()).limit(200).all()
-
-    total_pendente = (
-        db.session.query(db.func.sum(ContaReceber.valor))
-        .filter(ContaReceber.status != "PAGO")
-        .scalar()
-        or 0
-    )
-    total_pago = (
-        db.session.query(db.func.sum(ContaReceber.valor))
-        .filter(ContaReceber.status == "PAGO")
-        .scalar()
-        or 0
+        query = query.filter(filtro_busca(Atleta, nome))
+
+    # listagens paginadas por (vencimento, id), do mais recente para trás
+    pagina_itens = paginar(
+        query,
+        (ContaReceber.vencimento, ContaReceber.id),
+        cursor=request.args.get("cursor"),
+        por_pagina=LANCAMENTOS_POR_PAGINA,
+        descendente=True,
     )
-    qtd_inad = (
-        ContaReceber.query.filter(
-            ContaReceber.status.in_(("PENDENTE", "ATRASADO"))
-        ).count()
+    pagina_despesas = paginar(
+        ContaPagar.query,
+        (ContaPagar.vencimento, ContaPagar.id),
+        cursor=request.args.get("cursor_despesas"),
+        por_pagina=LANCAMENTOS_POR_PAGINA,
+        descendente=True,
     )
 
-    despesas = ContaPagar.query.order_by(ContaPagar.vencimento.desc()).limit(200).all()
-
     filtros = {
         "nome": nome,
         "status": status,
@@ -312,11 +176,14 @@ def resumo():
 
     return render_template(
         "financeiro_resumo.html",
-        total_pendente=float(total_pendente),
-        total_pago=float(total_pago),
-        qtd_inad=qtd_inad,
-        itens=itens,
-        despesas=despesas,
+        **_kpis_financeiros(),
+        itens=pagina_itens.itens,
+        despesas=pagina_despesas.itens,
+        pagina_itens=pagina_itens,
+        pagina_despesas=pagina_despesas,
+        # links de página de cada lista mantêm filtros e a página da outra
+        args_itens={k: v for k, v in request.args.items() if k != "cursor"},
+        args_despesas={k: v for k, v in request.args.items() if k != "cursor_despesas"},
         filtros=filtros,
     )
 
@@ -349,27 +216,7 @@ def exportar():
 
     formato = request.args.get("formato", "csv")
 
-    itens = (
-        ContaReceber.query.join(ContaReceber.atleta, isouter=True)
-        .order_by(ContaReceber.vencimento.desc())
-        .all()
-    )
-
-    headers = ["Aluno", "Vencimento", "Valor", "Status"]
-    rows = []
-    for c in itens:
-        nome = c.atleta.nome if c.atleta else ""
-        ven = c.vencimento.strftime("%d/%m/%Y") if c.vencimento else ""
-        rows.append(
-            [
-                nome,
-                ven,
-                f"{float(c.valor or 0):.2f}",
-                c.status or "",
-            ]
-        )
-
-    return gerar_arquivo_tabular("financeiro", formato, headers, rows)
+    return exportar_relatorio("financeiro", formato)
 
 
 # =========================
@@ -618,11 +465,10 @@ def nova_despesa():
 @financeiro_bp.route("/cobranca/nova", methods=["GET", "POST"])
 @login_required
 def nova_cobranca():
+    # o atleta é escolhido no seletor com busca (static/js/seletor_atletas.js,
+    # /busca/atletas); aqui só o pré-selecionado por ?atleta_id=
     atleta_id_param = request.args.get("atleta_id", type=int)
-    atletas = Atleta.query.order_by(Atleta.nome).all()
-    atleta_selecionado = None
-    if atleta_id_param:
-        atleta_selecionado = next((a for a in atletas if a.id == atleta_id_param), None)
+    atleta_selecionado = db.session.get(Atleta, atleta_id_param) if atleta_id_param else None
 
     if request.method == "POST":
         from dateutil.relativedelta import relativedelta
@@ -648,23 +494,33 @@ def nova_cobranca():
             flash("Verifique valor, parcelas e vencimento.", "danger")
             return redirect(url_for("financeiro.nova_cobranca"))
 
+        if db.session.get(Atleta, atleta_id) is None:
+            flash("Atleta não encontrado.", "danger")
+            return redirect(url_for("financeiro.nova_cobranca"))
+
+        linhas = []
         for i in range(parcelas):
             venci_parcela = vencimento + relativedelta(months=i)
             desc_parcela = (
                 f"{descricao} ({i+1}/{parcelas})" if parcelas > 1 else descricao
             )
-            conta = ContaReceber(
-                atleta_id=atleta_id,
-                descricao=desc_parcela,
-                competencia=date(venci_parcela.year, venci_parcela.month, 1),
-                vencimento=venci_parcela,
-                valor=valor,
-                status="PENDENTE",
-            )
-            db.session.add(conta)
-
+            linhas.append({
+                "atleta_id": atleta_id,
+                "descricao": desc_parcela,
+                "competencia": date(venci_parcela.year, venci_parcela.month, 1),
+                "vencimento": venci_parcela,
+                "valor": valor,
+                "status": status_por_vencimento(venci_parcela),
+            })
+
+        # avulsa (origem NULL): convive com a mensalidade do plano no mesmo
+        # mês e não ocupa a vaga dela (uk_conta_receber_plano_competencia)
+        db.session.execute(db.insert(ContaReceber), linhas)
         db.session.commit()
-        flash("Cobrança(s) criada(s) com sucesso.", "success")
+        flash(f"{len(linhas)} cobrança(s) criada(s) com sucesso.", "success")
+
         return redirect(url_for("financeiro.resumo"))
 
-    return render_template("financeiro_cobranca_form.html", atletas=atletas)
\ No newline at end of file
+    return render_template(
+        "financeiro_cobranca_form.html", atleta_selecionado=atleta_selecionado
+    )
\ No newline at end of file
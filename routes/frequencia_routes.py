@@ -0,0 +1,82 @@
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from extensions import db
+from models import Atleta, Grupo
+
+from services.frequencia import faltas_seguidas, frequencia_atleta, frequencia_grupo, frequencia_grupos
+
+frequencia_bp = Blueprint("frequencia", __name__, url_prefix="/frequencia")
+
+MESES_PADRAO = 6
+MESES_MAXIMO = 24
+
+
+def _require_staff():
+    return current_user.role in ("ADMIN", "COACH", "SUPER_ADMIN")
+
+
+def _meses():
+    meses = request.args.get("meses", MESES_PADRAO, type=int) or MESES_PADRAO
+    return max(1, min(meses, MESES_MAXIMO))
+
+
+def _json(valor):
+    """Datas em ISO (o jsonify do Flask usaria o formato HTTP)."""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, dict):
+        return {k: _json(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_json(v) for v in valor]
+    return valor
+
+
+def _mes():
+    """?mes=AAAA-MM (padrão: mês atual)."""
+    try:
+        return date.fromisoformat(request.args["mes"] + "-01")
+    except (KeyError, ValueError):
+        return date.today()
+
+
+@frequencia_bp.route("/alertas")
+@login_required
+def alertas():
+    """Atletas com N ou mais faltas seguidas: ?faltas=3&grupo=<id>."""
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+    minimo = max(1, request.args.get("faltas", 3, type=int) or 3)
+    itens = faltas_seguidas(minimo, grupo_id=request.args.get("grupo", type=int))
+    return jsonify({"faltas": minimo, "itens": _json(itens)})
+
+
+@frequencia_bp.route("/grupos")
+@login_required
+def grupos():
+    """Frequência de cada grupo no mês: ?mes=AAAA-MM."""
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+    mes = _mes().replace(day=1)
+    return jsonify({"mes": mes.isoformat(), "itens": _json(frequencia_grupos(mes))})
+
+
+@frequencia_bp.route("/grupos/<int:grupo_id>")
+@login_required
+def grupo(grupo_id):
+    """Série mensal do grupo e frequência de cada atleta: ?meses=6&mes=AAAA-MM."""
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+    g = db.get_or_404(Grupo, grupo_id)
+    return jsonify({"grupo_id": g.id, "grupo": g.nome, **_json(frequencia_grupo(g.id, _mes(), _meses()))})
+
+
+@frequencia_bp.route("/atletas/<int:atleta_id>")
+@login_required
+def atleta(atleta_id):
+    """Frequência do atleta por grupo e sequências atuais: ?meses=6."""
+    if not _require_staff():
+        return jsonify({"erro": "sem permissão"}), 403
+    a = db.get_or_404(Atleta, atleta_id)
+    return jsonify({"atleta_id": a.id, "atleta": a.nome, **_json(frequencia_atleta(a.id, _mes(), _meses()))})
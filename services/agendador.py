@@ -0,0 +1,250 @@
+"""
+Agendador de jobs periódicos (cobrança automática, etc.), fora do
+caminho das requisições.
+
+- Cada worker do gunicorn pode iniciar a thread do agendador; quem
+  executa de fato é decidido por uma trava (lease) na tabela job_leases.
+- Toda execução fica registrada em job_execucoes.
+- Também dá para rodar via cron: `flask agendador executar`.
+"""
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import JobExecucao, JobLease
+
+
+# nome -> {"func": callable, "intervalo": timedelta, "duracao_lease": timedelta}
+JOBS = {}
+
+
+def job(nome: str, intervalo_segundos: int, duracao_lease_segundos: int = 600):
+    """
+    Decorator que registra uma função como job periódico.
+    A função roda dentro de um app_context e pode retornar um dict
+    (gravado como resultado da execução).
+    """
+
+    def decorator(func):
+        JOBS[nome] = {
+            "func": func,
+            "intervalo": timedelta(seconds=intervalo_segundos),
+            "duracao_lease": timedelta(seconds=duracao_lease_segundos),
+        }
+        return func
+
+    return decorator
+
+
+def identificador_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+# =========================
+# Lease no banco
+# =========================
+
+def adquirir_lease(nome: str, dono: str, duracao: timedelta, agora=None) -> bool:
+    """
+    Tenta travar o job `nome` para `dono`. Só consegue se a trava anterior
+    já expirou e se o job já está na hora de rodar de novo.
+    Usa um UPDATE condicional (atômico) e, se a linha ainda não existir,
+    um INSERT protegido pela chave primária.
+    """
+    agora = agora or datetime.utcnow()
+
+    atualizadas = (
+        JobLease.query.filter(
+            JobLease.nome == nome,
+            JobLease.expira_em <= agora,
+            JobLease.proxima_execucao <= agora,
+        )
+        .update(
+            {"dono": dono, "expira_em": agora + duracao},
+            synchronize_session=False,
+        )
+    )
+    if atualizadas:
+        db.session.commit()
+        return True
+
+    db.session.rollback()
+    if db.session.get(JobLease, nome) is not None:
+        return False
+
+    try:
+        db.session.add(
+            JobLease(
+                nome=nome,
+                dono=dono,
+                expira_em=agora + duracao,
+                proxima_execucao=agora,
+            )
+        )
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # outro worker criou a linha primeiro
+        db.session.rollback()
+        return False
+
+
+def liberar_lease(nome: str, dono: str, proxima_execucao: datetime):
+    JobLease.query.filter_by(nome=nome, dono=dono).update(
+        {"expira_em": datetime.utcnow(), "proxima_execucao": proxima_execucao},
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+
+def ler_marca(nome: str):
+    lease = db.session.get(JobLease, nome)
+    return lease.marca if lease else None
+
+
+def gravar_marca(nome: str, valor):
+    """Grava a marca d'água do job (sem commit: vai junto com o trabalho do job)."""
+    JobLease.query.filter_by(nome=nome).update(
+        {"marca": None if valor is None else str(valor)},
+        synchronize_session=False,
+    )
+
+
+# =========================
+# Execução
+# =========================
+
+def executar_job(nome: str, forcar: bool = False):
+    """
+    Executa o job se conseguir a trava. Retorna o JobExecucao gravado
+    ou None quando outro worker está com a trava (ou ainda não é a hora).
+    Com forcar=True ignora proxima_execucao, mas ainda respeita a trava.
+    """
+    definicao = JOBS[nome]
+    dono = identificador_worker()
+    agora = datetime.utcnow()
+
+    if forcar:
+        JobLease.query.filter(
+            JobLease.nome == nome, JobLease.expira_em <= agora
+        ).update({"proxima_execucao": agora}, synchronize_session=False)
+        db.session.commit()
+
+    if not adquirir_lease(nome, dono, definicao["duracao_lease"], agora):
+        return None
+
+    execucao = JobExecucao(job=nome, dono=dono, status="EXECUTANDO", iniciado_em=agora)
+    db.session.add(execucao)
+    db.session.commit()
+    execucao_id = execucao.id
+
+    try:
+        resultado = definicao["func"]()
+        status = "SUCESSO"
+        detalhe = json.dumps(resultado, default=str) if resultado is not None else None
+    except Exception as exc:  # noqa: BLE001 - registra qualquer falha do job
+        db.session.rollback()
+        status = "ERRO"
+        detalhe = f"{type(exc).__name__}: {exc}"
+
+    execucao = db.session.get(JobExecucao, execucao_id)
+    execucao.status = status
+    execucao.resultado = detalhe
+    execucao.finalizado_em = datetime.utcnow()
+    db.session.commit()
+
+    liberar_lease(nome, dono, datetime.utcnow() + definicao["intervalo"])
+    return execucao
+
+
+def executar_pendentes():
+    """Roda (uma vez) todos os jobs registrados que estiverem na hora."""
+    execucoes = []
+    for nome in list(JOBS):
+        execucao = executar_job(nome)
+        if execucao is not None:
+            execucoes.append(execucao)
+    return execucoes
+
+
+# =========================
+# Thread em background
+# =========================
+
+def _loop(app, parar: threading.Event, intervalo: int):
+    while not parar.wait(intervalo):
+        with app.app_context():
+            try:
+                executar_pendentes()
+            except Exception:
+                app.logger.exception("Agendador: falha ao executar jobs")
+            finally:
+                db.session.remove()
+
+
+def iniciar_agendador(app):
+    """
+    Inicia a thread do agendador (uma por processo). Controlado por
+    AGENDADOR_ATIVO / AGENDADOR_INTERVALO_SEGUNDOS na Config.
+    """
+    if not app.config.get("AGENDADOR_ATIVO"):
+        return None
+    if "agendador" in app.extensions:
+        return app.extensions["agendador"]
+
+    # importa os jobs para registrá-los no JOBS
+    import services.jobs  # noqa: F401
+
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=_loop,
+        args=(app, parar, app.config.get("AGENDADOR_INTERVALO_SEGUNDOS", 60)),
+        name="agendador",
+        daemon=True,
+    )
+    thread.start()
+    app.extensions["agendador"] = {"thread": thread, "parar": parar}
+    return app.extensions["agendador"]
+
+
+def registrar_cli(app):
+    import click
+
+    @app.cli.group("agendador")
+    def agendador_cli():
+        """Jobs periódicos (cobrança automática, etc.)."""
+
+    @agendador_cli.command("executar")
+    @click.argument("nome", required=False)
+    @click.option("--forcar", is_flag=True, help="Ignora o intervalo do job.")
+    def executar_cmd(nome, forcar):
+        """Executa os jobs pendentes (ou só o job NOME)."""
+        import services.jobs  # noqa: F401
+
+        nomes = [nome] if nome else list(JOBS)
+        for n in nomes:
+            if n not in JOBS:
+                raise click.BadParameter(f"job desconhecido: {n}")
+            execucao = executar_job(n, forcar=forcar)
+            if execucao is None:
+                click.echo(f"{n}: ignorado (travado por outro worker ou fora do horário)")
+            else:
+                click.echo(f"{n}: {execucao.status} {execucao.resultado or ''}")
+
+    @agendador_cli.command("historico")
+    @click.option("--limite", default=20, show_default=True)
+    def historico_cmd(limite):
+        """Mostra as últimas execuções dos jobs."""
+        execucoes = (
+            JobExecucao.query.order_by(JobExecucao.id.desc()).limit(limite).all()
+        )
+        for e in execucoes:
+            click.echo(
+                f"{e.iniciado_em:%d/%m/%Y %H:%M:%S} {e.job:<30} {e.status:<10} "
+                f"{e.dono or ''} {e.resultado or ''}"
+            )
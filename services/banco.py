@@ -0,0 +1,129 @@
+"""
+Configuração do banco por backend.
+
+O backend é escolhido pela URL (Config.SQLALCHEMY_DATABASE_URI, que pode vir
+de DATABASE_URL):
+- mysql+pymysql://...  produção (Railway);
+- sqlite:///arquivo.db  SQLite embutido em modo WAL, para escolas pequenas
+  (um servidor só) e para benchmarks locais.
+
+No SQLite, toda conexão nova recebe os PRAGMAs de Config.SQLITE_PRAGMAS e o
+busy timeout (espera pela trava de escrita em vez de falhar na hora).
+
+upsert() monta o INSERT ... ON CONFLICT / ON DUPLICATE KEY de cada backend.
+"""
+from sqlalchemy import event
+
+from extensions import db
+
+
+def eh_sqlite(uri: str) -> bool:
+    return (uri or "").startswith("sqlite")
+
+
+def _opcoes_sqlite(app) -> dict:
+    opcoes = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    connect_args = dict(opcoes.get("connect_args") or {})
+    # timeout do sqlite3 (segundos) = busy timeout da conexão
+    connect_args.setdefault("timeout", app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000)
+    # a mesma conexão pode ser usada pela thread do agendador
+    connect_args.setdefault("check_same_thread", False)
+    opcoes["connect_args"] = connect_args
+    return opcoes
+
+
+def _aplicar_pragmas(pragmas: dict, busy_timeout_ms: int):
+    def on_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome} = {valor}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def init_banco(app):
+    """
+    Substitui o db.init_app(app): ajusta as opções do engine para o backend
+    da URL e, no SQLite, liga os PRAGMAs em cada conexão nova.
+    """
+    sqlite = eh_sqlite(app.config.get("SQLALCHEMY_DATABASE_URI"))
+    if sqlite:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _opcoes_sqlite(app)
+
+    db.init_app(app)
+
+    if sqlite:
+        with app.app_context():
+            event.listen(
+                db.engine,
+                "connect",
+                _aplicar_pragmas(
+                    app.config.get("SQLITE_PRAGMAS") or {},
+                    app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000),
+                ),
+            )
+
+
+def upsert(modelo, linhas, chaves, atualizar=(), somente_se_maior=None):
+    """
+    INSERT em lote de `linhas` (dicts) que, quando a linha já existe
+    (conflito na constraint única formada por `chaves`), só atualiza as
+    colunas `atualizar` (nenhuma = ignora a linha); as demais (ex.:
+    registrado_em) ficam como estavam. Com `somente_se_maior` (nome de uma
+    coluna, ex.: alterado_em) a linha existente só é atualizada se o valor
+    novo dessa coluna for maior (last-write-wins).
+
+    Um comando só: ON CONFLICT (SQLite) ou ON DUPLICATE KEY UPDATE / INSERT
+    IGNORE (MySQL). Passa pelos eventos da sessão (versoes, metricas).
+    """
+    if not linhas:
+        return
+    tabela = modelo.__table__ if hasattr(modelo, "__table__") else modelo
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(modelo)
+        if not atualizar:
+            stmt = stmt.prefix_with("IGNORE")
+        else:
+            colunas = list(atualizar)
+            if somente_se_maior:
+                # o MySQL avalia as atribuições em ordem: a coluna de
+                # comparação vai por último, depois das que dependem dela
+                colunas = [c for c in colunas if c != somente_se_maior] + [somente_se_maior]
+                mais_novo = db.or_(
+                    tabela.c[somente_se_maior].is_(None),
+                    stmt.inserted[somente_se_maior] > tabela.c[somente_se_maior],
+                )
+                valores = [
+                    (c, db.func.if_(mais_novo, stmt.inserted[c], tabela.c[c])) for c in colunas
+                ]
+            else:
+                valores = [(c, stmt.inserted[c]) for c in colunas]
+            stmt = stmt.on_duplicate_key_update(valores)
+    elif dialeto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(modelo)
+        if not atualizar:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(chaves))
+        else:
+            condicao = None
+            if somente_se_maior:
+                condicao = db.or_(
+                    tabela.c[somente_se_maior].is_(None),
+                    stmt.excluded[somente_se_maior] > tabela.c[somente_se_maior],
+                )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(chaves),
+                set_={c: stmt.excluded[c] for c in atualizar},
+                where=condicao,
+            )
+    else:
+        raise NotImplementedError(f"upsert sem suporte para o banco {dialeto}")
+    db.session.execute(stmt, linhas)
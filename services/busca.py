@@ -0,0 +1,339 @@
+"""
+Busca por nome de atletas e responsáveis (sem acento, sem maiúsculas).
+
+- Cada atleta/responsável guarda `nome_busca`: o nome normalizado
+  ("Araújo" -> "araujo"), mantido pela sessão a cada flush.
+- A tabela `busca_termos` guarda os trigramas de cada palavra do nome
+  ("_ar", "ara", "rau", ...), com índice por (entidade, termo). Uma busca
+  por "rauj" pega os ids que têm todos os trigramas da consulta pelo
+  índice e só então confere `nome_busca LIKE '%rauj%'` nesses poucos ids,
+  em vez de varrer a tabela com um LIKE de curinga à esquerda.
+- Palavras de 1 ou 2 letras só casam com início de palavra ("jo" acha
+  "João", não "Barbosa"), pelos trigramas com prefixo "_".
+
+Inserções em lote (db.insert) não passam pelos eventos da sessão: depois
+delas rode `reindexar()` (ou `flask busca reindexar`).
+"""
+import re
+import unicodedata
+
+from sqlalchemy import bindparam, event, inspect
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Atleta, Responsavel
+from services.paginacao import (
+    CursorInvalido,
+    Pagina,
+    codificar_cursor,
+    decodificar_cursor,
+    depois_de,
+)
+
+# entidade -> modelo com as colunas `nome` e `nome_busca`
+ENTIDADES = {"atletas": Atleta, "responsaveis": Responsavel}
+
+LOTE_REINDEXAR = 2000
+
+busca_termos = db.Table(
+    "busca_termos",
+    db.Column("entidade", db.String(20), primary_key=True),
+    db.Column("termo", db.String(3), primary_key=True),
+    db.Column("ref_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Index("ix_busca_termos_ref", "entidade", "ref_id"),
+)
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sem acento e só letras/números separados por um espaço."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(_NAO_ALFANUMERICO.sub(" ", texto.lower()).split())
+
+
+def trigramas(nome_busca: str) -> set:
+    """Trigramas de cada palavra, com "__" no início (buscas por prefixo)."""
+    termos = set()
+    for palavra in nome_busca.split():
+        p = "__" + palavra
+        termos.update(p[i:i + 3] for i in range(len(p) - 2))
+    return termos
+
+
+def _entidade_do_modelo(modelo):
+    for nome, m in ENTIDADES.items():
+        if m is modelo:
+            return nome
+    raise ValueError(f"modelo sem busca: {modelo.__name__}")
+
+
+# =========================
+# Consulta
+# =========================
+
+def _termos_da_consulta(texto):
+    """(trigramas exigidos, condições de conferência) para o texto digitado."""
+    exigidos = set()
+    conferir = []
+    for palavra in normalizar(texto).split():
+        if len(palavra) >= 3:
+            exigidos.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+            conferir.append(("meio", palavra))
+        else:
+            p = "__" + palavra
+            exigidos.update(p[i:i + 3] for i in range(len(p) - 2))
+            conferir.append(("inicio", palavra))
+    return exigidos, conferir
+
+
+def filtro_busca(modelo, texto):
+    """
+    Condição para `.filter()`: nome do modelo (Atleta ou Responsavel)
+    contém o texto, ignorando acento e maiúsculas. Texto vazio não filtra.
+    """
+    exigidos, conferir = _termos_da_consulta(texto)
+    if not exigidos:
+        return db.true()
+
+    entidade = _entidade_do_modelo(modelo)
+    candidatos = (
+        db.select(busca_termos.c.ref_id)
+        .where(busca_termos.c.entidade == entidade, busca_termos.c.termo.in_(sorted(exigidos)))
+        .group_by(busca_termos.c.ref_id)
+        .having(db.func.count() == len(exigidos))
+    )
+
+    # normalizar() só deixa [0-9a-z ]: nada a escapar no LIKE
+    condicoes = [modelo.id.in_(candidatos)]
+    for tipo, palavra in conferir:
+        if tipo == "meio":
+            condicoes.append(modelo.nome_busca.like(f"%{palavra}%"))
+        else:
+            condicoes.append(
+                db.or_(
+                    modelo.nome_busca.like(f"{palavra}%"),
+                    modelo.nome_busca.like(f"% {palavra}%"),
+                )
+            )
+    return db.and_(*condicoes)
+
+
+def _proximo_prefixo(prefixo: str):
+    """
+    Menor texto maior que todos os que começam com `prefixo`, trocando só
+    letras e dígitos ("guimar" -> "guimas", "maz" -> "mb", "123.9" ->
+    "124"), para o intervalo usar o índice em qualquer banco/collation.
+    None se não houver ("zz").
+    """
+    p = prefixo.rstrip("z9")
+    if not p:
+        return None
+    ultimo = p[-1]
+    if not ultimo.isalnum():
+        return _proximo_prefixo(p[:-1])
+    return p[:-1] + chr(ord(ultimo) + 1)
+
+
+def intervalo_prefixo(coluna, prefixo: str):
+    """`coluna LIKE 'prefixo%'` como intervalo (o SQLite não usa índice no LIKE)."""
+    condicao = coluna >= prefixo
+    proximo = _proximo_prefixo(prefixo)
+    if proximo is not None:
+        condicao = db.and_(condicao, coluna < proximo)
+    return condicao
+
+
+def digitos_cpf(texto) -> str:
+    """CPF como é gravado em atletas.cpf: só os dígitos ("123.456.789-00" -> "12345678900")."""
+    return re.sub(r"\D", "", texto or "")
+
+
+def prefixo_cpf(texto):
+    """
+    "123456" / "123.456" -> "123456", no formato do CPF cadastrado (só
+    dígitos, ver digitos_cpf). None se o texto não for o começo de um CPF.
+    """
+    if not re.fullmatch(r"[\d.\-\s]+", texto or ""):
+        return None
+    digitos = digitos_cpf(texto)[:11]
+    return digitos if len(digitos) >= 3 else None
+
+
+def buscar_pagina(modelo, texto, cursor=None, limite=10, query=None):
+    """
+    Página de registros cujo nome contém o texto, quem começa com o texto
+    primeiro (Pagina de services/paginacao.py; `proximo` continua a busca).
+    `query` permite restringir (ex.: só ativos, filhos do PARENT).
+
+    Duas fases, cada uma paginada por (nome_busca, id):
+    0. os que começam com o texto, direto do índice de nome_busca;
+    1. os demais que contêm o texto, pelos trigramas.
+    A fase 1 só roda quando a 0 acaba, então o autocomplete comum (o que
+    a pessoa digita é o começo do nome) nem consulta os trigramas.
+    """
+    query = query if query is not None else modelo.query
+    inicio = normalizar(texto)
+    if not inicio:
+        return Pagina(itens=[])
+
+    chave = [db.literal(0), modelo.nome_busca, modelo.id]
+    fase, depois = 0, None
+    if cursor:
+        try:
+            fase, *depois = decodificar_cursor(cursor, chave)
+        except CursorInvalido:
+            fase, depois = 0, None
+
+    prefixo = intervalo_prefixo(modelo.nome_busca, inicio)
+    fases = [
+        query.filter(prefixo),
+        query.filter(filtro_busca(modelo, texto), db.not_(prefixo)),
+    ]
+    ordem = chave[1:]
+
+    itens = []
+    for numero in range(fase, len(fases)):
+        consulta = fases[numero]
+        if numero == fase and depois and depois[-1] is not None:
+            consulta = consulta.filter(depois_de(ordem, depois))
+        falta = limite - len(itens)
+        encontrados = consulta.order_by(*ordem).limit(falta + 1).all()
+        if len(encontrados) > falta:
+            itens += encontrados[:falta]
+            if falta:
+                ultimo = itens[-1]
+                proximo = [numero, ultimo.nome_busca, ultimo.id]
+            else:
+                proximo = [numero, None, None]  # a próxima página começa esta fase
+            return Pagina(itens=itens, proximo=codificar_cursor(proximo), primeira=not cursor)
+        itens += encontrados
+    return Pagina(itens=itens, primeira=not cursor)
+
+
+def buscar(modelo, texto, limite=10, query=None):
+    """Os `limite` primeiros de buscar_pagina()."""
+    return buscar_pagina(modelo, texto, limite=limite, query=query).itens
+
+
+# =========================
+# Manutenção do índice
+# =========================
+
+def _gravar_termos(conn, entidade, registros):
+    """Reescreve os trigramas de [(id, nome_busca), ...]."""
+    if not registros:
+        return
+    ids = [i for i, _ in registros]
+    conn.execute(
+        busca_termos.delete().where(
+            busca_termos.c.entidade == entidade, busca_termos.c.ref_id.in_(ids)
+        )
+    )
+    linhas = [
+        {"entidade": entidade, "termo": t, "ref_id": i}
+        for i, nome_busca in registros
+        for t in trigramas(nome_busca or "")
+    ]
+    if linhas:
+        conn.execute(busca_termos.insert(), linhas)
+
+
+def _apagar_termos(conn, entidade, ids):
+    if ids:
+        conn.execute(
+            busca_termos.delete().where(
+                busca_termos.c.entidade == entidade, busca_termos.c.ref_id.in_(ids)
+            )
+        )
+
+
+def reindexar(conn=None, somente_faltando=False, lote=LOTE_REINDEXAR) -> int:
+    """
+    Recalcula nome_busca e os trigramas (todos, ou só os registros com
+    nome_busca vazio). Usado pela migração e depois de inserções em lote.
+    Retorna quantos registros foram indexados.
+    """
+    if conn is None:
+        total = reindexar(db.session.connection(), somente_faltando, lote)
+        db.session.commit()
+        return total
+
+    total = 0
+    for entidade, modelo in ENTIDADES.items():
+        tabela = modelo.__table__
+        atualizar = (
+            tabela.update()
+            .where(tabela.c.id == bindparam("b_id"))
+            .values(nome_busca=bindparam("b_nome_busca"))
+        )
+        ultimo = 0
+        while True:
+            consulta = (
+                db.select(tabela.c.id, tabela.c.nome)
+                .where(tabela.c.id > ultimo)
+                .order_by(tabela.c.id)
+                .limit(lote)
+            )
+            if somente_faltando:
+                consulta = consulta.where(tabela.c.nome_busca.is_(None))
+            linhas = conn.execute(consulta).all()
+            if not linhas:
+                break
+            registros = [(i, normalizar(nome)) for i, nome in linhas]
+            conn.execute(atualizar, [{"b_id": i, "b_nome_busca": n} for i, n in registros])
+            _gravar_termos(conn, entidade, registros)
+            total += len(registros)
+            ultimo = linhas[-1].id
+    return total
+
+
+def _antes_do_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, tuple(ENTIDADES.values())):
+            nome_busca = normalizar(obj.nome)
+            if obj.nome_busca != nome_busca:
+                obj.nome_busca = nome_busca
+
+
+def _apos_flush(session, flush_context):
+    gravar = {}
+    apagar = {}
+    for obj in session.new | session.dirty:
+        if isinstance(obj, tuple(ENTIDADES.values())):
+            if obj in session.new or inspect(obj).attrs.nome_busca.history.has_changes():
+                entidade = _entidade_do_modelo(type(obj))
+                gravar.setdefault(entidade, []).append((obj.id, obj.nome_busca))
+    for obj in session.deleted:
+        if isinstance(obj, tuple(ENTIDADES.values())):
+            apagar.setdefault(_entidade_do_modelo(type(obj)), []).append(obj.id)
+
+    if not gravar and not apagar:
+        return
+    conn = session.connection()
+    for entidade, registros in gravar.items():
+        _gravar_termos(conn, entidade, registros)
+    for entidade, ids in apagar.items():
+        _apagar_termos(conn, entidade, ids)
+
+
+def init_busca():
+    """Liga os eventos da sessão (uma vez por processo)."""
+    if not event.contains(Session, "before_flush", _antes_do_flush):
+        event.listen(Session, "before_flush", _antes_do_flush)
+        event.listen(Session, "after_flush", _apos_flush)
+
+
+def registrar_cli(app):
+    import click
+
+    @app.cli.group("busca")
+    def busca_cli():
+        """Índice de busca por nome."""
+
+    @busca_cli.command("reindexar")
+    @click.option("--faltando", is_flag=True, help="Só registros ainda sem índice.")
+    def reindexar_cmd(faltando):
+        total = reindexar(somente_faltando=faltando)
+        click.echo(f"{total} registro(s) indexado(s).")
@@ -0,0 +1,57 @@
+"""
+Cache curto de valores calculados do banco (indicadores das telas).
+
+`em_cache(nome, tabelas, calcular)` devolve o último valor de `calcular()`
+enquanto:
+- as versões das tabelas em `versoes_dados` não mudarem (qualquer escrita
+  pela sessão nessas tabelas invalida logo após o commit, em todos os
+  workers, ver services/versoes.py); e
+- não passar o TTL (Config.CACHE_DADOS_TTL_SEGUNDOS), que cobre escritas
+  fora da sessão (SQL manual, outro sistema no mesmo banco).
+
+O cache fica na memória de cada worker; conferir a versão custa um SELECT
+por chave primária, bem mais barato que os agregados que ele evita.
+"""
+import threading
+import time
+
+from flask import current_app
+
+from services.versoes import versoes
+
+_valores = {}  # nome -> (assinatura, expira_em, valor)
+_lock = threading.Lock()
+
+
+def _assinatura(tabelas):
+    # versão e horário: um banco recriado pode repetir só os números
+    por_tabela = versoes(tabelas)
+    return tuple((t, por_tabela.get(t)) for t in sorted(tabelas))
+
+
+def em_cache(nome: str, tabelas, calcular, ttl=None):
+    if ttl is None:
+        ttl = current_app.config.get("CACHE_DADOS_TTL_SEGUNDOS", 60)
+    if ttl <= 0:
+        return calcular()
+
+    assinatura = _assinatura(tabelas)
+    agora = time.monotonic()
+    with _lock:
+        guardado = _valores.get(nome)
+    if guardado and guardado[0] == assinatura and guardado[1] > agora:
+        return guardado[2]
+
+    valor = calcular()
+    with _lock:
+        _valores[nome] = (assinatura, agora + ttl, valor)
+    return valor
+
+
+def invalidar(nome=None):
+    """Descarta uma chave (ou todas)."""
+    with _lock:
+        if nome is None:
+            _valores.clear()
+        else:
+            _valores.pop(nome, None)
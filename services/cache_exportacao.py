@@ -0,0 +1,155 @@
+"""
+Cache em disco das exportações diretas (rotas /exportar).
+
+O mesmo relatório costuma ser baixado várias vezes seguidas (a secretaria
+exporta, o coordenador exporta de novo...) sem que os dados tenham mudado.
+Aqui o arquivo gerado fica no disco, com a chave
+
+    sha256(relatório, formato, parâmetros, impressão digital dos dados)
+
+A impressão digital junta, para cada tabela lida pelo relatório
+(`fontes` em services/relatorios.py), a versão em `versoes_dados`
+(services/versoes.py), o count(*) e o max(id). Qualquer escrita nessas
+tabelas muda a chave; o arquivo antigo deixa de ser usado e sai pela poda.
+
+- A chave também é o ETag: o navegador que já tem o arquivo manda
+  If-None-Match e recebe 304, sem nem abrir o arquivo.
+- Last-Modified é a última escrita nas tabelas de origem.
+- A pasta tem limite de tamanho (EXPORTACAO_CACHE_MAX_MB): ao gravar um
+  arquivo novo, os menos usados recentemente (mtime mais antigo; cada
+  acerto renova o mtime) são apagados até caber.
+"""
+import hashlib
+import json
+import os
+
+from flask import current_app, request, send_file
+
+from extensions import db
+from services.exportacao import (
+    EXTENSOES,
+    MIMETYPES,
+    _normalizar_formato,
+    exportar_consulta,
+    iterar_consulta,
+    salvar_arquivo,
+)
+from services.relatorios import fontes_relatorio, montar_relatorio
+from services.versoes import versoes
+
+
+def impressao_digital(modelos):
+    """
+    ([(tabela, versao, count, max_id), ...], última escrita) dos modelos.
+    Duas consultas, independente da quantidade de tabelas.
+    """
+    tabelas = [m.__table__ for m in modelos]
+    if not tabelas:
+        return [], None
+
+    colunas = []
+    for t in tabelas:
+        colunas.append(db.select(db.func.count()).select_from(t).scalar_subquery())
+        colunas.append(db.select(db.func.max(t.c.id)).scalar_subquery())
+    valores = db.session.execute(db.select(*colunas)).one()
+
+    por_tabela = versoes(t.name for t in tabelas)
+    digital = []
+    for i, t in enumerate(tabelas):
+        versao, _ = por_tabela.get(t.name, (None, None))
+        digital.append((t.name, versao, valores[2 * i], valores[2 * i + 1]))
+
+    datas = [em for _, em in por_tabela.values() if em is not None]
+    return digital, max(datas) if datas else None
+
+
+def _chave(relatorio, formato, parametros, nome_base, digital) -> str:
+    texto = json.dumps(
+        [relatorio, formato, sorted((parametros or {}).items()), nome_base, digital],
+        default=str,
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _podar(pasta, limite_bytes, manter):
+    """Apaga os arquivos menos usados até a pasta caber no limite."""
+    arquivos = []
+    total = 0
+    with os.scandir(pasta) as entradas:
+        for e in entradas:
+            if not e.is_file() or e.name.endswith(".parcial"):
+                continue
+            st = e.stat()
+            total += st.st_size
+            arquivos.append((st.st_mtime, st.st_size, e.path))
+
+    if total <= limite_bytes:
+        return 0
+
+    removidos = 0
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite_bytes:
+            break
+        if caminho == manter:
+            continue
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+
+def _nao_modificado(chave, ultima_escrita):
+    resp = current_app.response_class(status=304)
+    resp.set_etag(chave)
+    if ultima_escrita is not None:
+        resp.last_modified = ultima_escrita
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def exportar_relatorio(relatorio, formato, parametros=None):
+    """
+    Resposta de download do relatório (services/relatorios.py), servida do
+    cache quando os dados não mudaram. Com o cache desligado
+    (EXPORTACAO_CACHE_ATIVO=0) cai no motor de exportação normal.
+    """
+    formato = _normalizar_formato(formato)
+    nome_base, headers, consulta, linha = montar_relatorio(relatorio, parametros)
+
+    if not current_app.config.get("EXPORTACAO_CACHE_ATIVO"):
+        return exportar_consulta(nome_base, formato, headers, consulta, linha)
+
+    digital, ultima_escrita = impressao_digital(fontes_relatorio(relatorio))
+    chave = _chave(relatorio, formato, parametros, nome_base, digital)
+
+    # o navegador já tem esta versão: nem olha o disco
+    if chave in request.if_none_match:
+        return _nao_modificado(chave, ultima_escrita)
+
+    pasta = current_app.config["EXPORTACAO_CACHE_PASTA"]
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = os.path.join(pasta, f"{chave}.{EXTENSOES[formato]}")
+
+    if os.path.exists(arquivo):
+        os.utime(arquivo)  # renova a posição na fila de poda (LRU)
+    else:
+        salvar_arquivo(arquivo, formato, nome_base, headers, iterar_consulta(consulta, linha))
+        limite = current_app.config.get("EXPORTACAO_CACHE_MAX_MB", 500) * 1024 * 1024
+        _podar(pasta, limite, manter=arquivo)
+
+    resp = send_file(
+        arquivo,
+        as_attachment=True,
+        download_name=f"{nome_base}.{EXTENSOES[formato]}",
+        etag=chave,
+        last_modified=ultima_escrita,
+        conditional=True,
+        max_age=0,
+    )
+    # depois do send_file: com mimetype= o Werkzeug repete o charset do CSV
+    resp.headers["Content-Type"] = MIMETYPES[formato]
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
@@ -0,0 +1,180 @@
+"""
+Motor de cobrança mensal (ContaReceber) baseado em conjuntos.
+
+Em vez de percorrer cada AtletaPlano e consultar o banco atleta a atleta,
+a competência inteira é resolvida em poucos comandos:
+
+1. um SELECT com anti-join (NOT EXISTS) que traz só quem ainda não tem
+   cobrança do plano na competência (cobranças avulsas não contam);
+2. um INSERT em lote (executemany) com todas as cobranças novas.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Atleta, AtletaPlano, ContaReceber, Plano
+from services.inadimplencia import status_por_vencimento
+
+
+# quantos meses cada periodicidade cobre
+MESES_POR_PERIODICIDADE = {
+    "MENSAL": 1,
+    "TRIMESTRAL": 3,
+    "SEMESTRAL": 6,
+    "ANUAL": 12,
+}
+
+ROTULO_POR_PERIODICIDADE = {
+    "MENSAL": "Mensalidade",
+    "TRIMESTRAL": "Trimestralidade",
+    "SEMESTRAL": "Semestralidade",
+    "ANUAL": "Anuidade",
+}
+
+DIA_VENCIMENTO_PADRAO = 10
+
+# ContaReceber.origem das cobranças geradas aqui (chave única com atleta e
+# competência); as avulsas ficam com origem NULL
+ORIGEM_PLANO = "PLANO"
+
+
+def primeiro_dia_util(ano: int, mes: int) -> date:
+    """
+    Retorna o primeiro dia útil (segunda a sexta) do mês/ano informado.
+    """
+    d = date(ano, mes, 1)
+    # weekday(): 0=segunda ... 6=domingo
+    while d.weekday() >= 5:  # 5=sábado, 6=domingo
+        d += timedelta(days=1)
+    return d
+
+
+def vencimento_na_competencia(ano: int, mes: int, dia_vencimento) -> date:
+    """
+    Monta a data de vencimento, ajustando o dia para meses curtos
+    (ex.: dia 31 em fevereiro vira 28/29).
+    """
+    dia = dia_vencimento or DIA_VENCIMENTO_PADRAO
+    ultimo_dia = monthrange(ano, mes)[1]
+    dia = max(1, min(int(dia), ultimo_dia))
+    return date(ano, mes, dia)
+
+
+def cobra_na_competencia(periodicidade, data_inicio, competencia: date) -> bool:
+    """
+    True se o plano deve gerar cobrança nesta competência.
+    A contagem dos ciclos começa no mês de início do vínculo (data_inicio).
+    """
+    meses = MESES_POR_PERIODICIDADE.get(periodicidade or "MENSAL", 1)
+    if meses == 1 or not data_inicio:
+        return True
+    decorridos = (competencia.year - data_inicio.year) * 12 + (
+        competencia.month - data_inicio.month
+    )
+    return decorridos >= 0 and decorridos % meses == 0
+
+
+def _candidatos(competencia: date, fim_competencia: date):
+    """
+    Um único SELECT: planos ativos, vigentes na competência, de atletas
+    que ainda NÃO têm cobrança do plano nessa competência (anti-join).
+    """
+    ja_cobrado = (
+        db.session.query(ContaReceber.id)
+        .filter(
+            ContaReceber.atleta_id == AtletaPlano.atleta_id,
+            ContaReceber.competencia == competencia,
+            ContaReceber.origem == ORIGEM_PLANO,
+        )
+        .exists()
+    )
+
+    return (
+        db.session.query(
+            AtletaPlano.atleta_id,
+            AtletaPlano.data_inicio,
+            Plano.nome,
+            Plano.valor_mensal,
+            Plano.dia_vencimento,
+            Plano.forma_pagamento_padrao,
+            Plano.periodicidade_cobranca,
+        )
+        .join(Plano, Plano.id == AtletaPlano.plano_id)
+        .join(Atleta, Atleta.id == AtletaPlano.atleta_id)
+        .filter(
+            AtletaPlano.ativo.is_(True),
+            (AtletaPlano.data_inicio.is_(None)) | (AtletaPlano.data_inicio <= fim_competencia),
+            (AtletaPlano.data_fim.is_(None)) | (AtletaPlano.data_fim >= competencia),
+            ~ja_cobrado,
+        )
+        .order_by(AtletaPlano.id)
+        .all()
+    )
+
+
+def montar_cobrancas(ano: int, mes: int) -> list:
+    """
+    Retorna a lista de dicionários (prontos para o INSERT em lote) com as
+    cobranças que faltam na competência ano/mes. Não grava nada.
+    """
+    competencia = date(ano, mes, 1)
+    fim_competencia = date(ano, mes, monthrange(ano, mes)[1])
+
+    linhas = []
+    atletas_vistos = set()
+
+    for c in _candidatos(competencia, fim_competencia):
+        # um atleta com dois planos ativos recebe só uma cobrança por mês
+        if c.atleta_id in atletas_vistos:
+            continue
+        if not cobra_na_competencia(c.periodicidade_cobranca, c.data_inicio, competencia):
+            continue
+        atletas_vistos.add(c.atleta_id)
+
+        periodicidade = c.periodicidade_cobranca or "MENSAL"
+        meses = MESES_POR_PERIODICIDADE.get(periodicidade, 1)
+        rotulo = ROTULO_POR_PERIODICIDADE.get(periodicidade, "Mensalidade")
+
+        vencimento = vencimento_na_competencia(ano, mes, c.dia_vencimento)
+
+        linhas.append(
+            {
+                "atleta_id": c.atleta_id,
+                "descricao": f"{rotulo} {c.nome} {competencia.strftime('%m/%Y')}",
+                "competencia": competencia,
+                "vencimento": vencimento,
+                "valor": (c.valor_mensal or 0) * meses,
+                "status": status_por_vencimento(vencimento),
+                "metodo_pagamento": c.forma_pagamento_padrao or "PIX",
+                "origem": ORIGEM_PLANO,
+            }
+        )
+
+    return linhas
+
+
+def gerar_cobrancas_competencia(ano: int, mes: int, commit: bool = True) -> int:
+    """
+    Gera as cobranças da competência ano/mes em um INSERT em lote.
+    Não duplica cobranças já existentes. Retorna a quantidade criada.
+
+    Se outro processo gravar a mesma competência ao mesmo tempo, a
+    constraint uk_conta_receber_plano_competencia barra o lote; nesse caso
+    refaz o anti-join uma vez e grava só o que ainda faltar.
+    """
+    for tentativa in range(2):
+        linhas = montar_cobrancas(ano, mes)
+        if not linhas:
+            return 0
+        try:
+            db.session.execute(db.insert(ContaReceber), linhas)
+            if commit:
+                db.session.commit()
+            return len(linhas)
+        except IntegrityError:
+            db.session.rollback()
+            if tentativa:
+                raise
+    return 0
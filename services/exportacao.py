@@ -0,0 +1,360 @@
+"""
+Motor de exportação de tabelas (CSV, Excel, Word e PDF) para as telas de
+atletas, grupos e financeiro.
+
+- As linhas vêm de uma consulta lida em lotes (`yield_per`), sem carregar
+  a tabela inteira na memória.
+- O CSV é enviado em streaming (UTF-8 com BOM e ponto e vírgula, que o Excel
+  brasileiro abre direto): a memória fica estável com qualquer quantidade
+  de linhas.
+- As bibliotecas de cada formato (openpyxl, python-docx, reportlab)
+  são pesadas e só são importadas na primeira exportação daquele formato,
+  nunca no boot do worker.
+"""
+import csv
+import io
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, make_response, stream_with_context
+
+MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "word": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+EXTENSOES = {"csv": "csv", "excel": "xlsx", "word": "docx", "pdf": "pdf"}
+
+BOM_UTF8 = "\ufeff"
+
+# formatos das células tipadas do XLSX
+FORMATO_XLSX_DATA = "DD/MM/YYYY"
+FORMATO_XLSX_DATA_HORA = "DD/MM/YYYY HH:MM"
+FORMATO_XLSX_MOEDA = '"R$" #,##0.00'
+
+# PDF: fonte da tabela, linhas usadas para medir as colunas e largura máxima
+PDF_TAMANHO_FONTE = 8
+PDF_LINHAS_AMOSTRA = 200
+PDF_LARGURA_MAX_COLUNA = 220  # pt
+
+# linhas lidas do banco por lote / linhas do CSV por bloco enviado
+LOTE_CURSOR = 1000
+LINHAS_POR_BLOCO = 500
+
+
+def formatar_valor(v) -> str:
+    """Texto de uma célula: datas em dd/mm/aaaa e números com vírgula decimal."""
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.strftime("%d/%m/%Y %H:%M")
+    if isinstance(v, date):
+        return v.strftime("%d/%m/%Y")
+    if isinstance(v, (Decimal, float)):
+        return f"{v:.2f}".replace(".", ",")
+    return str(v)
+
+
+def iterar_consulta(consulta, linha=None, lote: int = LOTE_CURSOR):
+    """
+    Percorre a consulta (db.session.query(colunas...)) em lotes de `lote`
+    linhas e devolve cada uma já convertida por `linha(row)` (padrão: tupla).
+    """
+    for row in consulta.yield_per(lote):
+        yield linha(row) if linha else tuple(row)
+
+
+# =========================
+# Formatos
+# =========================
+
+def _blocos_csv(headers, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";", lineterminator="\r\n")
+    buf.write(BOM_UTF8)
+    writer.writerow(headers)
+    for i, r in enumerate(rows, 1):
+        writer.writerow([formatar_valor(v) for v in r])
+        if i % LINHAS_POR_BLOCO == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def _csv(nome_base, headers, rows) -> bytes:
+    return b"".join(_blocos_csv(headers, rows))
+
+
+def _excel(nome_base, headers, rows) -> bytes:
+    """
+    XLSX em modo write-only do openpyxl (linhas vão direto para o arquivo,
+    sem montar a planilha na memória). Datas e valores saem como células
+    tipadas: data com formato dd/mm/aaaa e Decimal (dinheiro) como moeda,
+    então o Excel consegue ordenar e somar.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Dados")
+    ws.freeze_panes = "A2"
+    for i, h in enumerate(headers, 1):
+        ws.column_dimensions[get_column_letter(i)].width = max(14, len(h) + 4)
+
+    fonte = Font(bold=True, color="FFFFFF")
+    fundo = PatternFill("solid", fgColor="1E293B")
+    cabecalho = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = fonte
+        cell.fill = fundo
+        cabecalho.append(cell)
+    ws.append(cabecalho)
+
+    def celula(v):
+        if isinstance(v, datetime):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.number_format = FORMATO_XLSX_DATA_HORA
+            return cell
+        if isinstance(v, date):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.number_format = FORMATO_XLSX_DATA
+            return cell
+        if isinstance(v, Decimal):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.number_format = FORMATO_XLSX_MOEDA
+            return cell
+        return v
+
+    for r in rows:
+        ws.append([celula(v) for v in r])
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _word(nome_base, headers, rows) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(nome_base, level=1)
+
+    table = doc.add_table(rows=1, cols=len(headers))
+    hdr_cells = table.rows[0].cells
+    for i, h in enumerate(headers):
+        hdr_cells[i].text = h
+
+    for r in rows:
+        row_cells = table.add_row().cells
+        for i, v in enumerate(r):
+            row_cells[i].text = formatar_valor(v)
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def _numero(v) -> bool:
+    return isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+
+
+def _larguras_pdf(headers, amostra, fonte, tamanho, largura_max_coluna):
+    """Largura de cada coluna (pt) pelo maior texto do cabeçalho e da amostra."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    folga = 8  # padding esquerdo + direito da célula
+    larguras = [stringWidth(h, fonte + "-Bold", tamanho) + folga for h in headers]
+    for r in amostra:
+        for i, v in enumerate(r[: len(headers)]):
+            larguras[i] = max(larguras[i], stringWidth(v, fonte, tamanho) + folga)
+    return [min(w, largura_max_coluna) for w in larguras]
+
+
+def _pdf(nome_base, headers, rows) -> bytes:
+    """
+    PDF em blocos: a tabela é montada em pedaços de uma página cada (com o
+    cabeçalho repetido), em vez de uma Table única com todas as linhas, que
+    o reportlab leva tempo quadrático para quebrar em páginas. O tempo
+    cresce linear com o número de linhas.
+
+    As larguras das colunas vêm de uma amostra das primeiras linhas; se não
+    couberem em A4 retrato, a página vira paisagem e, se ainda assim não
+    couberem, as colunas são reduzidas proporcionalmente (textos longos são
+    cortados com "…"). Rodapé com o número da página.
+    """
+    from itertools import chain, islice
+
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+    fonte, tamanho = "Helvetica", PDF_TAMANHO_FONTE
+    altura_linha = tamanho + 6
+    margem = 12 * mm
+
+    rows = iter(rows)
+    brutas = list(islice(rows, PDF_LINHAS_AMOSTRA))
+    # alinha à direita pelo tipo do valor: datas e CPFs também começam com dígito
+    numericas = {
+        i
+        for i in range(len(headers))
+        if any(r[i] is not None for r in brutas)
+        and all(r[i] is None or _numero(r[i]) for r in brutas)
+    }
+    amostra = [[formatar_valor(v) for v in r] for r in brutas]
+
+    pagina = A4
+    larguras = _larguras_pdf(headers, amostra, fonte, tamanho, PDF_LARGURA_MAX_COLUNA)
+    if sum(larguras) > pagina[0] - 2 * margem:
+        pagina = landscape(A4)
+    disponivel = pagina[0] - 2 * margem
+    if sum(larguras) > disponivel:
+        fator = disponivel / sum(larguras)
+        larguras = [w * fator for w in larguras]
+    # caracteres que cabem em cada coluna (Helvetica ~0,5 em por caractere)
+    max_caracteres = [max(3, int((w - 8) / (tamanho * 0.5))) for w in larguras]
+
+    def cortar(textos):
+        return [
+            t if len(t) <= n else t[: n - 1] + "…" for t, n in zip(textos, max_caracteres)
+        ]
+
+    estilo = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e293b")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTNAME", (0, 0), (-1, 0), fonte + "-Bold"),
+            ("FONTNAME", (0, 1), (-1, -1), fonte),
+            ("FONTSIZE", (0, 0), (-1, -1), tamanho),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("TOPPADDING", (0, 0), (-1, -1), 1),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f1f5f9")]),
+        ]
+        + [("ALIGN", (i, 1), (i, -1), "RIGHT") for i in sorted(numericas)]
+    )
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=pagina,
+        leftMargin=margem,
+        rightMargin=margem,
+        topMargin=margem + 6 * mm,
+        bottomMargin=margem,
+        title=nome_base,
+    )
+    # linhas por página (uma a menos de folga para o cabeçalho repetido)
+    linhas_por_bloco = max(1, int(doc.height // altura_linha) - 2)
+    cabecalho = cortar(list(headers))
+
+    def blocos():
+        linhas = chain(amostra, ([formatar_valor(v) for v in r] for r in rows))
+        while True:
+            bloco = [cortar(r) for r in islice(linhas, linhas_por_bloco)]
+            if not bloco:
+                return
+            tabela = Table(
+                [cabecalho] + bloco,
+                colWidths=larguras,
+                rowHeights=altura_linha,
+                repeatRows=1,
+            )
+            tabela.setStyle(estilo)
+            yield tabela
+
+    def decorar_pagina(canvas, documento):
+        canvas.saveState()
+        canvas.setFont(fonte + "-Bold", 10)
+        canvas.drawString(margem, pagina[1] - margem, nome_base)
+        canvas.setFont(fonte, 8)
+        canvas.drawRightString(
+            pagina[0] - margem, margem / 2, f"Página {documento.page}"
+        )
+        canvas.restoreState()
+
+    story = list(blocos())
+    if not story:
+        story = [Table([cabecalho], colWidths=larguras, rowHeights=altura_linha, style=estilo)]
+    doc.build(story, onFirstPage=decorar_pagina, onLaterPages=decorar_pagina)
+    return buf.getvalue()
+
+
+GERADORES = {"csv": _csv, "excel": _excel, "word": _word, "pdf": _pdf}
+
+
+def _normalizar_formato(formato) -> str:
+    formato = (formato or "csv").lower()
+    return formato if formato in GERADORES else "csv"
+
+
+def _cabecalhos(resp, nome_base, formato):
+    resp.headers["Content-Type"] = MIMETYPES[formato]
+    resp.headers["Content-Disposition"] = (
+        f'attachment; filename="{nome_base}.{EXTENSOES[formato]}"'
+    )
+    return resp
+
+
+def gerar_arquivo_tabular(nome_base, formato, headers, rows):
+    """
+    Gera arquivo em CSV, Excel (xlsx), Word (docx) ou PDF a partir
+    de headers (lista de strings) e rows (qualquer iterável de listas).
+    Formato desconhecido cai no CSV.
+    """
+    formato = _normalizar_formato(formato)
+    resp = make_response(GERADORES[formato](nome_base, headers, rows))
+    return _cabecalhos(resp, nome_base, formato)
+
+
+def salvar_arquivo(caminho, formato, nome_base, headers, rows) -> int:
+    """
+    Grava o arquivo no disco e retorna o tamanho em bytes. CSV é gravado
+    em blocos; os outros formatos são montados antes. A gravação é num
+    arquivo temporário renomeado no fim, para quem lê em paralelo (outro
+    worker) nunca ver o arquivo pela metade.
+    """
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.parcial"
+    try:
+        with open(temporario, "wb") as f:
+            if formato == "csv":
+                for bloco in _blocos_csv(headers, rows):
+                    f.write(bloco)
+            else:
+                f.write(GERADORES[formato](nome_base, headers, rows))
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return os.path.getsize(caminho)
+
+
+def exportar_consulta(nome_base, formato, headers, consulta, linha=None):
+    """
+    Exporta o resultado de `consulta` (db.session.query(colunas...)).
+    `linha(row)` monta a lista de valores de cada linha (datas e números
+    podem ir no tipo original; cada formato cuida da apresentação).
+
+    CSV sai em streaming, lido do banco em lotes; os outros formatos
+    também leem em lotes, mas montam o arquivo antes de responder.
+    """
+    formato = _normalizar_formato(formato)
+    rows = iterar_consulta(consulta, linha)
+
+    if formato != "csv":
+        return gerar_arquivo_tabular(nome_base, formato, headers, rows)
+
+    resp = Response(stream_with_context(_blocos_csv(headers, rows)))
+    return _cabecalhos(resp, nome_base, formato)
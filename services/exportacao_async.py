@@ -0,0 +1,255 @@
+"""
+Exportações em segundo plano ("preparar e depois baixar").
+
+Relatórios grandes em PDF/Word/Excel demoram mais que o timeout do proxy
+se forem gerados dentro da requisição. Aqui:
+
+1. `enfileirar()` grava uma ExportacaoTarefa (PENDENTE) e manda o id para
+   um pool de processos (um pool por worker web, criado sob demanda);
+2. o processo filho monta o relatório (services/relatorios.py), grava o
+   progresso (linhas processadas) e salva o arquivo no diretório de
+   resultados (Config.EXPORTACAO_PASTA);
+3. o navegador consulta o status e baixa o arquivo quando fica pronto.
+
+Os arquivos expiram depois de EXPORTACAO_TTL_SEGUNDOS e são apagados pelo
+job `exportacoes_expiradas` (services/jobs.py).
+
+O status fica no banco, então qualquer worker responde; o arquivo fica no
+disco local, então todos os workers precisam estar na mesma máquina.
+"""
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import ExportacaoTarefa
+from services.exportacao import (
+    EXTENSOES,
+    GERADORES,
+    MIMETYPES,
+    iterar_consulta,
+    salvar_arquivo,
+)
+from services.relatorios import contar_linhas, montar_relatorio
+
+# a cada quantas linhas o filho grava o progresso
+PROGRESSO_A_CADA = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# =========================
+# Processo filho
+# =========================
+
+_app_filho = None
+
+
+def _iniciar_processo(database_url):
+    """Initializer do pool: sobe o app no filho, sem agendador e sem migração."""
+    global _app_filho
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["AGENDADOR_ATIVO"] = "0"
+    os.environ["MIGRAR_AO_INICIAR"] = "0"
+
+    # o import do módulo app já executa o create_app()
+    import app as modulo_app
+
+    _app_filho = modulo_app.app
+
+
+def _gravar(tarefa_id: str, **valores):
+    """UPDATE numa conexão própria (a sessão está lendo o relatório em lotes)."""
+    with db.engine.begin() as conn:
+        conn.execute(
+            db.update(ExportacaoTarefa)
+            .where(ExportacaoTarefa.id == tarefa_id)
+            .values(**valores)
+        )
+
+
+def _com_progresso(rows, tarefa_id: str):
+    n = 0
+    for n, r in enumerate(rows, 1):
+        if n % PROGRESSO_A_CADA == 0:
+            _gravar(tarefa_id, progresso=n)
+        yield r
+    _gravar(tarefa_id, progresso=n)
+
+
+def _finalizada_com_erro(app, exc) -> dict:
+    agora = datetime.utcnow()
+    return {
+        "status": "ERRO",
+        "erro": f"{type(exc).__name__}: {exc}",
+        "finalizado_em": agora,
+        "expira_em": agora + timedelta(seconds=app.config["EXPORTACAO_TTL_SEGUNDOS"]),
+    }
+
+
+def executar_tarefa(tarefa_id: str):
+    """Gera o arquivo da tarefa. Roda no processo filho (ou direto, em testes)."""
+    app = _app_filho
+    if app is None:
+        from flask import current_app
+
+        app = current_app._get_current_object()
+
+    with app.app_context():
+        try:
+            tarefa = db.session.get(ExportacaoTarefa, tarefa_id)
+            if tarefa is None or tarefa.status != "PENDENTE":
+                return
+            formato = tarefa.formato
+            parametros = json.loads(tarefa.parametros or "{}")
+            relatorio = tarefa.relatorio
+            db.session.rollback()
+
+            _gravar(tarefa_id, status="EXECUTANDO", iniciado_em=datetime.utcnow())
+            nome_base, headers, consulta, linha = montar_relatorio(relatorio, parametros)
+            _gravar(tarefa_id, total=contar_linhas(consulta))
+
+            rows = _com_progresso(iterar_consulta(consulta, linha), tarefa_id)
+
+            pasta = app.config["EXPORTACAO_PASTA"]
+            os.makedirs(pasta, exist_ok=True)
+            arquivo = os.path.join(pasta, f"{tarefa_id}.{EXTENSOES[formato]}")
+            tamanho = salvar_arquivo(arquivo, formato, nome_base, headers, rows)
+
+            agora = datetime.utcnow()
+            _gravar(
+                tarefa_id,
+                status="CONCLUIDA",
+                arquivo=arquivo,
+                nome_arquivo=f"{nome_base}.{EXTENSOES[formato]}",
+                tamanho_bytes=tamanho,
+                finalizado_em=agora,
+                expira_em=agora + timedelta(seconds=app.config["EXPORTACAO_TTL_SEGUNDOS"]),
+            )
+        except Exception as exc:  # noqa: BLE001 - a falha vai para a tarefa
+            db.session.rollback()
+            app.logger.exception("Exportação %s falhou", tarefa_id)
+            _gravar(tarefa_id, **_finalizada_com_erro(app, exc))
+        finally:
+            db.session.remove()
+
+
+# =========================
+# Processo web
+# =========================
+
+def _pool(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: o filho não herda conexões do banco nem threads do worker
+            _executor = ProcessPoolExecutor(
+                max_workers=app.config.get("EXPORTACAO_PROCESSOS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_processo,
+                initargs=(app.config["SQLALCHEMY_DATABASE_URI"],),
+            )
+        return _executor
+
+
+def enfileirar(app, relatorio: str, formato: str, parametros=None, usuario_id=None):
+    """
+    Cria a tarefa e manda para o pool. Retorna a ExportacaoTarefa.
+
+    `app` é o objeto Flask (current_app._get_current_object()), não o
+    proxy: o callback de término roda na thread do pool, sem contexto.
+    """
+    if formato not in GERADORES:
+        raise ValueError(f"formato desconhecido: {formato}")
+
+    limpar_expiradas()
+
+    agora = datetime.utcnow()
+    tarefa = ExportacaoTarefa(
+        id=uuid.uuid4().hex,
+        usuario_id=usuario_id,
+        relatorio=relatorio,
+        formato=formato,
+        parametros=json.dumps(parametros or {}),
+        status="PENDENTE",
+        progresso=0,
+        criado_em=agora,
+        # provisório (coluna NOT NULL): ao terminar vira finalizado_em + TTL
+        expira_em=agora + timedelta(seconds=app.config["EXPORTACAO_TTL_SEGUNDOS"]),
+    )
+    db.session.add(tarefa)
+    db.session.commit()
+
+    futuro = _pool(app).submit(executar_tarefa, tarefa.id)
+    futuro.add_done_callback(lambda f, tarefa_id=tarefa.id: _ao_terminar(app, tarefa_id, f))
+    return tarefa
+
+
+def _ao_terminar(app, tarefa_id, futuro):
+    """Se o processo filho morreu (pool quebrado), a tarefa vira ERRO em vez de ficar PENDENTE."""
+    global _executor
+
+    exc = futuro.exception()
+    if exc is None:
+        return
+    with _executor_lock:
+        if _executor is not None and getattr(_executor, "_broken", False):
+            _executor = None  # o próximo enfileirar cria um pool novo
+    # thread do pool: sem contexto de aplicação até aqui
+    with app.app_context():
+        app.logger.error("Exportação %s: processo falhou: %r", tarefa_id, exc)
+        _gravar(tarefa_id, **_finalizada_com_erro(app, exc))
+
+
+def status_tarefa(tarefa: ExportacaoTarefa) -> dict:
+    percentual = None
+    if tarefa.status == "CONCLUIDA":
+        percentual = 100
+    elif tarefa.total:
+        percentual = min(99, int(tarefa.progresso * 100 / tarefa.total))
+    return {
+        "id": tarefa.id,
+        "relatorio": tarefa.relatorio,
+        "formato": tarefa.formato,
+        "status": tarefa.status,
+        "progresso": tarefa.progresso,
+        "total": tarefa.total,
+        "percentual": percentual,
+        "erro": tarefa.erro,
+        "expira_em": tarefa.expira_em.isoformat() if tarefa.finalizado_em else None,
+    }
+
+
+def mimetype(tarefa: ExportacaoTarefa) -> str:
+    return MIMETYPES[tarefa.formato]
+
+
+def limpar_expiradas(agora=None) -> int:
+    """
+    Apaga os arquivos e as tarefas vencidas. Retorna quantas foram removidas.
+
+    Só tarefas terminadas (CONCLUIDA ou ERRO) expiram, com o TTL contado de
+    finalizado_em: uma exportação na fila ou demorada não perde a linha
+    (nem o arquivo) no meio do caminho.
+    """
+    agora = agora or datetime.utcnow()
+    expiradas = ExportacaoTarefa.query.filter(
+        ExportacaoTarefa.status.in_(("CONCLUIDA", "ERRO")),
+        ExportacaoTarefa.expira_em <= agora,
+    ).all()
+    for tarefa in expiradas:
+        if tarefa.arquivo:
+            try:
+                os.remove(tarefa.arquivo)
+            except FileNotFoundError:
+                pass
+        db.session.delete(tarefa)
+    if expiradas:
+        db.session.commit()
+    return len(expiradas)
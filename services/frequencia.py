@@ -0,0 +1,400 @@
+"""
+Frequência nos treinos: contadores por (atleta, grupo, mês) e sequências.
+
+- `frequencia_mensal`: chamadas registradas, presenças, faltas e faltas
+  justificadas de cada atleta em cada grupo, por mês (mês e grupo da
+  atividade). Taxa de presença = presentes / registradas.
+- `frequencia_sequencias`: por (atleta, grupo), faltas seguidas e
+  presenças seguidas até a última chamada. Falta justificada não soma
+  nem quebra a sequência.
+
+Os dois são mantidos na gravação da chamada (services/presencas.py chama
+atualizar_frequencia() na mesma transação): só as chaves afetadas são
+recontadas, a partir das presenças daquele atleta naquele grupo (índice
+ix_presencas_atleta). Perguntas como "quem tem 3 ou mais faltas seguidas"
+ou "frequência do grupo no mês" são respondidas só por essas tabelas, sem
+varrer `presencas`.
+
+Inserções em lote fora desse caminho (gerador de dados, SQL manual): rode
+`flask frequencia recalcular` (ou recalcular()).
+"""
+from datetime import datetime
+
+from extensions import db
+from models import Atividade, Atleta, AtletaGrupo, Grupo, Presenca
+from services.banco import upsert
+from services.metricas import inicio_mes, meses_ate
+
+LOTE_RECALCULAR = 2000
+
+# status da presença -> contador
+_CAMPO_STATUS = {"PRESENTE": "presentes", "AUSENTE": "ausentes", "JUSTIFICADO": "justificadas"}
+_CONTADORES = ("registradas", "presentes", "ausentes", "justificadas")
+
+frequencia_mensal = db.Table(
+    "frequencia_mensal",
+    db.Column("atleta_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("grupo_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("mes", db.Date, primary_key=True),  # primeiro dia do mês
+    db.Column("registradas", db.Integer, nullable=False, default=0),
+    db.Column("presentes", db.Integer, nullable=False, default=0),
+    db.Column("ausentes", db.Integer, nullable=False, default=0),
+    db.Column("justificadas", db.Integer, nullable=False, default=0),
+    db.Column("atualizado_em", db.DateTime),
+    # frequência do grupo no mês / ranking do grupo
+    db.Index("ix_frequencia_mensal_grupo_mes", "grupo_id", "mes"),
+)
+
+frequencia_sequencias = db.Table(
+    "frequencia_sequencias",
+    db.Column("atleta_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("grupo_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("faltas_seguidas", db.Integer, nullable=False, default=0),
+    db.Column("presencas_seguidas", db.Integer, nullable=False, default=0),
+    db.Column("ultima_data", db.Date),
+    db.Column("ultimo_status", db.String(20)),
+    db.Column("atualizado_em", db.DateTime),
+    # alertas: WHERE faltas_seguidas >= 3 (por grupo ou geral)
+    db.Index("ix_frequencia_sequencias_faltas", "faltas_seguidas"),
+    db.Index("ix_frequencia_sequencias_grupo_faltas", "grupo_id", "faltas_seguidas"),
+)
+
+
+def _consulta_presencas():
+    """(atleta_id, grupo_id, data, status) na ordem das chamadas."""
+    return (
+        db.select(Presenca.atleta_id, Atividade.grupo_id, Atividade.data, Presenca.status)
+        .join(Atividade, Atividade.id == Presenca.atividade_id)
+        .where(Atividade.grupo_id.is_not(None))
+        .order_by(
+            Presenca.atleta_id, Atividade.grupo_id, Atividade.data, Atividade.hora_inicio, Atividade.id
+        )
+    )
+
+
+def _agregar(linhas):
+    """Contadores mensais e sequências de linhas já ordenadas."""
+    mensal, sequencias = {}, {}
+    for atleta_id, grupo_id, data, status in linhas:
+        contadores = mensal.setdefault(
+            (atleta_id, grupo_id, inicio_mes(data)), dict.fromkeys(_CONTADORES, 0)
+        )
+        contadores["registradas"] += 1
+        contadores[_CAMPO_STATUS[status]] += 1
+
+        seq = sequencias.setdefault(
+            (atleta_id, grupo_id),
+            {"faltas_seguidas": 0, "presencas_seguidas": 0, "ultima_data": None, "ultimo_status": None},
+        )
+        if status == "AUSENTE":
+            seq["faltas_seguidas"] += 1
+            seq["presencas_seguidas"] = 0
+        elif status == "PRESENTE":
+            seq["presencas_seguidas"] += 1
+            seq["faltas_seguidas"] = 0
+        seq["ultima_data"] = data
+        seq["ultimo_status"] = status
+    return mensal, sequencias
+
+
+def _linhas_mensal(mensal, agora):
+    return [
+        {"atleta_id": a, "grupo_id": g, "mes": m, "atualizado_em": agora, **c}
+        for (a, g, m), c in sorted(mensal.items())
+    ]
+
+
+def _linhas_sequencias(sequencias, agora):
+    return [
+        {"atleta_id": a, "grupo_id": g, "atualizado_em": agora, **s}
+        for (a, g), s in sorted(sequencias.items())
+    ]
+
+
+# =========================
+# Atualização
+# =========================
+
+def chaves_das_atividades(atividade_ids) -> set:
+    """(atleta_id, grupo_id, mes) das chamadas já gravadas nas atividades."""
+    if not atividade_ids:
+        return set()
+    return {
+        (atleta_id, grupo_id, inicio_mes(data))
+        for atleta_id, grupo_id, data in db.session.execute(
+            db.select(Presenca.atleta_id, Atividade.grupo_id, Atividade.data)
+            .join(Atividade, Atividade.id == Presenca.atividade_id)
+            .where(Atividade.id.in_(list(atividade_ids)), Atividade.grupo_id.is_not(None))
+        )
+    }
+
+
+def chaves_das_presencas(pares) -> set:
+    """(atleta_id, grupo_id, mes) de pares (atividade_id, atleta_id)."""
+    pares = set(pares)
+    if not pares:
+        return set()
+    atividades = {
+        i: (grupo_id, data)
+        for i, grupo_id, data in db.session.execute(
+            db.select(Atividade.id, Atividade.grupo_id, Atividade.data)
+            .where(Atividade.id.in_({p[0] for p in pares}))
+        )
+    }
+    chaves = set()
+    for atividade_id, atleta_id in pares:
+        grupo_id, data = atividades.get(atividade_id, (None, None))
+        if grupo_id is not None:
+            chaves.add((atleta_id, grupo_id, inicio_mes(data)))
+    return chaves
+
+
+def atualizar_frequencia(chaves) -> int:
+    """
+    Reconta os contadores das chaves (atleta_id, grupo_id, mes) e as
+    sequências dos (atleta, grupo) delas. Sem commit. Retorna quantas
+    chaves mensais foram recontadas.
+    """
+    chaves = set(chaves)
+    if not chaves:
+        return 0
+    pares = {(a, g) for a, g, _ in chaves}
+
+    consulta = _consulta_presencas().where(
+        Presenca.atleta_id.in_({a for a, _ in pares}),
+        Atividade.grupo_id.in_({g for _, g in pares}),
+    )
+    mensal, sequencias = _agregar(
+        l for l in db.session.execute(consulta) if (l.atleta_id, l.grupo_id) in pares
+    )
+
+    agora = datetime.utcnow()
+    upsert(
+        frequencia_mensal,
+        _linhas_mensal({k: v for k, v in mensal.items() if k in chaves}, agora),
+        chaves=("atleta_id", "grupo_id", "mes"),
+        atualizar=(*_CONTADORES, "atualizado_em"),
+    )
+    upsert(
+        frequencia_sequencias,
+        _linhas_sequencias({k: v for k, v in sequencias.items() if k in pares}, agora),
+        chaves=("atleta_id", "grupo_id"),
+        atualizar=("faltas_seguidas", "presencas_seguidas", "ultima_data", "ultimo_status", "atualizado_em"),
+    )
+
+    # chaves que ficaram sem nenhuma chamada
+    for a, g, m in chaves - set(mensal):
+        db.session.execute(frequencia_mensal.delete().where(
+            frequencia_mensal.c.atleta_id == a,
+            frequencia_mensal.c.grupo_id == g,
+            frequencia_mensal.c.mes == m,
+        ))
+    for a, g in pares - set(sequencias):
+        db.session.execute(frequencia_sequencias.delete().where(
+            frequencia_sequencias.c.atleta_id == a, frequencia_sequencias.c.grupo_id == g
+        ))
+    return len(chaves)
+
+
+def recalcular(conn=None, lote=LOTE_RECALCULAR) -> int:
+    """
+    Refaz as duas tabelas a partir de todas as presenças, em lotes de
+    atletas. Usado pela migração e depois de inserções em lote.
+    Retorna quantas linhas mensais foram gravadas.
+    """
+    if conn is None:
+        total = recalcular(db.session.connection(), lote)
+        db.session.commit()
+        return total
+
+    conn.execute(frequencia_mensal.delete())
+    conn.execute(frequencia_sequencias.delete())
+    agora = datetime.utcnow()
+    total = 0
+    ultimo = 0
+    while True:
+        ids = conn.execute(
+            db.select(Atleta.id).where(Atleta.id > ultimo).order_by(Atleta.id).limit(lote)
+        ).scalars().all()
+        if not ids:
+            break
+        mensal, sequencias = _agregar(
+            conn.execute(_consulta_presencas().where(Presenca.atleta_id.in_(ids)))
+        )
+        if mensal:
+            conn.execute(frequencia_mensal.insert(), _linhas_mensal(mensal, agora))
+            conn.execute(frequencia_sequencias.insert(), _linhas_sequencias(sequencias, agora))
+        total += len(mensal)
+        ultimo = ids[-1]
+    return total
+
+
+# =========================
+# Consultas (só nas tabelas de contadores)
+# =========================
+
+def _taxa(presentes, registradas):
+    return round(100 * presentes / registradas, 1) if registradas else None
+
+
+def _resumo(linha):
+    return {
+        **{c: int(getattr(linha, c) or 0) for c in _CONTADORES},
+        "taxa_presenca": _taxa(linha.presentes or 0, linha.registradas or 0),
+    }
+
+
+def _no_grupo(tabela):
+    """Filtro: o atleta da linha ainda está (ativo) no grupo da linha.
+
+    Quem saiu do grupo fica com as linhas de contador (são histórico), mas
+    não aparece em alertas nem na lista de atletas do grupo.
+    """
+    return (
+        db.select(AtletaGrupo.id)
+        .where(
+            AtletaGrupo.grupo_id == tabela.c.grupo_id,
+            AtletaGrupo.atleta_id == tabela.c.atleta_id,
+            AtletaGrupo.ativo.is_(True),
+        )
+        .exists()
+    )
+
+
+def faltas_seguidas(minimo=3, grupo_id=None, limite=100) -> list:
+    """Atletas com `minimo` ou mais faltas seguidas, da maior sequência para a menor.
+
+    Só membros atuais do grupo (ver _no_grupo).
+    """
+    consulta = (
+        db.select(
+            frequencia_sequencias,
+            Atleta.nome.label("atleta_nome"),
+            Grupo.nome.label("grupo_nome"),
+        )
+        .join(Atleta, Atleta.id == frequencia_sequencias.c.atleta_id)
+        .join(Grupo, Grupo.id == frequencia_sequencias.c.grupo_id)
+        .where(frequencia_sequencias.c.faltas_seguidas >= minimo, _no_grupo(frequencia_sequencias))
+        .order_by(frequencia_sequencias.c.faltas_seguidas.desc(), Atleta.nome)
+        .limit(limite)
+    )
+    if grupo_id is not None:
+        consulta = consulta.where(frequencia_sequencias.c.grupo_id == grupo_id)
+    return [
+        {
+            "atleta_id": l.atleta_id,
+            "atleta": l.atleta_nome,
+            "grupo_id": l.grupo_id,
+            "grupo": l.grupo_nome,
+            "faltas_seguidas": l.faltas_seguidas,
+            "ultima_data": l.ultima_data,
+        }
+        for l in db.session.execute(consulta)
+    ]
+
+
+def frequencia_grupos(mes) -> list:
+    """Taxa de presença de cada grupo no mês (soma dos atletas)."""
+    c = frequencia_mensal.c
+    consulta = (
+        db.select(
+            c.grupo_id,
+            Grupo.nome.label("grupo_nome"),
+            *[db.func.sum(getattr(c, campo)).label(campo) for campo in _CONTADORES],
+        )
+        .join(Grupo, Grupo.id == c.grupo_id)
+        .where(c.mes == inicio_mes(mes))
+        .group_by(c.grupo_id, Grupo.nome)
+        .order_by(Grupo.nome)
+    )
+    return [
+        {"grupo_id": l.grupo_id, "grupo": l.grupo_nome, **_resumo(l)}
+        for l in db.session.execute(consulta)
+    ]
+
+
+def frequencia_grupo(grupo_id, ate, meses=6) -> dict:
+    """Série mensal do grupo e a frequência de cada atleta no período.
+
+    A série conta todas as chamadas do grupo; a lista de atletas traz só
+    os membros atuais.
+    """
+    periodo = meses_ate(ate, meses)
+    c = frequencia_mensal.c
+    no_periodo = db.and_(c.grupo_id == grupo_id, c.mes >= periodo[0], c.mes <= periodo[-1])
+
+    por_mes = {
+        l.mes: _resumo(l)
+        for l in db.session.execute(
+            db.select(c.mes, *[db.func.sum(getattr(c, campo)).label(campo) for campo in _CONTADORES])
+            .where(no_periodo)
+            .group_by(c.mes)
+        )
+    }
+    atletas = [
+        {"atleta_id": l.atleta_id, "atleta": l.nome, **_resumo(l)}
+        for l in db.session.execute(
+            db.select(
+                c.atleta_id,
+                Atleta.nome,
+                *[db.func.sum(getattr(c, campo)).label(campo) for campo in _CONTADORES],
+            )
+            .join(Atleta, Atleta.id == c.atleta_id)
+            .where(no_periodo, _no_grupo(frequencia_mensal))
+            .group_by(c.atleta_id, Atleta.nome)
+            .order_by(Atleta.nome)
+        )
+    ]
+    return {
+        "meses": [{"mes": m, **por_mes.get(m, {"taxa_presenca": None})} for m in periodo],
+        "atletas": atletas,
+    }
+
+
+def frequencia_atleta(atleta_id, ate, meses=6) -> dict:
+    """Série mensal do atleta em cada grupo e as sequências atuais."""
+    periodo = meses_ate(ate, meses)
+    c = frequencia_mensal.c
+    linhas = db.session.execute(
+        db.select(frequencia_mensal)
+        .where(c.atleta_id == atleta_id, c.mes >= periodo[0], c.mes <= periodo[-1])
+        .order_by(c.grupo_id, c.mes)
+    )
+    grupos = {}
+    for l in linhas:
+        grupos.setdefault(l.grupo_id, []).append({"mes": l.mes, **_resumo(l)})
+
+    sequencias = db.session.execute(
+        db.select(frequencia_sequencias, Grupo.nome.label("grupo_nome"))
+        .join(Grupo, Grupo.id == frequencia_sequencias.c.grupo_id)
+        .where(frequencia_sequencias.c.atleta_id == atleta_id)
+        .order_by(Grupo.nome)
+    )
+    return {
+        "grupos": [
+            {
+                "grupo_id": s.grupo_id,
+                "grupo": s.grupo_nome,
+                "faltas_seguidas": s.faltas_seguidas,
+                "presencas_seguidas": s.presencas_seguidas,
+                "ultima_data": s.ultima_data,
+                "ultimo_status": s.ultimo_status,
+                "meses": grupos.get(s.grupo_id, []),
+            }
+            for s in sequencias
+        ],
+    }
+
+
+def registrar_cli(app):
+    import click
+
+    @app.cli.group("frequencia")
+    def frequencia_cli():
+        """Contadores de frequência nos treinos."""
+
+    @frequencia_cli.command("recalcular")
+    def recalcular_cmd():
+        """Refaz os contadores a partir de todas as presenças."""
+        total = recalcular()
+        click.echo(f"{total} contador(es) mensal(is) gravado(s).")
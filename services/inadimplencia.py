@@ -0,0 +1,71 @@
+"""
+Transição de cobranças vencidas: PENDENTE -> ATRASADO.
+
+Roda uma vez por dia pelo agendador (a marca guarda o último dia
+processado), com um único UPDATE apoiado no índice (status, vencimento).
+O UPDATE varre todas as PENDENTES vencidas, sem limite inferior de data:
+cobrança voltada para PENDENTE ou gravada/editada com vencimento no
+passado também entra. O índice mantém a varredura restrita às pendentes
+vencidas, que são poucas.
+
+Cobranças gravadas já vencidas (ex.: cobrança avulsa retroativa) nascem
+como ATRASADO -- ver status_por_vencimento -- para já aparecerem na
+inadimplência antes da execução seguinte.
+"""
+from datetime import date
+
+from extensions import db
+from models import ContaReceber
+from services.agendador import gravar_marca, ler_marca
+from services.metricas import marcar_meses, meses_ate
+
+NOME_JOB = "inadimplencia_diaria"
+
+
+def status_por_vencimento(vencimento: date, hoje: date = None) -> str:
+    hoje = hoje or date.today()
+    return "ATRASADO" if vencimento and vencimento < hoje else "PENDENTE"
+
+
+def _pendentes_vencidas(hoje: date):
+    return ContaReceber.query.filter(
+        ContaReceber.status == "PENDENTE",
+        ContaReceber.vencimento < hoje,
+    )
+
+
+def marcar_atrasadas(hoje: date = None) -> int:
+    """
+    Passa para ATRASADO todas as cobranças PENDENTES com vencimento < hoje.
+    Não faz commit. Retorna quantas mudaram.
+    """
+    hoje = hoje or date.today()
+    return _pendentes_vencidas(hoje).update({"status": "ATRASADO"}, synchronize_session=False)
+
+
+def _meses_entre(inicio: date, fim: date) -> list:
+    quantidade = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    return meses_ate(fim, max(quantidade, 1))
+
+
+def executar_transicao(hoje: date = None) -> dict:
+    """
+    Corpo do job: roda o UPDATE e grava o dia na marca. Se a marca já é
+    de hoje, não faz nada (um UPDATE por dia).
+    """
+    hoje = hoje or date.today()
+    marca = ler_marca(NOME_JOB)
+
+    if marca is not None and date.fromisoformat(marca) >= hoje:
+        return {"desde": marca, "ate": hoje.isoformat(), "atualizadas": 0, "ignorado": True}
+
+    # o UPDATE em lote não diz quais meses mudaram (services/metricas.py):
+    # anota do vencimento mais antigo a atualizar até o mês corrente
+    primeiro = _pendentes_vencidas(hoje).with_entities(db.func.min(ContaReceber.vencimento)).scalar()
+    atualizadas = marcar_atrasadas(hoje=hoje)
+    if atualizadas and primeiro is not None:
+        marcar_meses(db.session.connection(), _meses_entre(primeiro, hoje))
+    gravar_marca(NOME_JOB, hoje.isoformat())
+    db.session.commit()
+
+    return {"desde": marca, "ate": hoje.isoformat(), "atualizadas": atualizadas}
@@ -0,0 +1,192 @@
+"""
+Instrumentação de SQL por requisição.
+
+Ligada nos eventos do engine do SQLAlchemy, registra para cada requisição:
+- quantidade de comandos SQL e tempo total no banco;
+- "impressão digital" de cada comando (SQL normalizado), para achar o
+  padrão N+1 (o mesmo SELECT repetido uma vez por linha da tela).
+
+O resumo vai para uma linha de log estruturada (JSON) e, se habilitado,
+para o header X-SQL-Stats da resposta.
+
+Para testes e benchmarks: `registrar_consultas()`, `limite_de_consultas(n)` e
+`assert_max_consultas(client, url, n)`.
+"""
+import json
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_LISTA_PARAMS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,?)+\)")
+_RE_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def impressao_digital(statement: str) -> str:
+    """
+    SQL normalizado: sem literais, listas IN colapsadas e espaços únicos.
+    Dois comandos com a mesma impressão digital só diferem nos parâmetros.
+    """
+    sql = _RE_LITERAIS.sub("?", statement)
+    sql = _RE_LISTA_PARAMS.sub("(?)", sql)
+    return _RE_ESPACOS.sub(" ", sql).strip()
+
+
+class RegistroSQL:
+    """Acumula os comandos SQL de uma requisição (ou de um bloco de teste)."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_total = 0.0
+        self.impressoes = Counter()
+
+    def registrar(self, statement: str, duracao: float):
+        self.consultas += 1
+        self.tempo_total += duracao
+        self.impressoes[impressao_digital(statement)] += 1
+
+    def repetidas(self, minimo: int = 2) -> list:
+        """[(impressao_digital, vezes)] dos comandos repetidos, mais frequentes primeiro."""
+        return [(sql, n) for sql, n in self.impressoes.most_common() if n >= minimo]
+
+    def resumo(self, limite_n_mais_1: int) -> dict:
+        suspeitas = self.repetidas(limite_n_mais_1)
+        return {
+            "consultas": self.consultas,
+            "tempo_db_ms": round(self.tempo_total * 1000, 2),
+            "comandos_distintos": len(self.impressoes),
+            "n_mais_1": [{"sql": sql[:300], "vezes": n} for sql, n in suspeitas],
+        }
+
+
+# registros ativos fora de requisição (limite_de_consultas)
+_registros_avulsos = []
+
+
+def _registros_ativos():
+    registros = list(_registros_avulsos)
+    if has_request_context():
+        registro = g.get("_registro_sql")
+        if registro is not None:
+            registros.append(registro)
+    return registros
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    # no contexto da execução, não em conn.info: comando que levanta erro
+    # não chega ao _depois, e o início iria junto com o contexto descartado
+    if context is not None:
+        context._inicio_sql = time.perf_counter()
+
+
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_sql", None)
+    duracao = time.perf_counter() - inicio if inicio is not None else 0.0
+    for registro in _registros_ativos():
+        registro.registrar(statement, duracao)
+
+
+def _ligar_eventos(engine):
+    if not event.contains(engine, "before_cursor_execute", _antes):
+        event.listen(engine, "before_cursor_execute", _antes)
+        event.listen(engine, "after_cursor_execute", _depois)
+
+
+def init_instrumentacao_sql(app):
+    """
+    Liga a instrumentação no app. Controlada pela Config:
+    SQL_INSTRUMENTACAO (liga/desliga), SQL_DEBUG_HEADER (header na resposta)
+    e SQL_N_MAIS_1_LIMITE (repetições a partir das quais é N+1).
+    """
+    if not app.config.get("SQL_INSTRUMENTACAO", True):
+        return
+
+    with app.app_context():
+        _ligar_eventos(db.engine)
+
+    limite = app.config.get("SQL_N_MAIS_1_LIMITE", 5)
+    logger = app.logger.getChild("sql")
+
+    @app.before_request
+    def _iniciar_registro_sql():
+        g._registro_sql = RegistroSQL()
+        g._inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _finalizar_registro_sql(response):
+        registro = g.pop("_registro_sql", None)
+        if registro is None:
+            return response
+
+        resumo = registro.resumo(limite)
+        resumo["endpoint"] = request.endpoint
+        resumo["metodo"] = request.method
+        resumo["status"] = response.status_code
+        resumo["tempo_total_ms"] = round(
+            (time.perf_counter() - g.pop("_inicio_requisicao", time.perf_counter())) * 1000, 2
+        )
+
+        if resumo["n_mais_1"]:
+            logger.warning(json.dumps(resumo, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(resumo, ensure_ascii=False))
+
+        if app.config.get("SQL_DEBUG_HEADER"):
+            response.headers["X-SQL-Stats"] = (
+                f"consultas={resumo['consultas']}; tempo_db_ms={resumo['tempo_db_ms']}; "
+                f"repetidas={len(resumo['n_mais_1'])}"
+            )
+        return response
+
+
+# =========================
+# Helpers para testes e benchmarks
+# =========================
+
+@contextmanager
+def registrar_consultas():
+    """Registra os comandos SQL executados dentro do bloco (fora de requisição também)."""
+    _ligar_eventos(db.engine)
+    registro = RegistroSQL()
+    _registros_avulsos.append(registro)
+    try:
+        yield registro
+    finally:
+        _registros_avulsos.remove(registro)
+
+
+@contextmanager
+def limite_de_consultas(maximo: int):
+    """
+    Falha (AssertionError) se o bloco executar mais de `maximo` comandos SQL.
+
+        with limite_de_consultas(6):
+            client.get("/atletas/listar")
+    """
+    with registrar_consultas() as registro:
+        yield registro
+
+    if registro.consultas > maximo:
+        repetidas = "\n".join(f"  {n}x {sql[:200]}" for sql, n in registro.repetidas())
+        raise AssertionError(
+            f"{registro.consultas} consultas SQL (máximo {maximo}).\n"
+            f"Comandos repetidos:\n{repetidas or '  (nenhum)'}"
+        )
+
+
+def assert_max_consultas(client, url: str, maximo: int, metodo: str = "get", **kwargs):
+    """
+    Faz a requisição com o test client do Flask e garante o orçamento de
+    consultas do endpoint. Retorna a resposta.
+    """
+    app = client.application
+    with app.app_context():
+        with limite_de_consultas(maximo):
+            response = getattr(client, metodo)(url, **kwargs)
+    return response
@@ -0,0 +1,57 @@
+"""
+Jobs periódicos registrados no agendador (services/agendador.py).
+"""
+from datetime import date
+
+from services.agendador import job
+from services.cobrancas import gerar_cobrancas_competencia, primeiro_dia_util
+from services.inadimplencia import NOME_JOB as NOME_JOB_INADIMPLENCIA, executar_transicao
+
+
+@job("cobrancas_mensais", intervalo_segundos=3600)
+def cobrancas_mensais():
+    """
+    Gera as cobranças da competência atual a partir do primeiro dia útil
+    do mês. É idempotente: rodar de novo no mesmo mês não duplica nada.
+    """
+    hoje = date.today()
+    if hoje < primeiro_dia_util(hoje.year, hoje.month):
+        return {"competencia": f"{hoje.month:02d}/{hoje.year}", "criadas": 0, "aguardando": True}
+
+    criadas = gerar_cobrancas_competencia(hoje.year, hoje.month)
+    return {"competencia": f"{hoje.month:02d}/{hoje.year}", "criadas": criadas}
+
+
+@job(NOME_JOB_INADIMPLENCIA, intervalo_segundos=3600)
+def inadimplencia_diaria():
+    """PENDENTE -> ATRASADO para cobranças vencidas (uma vez por dia)."""
+    return executar_transicao()
+
+
+@job("exportacoes_expiradas", intervalo_segundos=900)
+def exportacoes_expiradas():
+    """Apaga os arquivos de exportação em segundo plano que já expiraram."""
+    from services.exportacao_async import limpar_expiradas
+
+    return {"removidas": limpar_expiradas()}
+
+
+@job("metricas_mensais", intervalo_segundos=900)
+def metricas_mensais():
+    """Recalcula os indicadores dos meses alterados desde a última execução."""
+    from services.metricas import atualizar_pendentes
+
+    return atualizar_pendentes()
+
+
+@job("presencas_sincronizadas", intervalo_segundos=86400)
+def presencas_sincronizadas():
+    """Esquece os ids de sincronização da chamada offline já antigos."""
+    from flask import current_app
+
+    from extensions import db
+    from services.presencas import limpar_sincronizadas
+
+    removidos = limpar_sincronizadas(current_app.config.get("PRESENCAS_SYNC_RETENCAO_DIAS", 30))
+    db.session.commit()
+    return {"removidos": removidos}
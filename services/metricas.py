@@ -0,0 +1,395 @@
+"""
+Indicadores mensais por grupo (histórico para os gráficos do painel).
+
+`metricas_mensais` guarda uma linha por (mês, grupo), com grupo_id = 0
+(GRUPO_TODOS) para a escola inteira:
+- atletas_ativos: atletas ATIVOS cadastrados até o fim do mês (no grupo,
+  com vínculo ativo). É uma foto tirada enquanto o mês é o corrente:
+  meses passados mantêm esse valor, e os que nunca foram apurados no
+  próprio mês ficam NULL (o cadastro não guarda histórico de status, e
+  o status de hoje não diz quem estava ativo naquela época);
+- receita_faturada / receita_paga: cobranças não canceladas com
+  vencimento no mês / as pagas entre elas;
+- atletas_cobrados / atletas_inadimplentes: atletas com cobrança no mês /
+  com cobrança ATRASADA no mês (taxa de inadimplência = razão das duas);
+- presencas_registradas / presencas_presentes: chamadas das atividades do
+  mês (taxa de presença = razão das duas).
+
+O grupo de uma cobrança é o grupo do atleta (vínculo ativo) quando o mês
+foi apurado; atleta em dois grupos conta nos dois e uma vez só no total.
+
+Atualização incremental: escritas pela sessão em contas_receber,
+presencas, atividades, atletas e atletas_grupos anotam o mês afetado em
+`metricas_pendencias`, na mesma transação. O job `metricas_mensais`
+(services/jobs.py) recalcula só esses meses e apaga exatamente as
+anotações que leu.
+Comandos em lote sem os valores à mão (query.update()/delete()) anotam o
+mês corrente; para outros meses chame marcar_meses(), ou rode
+`flask metricas recalcular` para refazer todo o histórico.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Atividade, Atleta, AtletaGrupo, ContaReceber, Grupo, Presenca
+
+GRUPO_TODOS = 0
+
+# ids de anotações por DELETE ... WHERE id IN (...)
+LOTE_EXCLUSAO = 500
+
+TABELAS_ORIGEM = ("contas_receber", "presencas", "atividades", "atletas", "atletas_grupos")
+
+metricas_mensais = db.Table(
+    "metricas_mensais",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("mes", db.Date, nullable=False),  # primeiro dia do mês
+    db.Column("grupo_id", db.Integer, nullable=False),  # 0 = escola inteira
+    db.Column("atletas_ativos", db.Integer),  # NULL = mês passado sem foto
+    db.Column("receita_faturada", db.Numeric(12, 2), nullable=False, default=0),
+    db.Column("receita_paga", db.Numeric(12, 2), nullable=False, default=0),
+    db.Column("atletas_cobrados", db.Integer, nullable=False, default=0),
+    db.Column("atletas_inadimplentes", db.Integer, nullable=False, default=0),
+    db.Column("presencas_registradas", db.Integer, nullable=False, default=0),
+    db.Column("presencas_presentes", db.Integer, nullable=False, default=0),
+    db.Column("atualizado_em", db.DateTime),
+    # gráfico de um grupo: WHERE grupo_id = ? AND mes >= ? ORDER BY mes
+    db.UniqueConstraint("grupo_id", "mes", name="uk_metricas_mensais_grupo_mes"),
+)
+
+# meses a recalcular; repetições são normais (uma linha por flush)
+metricas_pendencias = db.Table(
+    "metricas_pendencias",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("mes", db.Date, nullable=False),
+    db.Column("criado_em", db.DateTime),
+)
+
+_CONTADORES = (
+    "atletas_ativos",
+    "receita_faturada",
+    "receita_paga",
+    "atletas_cobrados",
+    "atletas_inadimplentes",
+    "presencas_registradas",
+    "presencas_presentes",
+)
+
+
+def inicio_mes(d) -> date:
+    if isinstance(d, datetime):
+        d = d.date()
+    return d.replace(day=1)
+
+
+def proximo_mes(mes: date) -> date:
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def meses_ate(mes: date, quantidade: int) -> list:
+    """Os `quantidade` meses terminando em `mes`, do mais antigo ao mais novo."""
+    meses = [inicio_mes(mes)]
+    for _ in range(quantidade - 1):
+        m = meses[0]
+        meses.insert(0, date(m.year - (m.month == 1), (m.month - 2) % 12 + 1, 1))
+    return meses
+
+
+# =========================
+# Anotação dos meses alterados
+# =========================
+
+# engines em que a tabela metricas_pendencias já existe (só o "sim" fica
+# guardado: um worker que subiu antes da migração passa a anotar depois dela)
+_tabela_existe = {}
+
+
+def _ativo(conn) -> bool:
+    engine = conn.engine
+    if not _tabela_existe.get(engine):
+        _tabela_existe[engine] = inspect(conn).has_table("metricas_pendencias")
+    return _tabela_existe[engine]
+
+
+def marcar_meses(conn, datas):
+    """Anota os meses das datas para o próximo recálculo (sem commit)."""
+    meses = {inicio_mes(d) for d in datas if d is not None}
+    if not meses or not _ativo(conn):
+        return
+    agora = datetime.utcnow()
+    conn.execute(
+        metricas_pendencias.insert(),
+        [{"mes": m, "criado_em": agora} for m in sorted(meses)],
+    )
+
+
+def _datas_das_atividades(conn, ids):
+    ids = [i for i in ids if i is not None]
+    if not ids:
+        return []
+    return conn.execute(
+        db.select(Atividade.data).where(Atividade.id.in_(ids)).distinct()
+    ).scalars().all()
+
+
+def _valores(obj, atributo):
+    """Valor atual e anterior (se mudou no flush) do atributo."""
+    return [v for v in inspect(obj).attrs[atributo].history.sum() if v is not None]
+
+
+def _apos_flush(session, flush_context):
+    datas, atividades = [], []
+    alterados = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+    for obj in [*session.new, *session.deleted, *alterados]:
+        if isinstance(obj, ContaReceber):
+            datas += _valores(obj, "vencimento")
+        elif isinstance(obj, Atividade):
+            datas += _valores(obj, "data")
+        elif isinstance(obj, Presenca):
+            atividades += _valores(obj, "atividade_id")
+        elif isinstance(obj, (Atleta, AtletaGrupo)):
+            datas.append(date.today())
+    if not datas and not atividades:
+        return
+    conn = session.connection()
+    marcar_meses(conn, datas + _datas_das_atividades(conn, atividades))
+
+
+def _ao_executar(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabela = getattr(getattr(estado.statement, "table", None), "name", None)
+    if tabela not in TABELAS_ORIGEM:
+        return
+
+    conn = estado.session.connection()
+    linhas = estado.parameters
+    if estado.is_insert and linhas:
+        linhas = linhas if isinstance(linhas, list) else [linhas]
+        if tabela == "contas_receber":
+            return marcar_meses(conn, [l.get("vencimento") for l in linhas])
+        if tabela == "atividades":
+            return marcar_meses(conn, [l.get("data") for l in linhas])
+        if tabela == "presencas":
+            ids = {l.get("atividade_id") for l in linhas}
+            return marcar_meses(conn, _datas_das_atividades(conn, ids))
+    marcar_meses(conn, [date.today()])
+
+
+def init_metricas():
+    """Liga os eventos da sessão (uma vez por processo)."""
+    if not event.contains(Session, "after_flush", _apos_flush):
+        event.listen(Session, "after_flush", _apos_flush)
+        event.listen(Session, "do_orm_execute", _ao_executar)
+
+
+def marcar_historico(conn):
+    """Anota todos os meses com dados (do mais antigo até o mês corrente)."""
+    primeiro = [
+        conn.execute(db.select(db.func.min(ContaReceber.vencimento))).scalar(),
+        conn.execute(db.select(db.func.min(Atividade.data))).scalar(),
+        conn.execute(db.select(db.func.min(Atleta.criado_em))).scalar(),
+    ]
+    primeiro = [inicio_mes(d) for d in primeiro if d is not None]
+    if not primeiro:
+        return 0
+    mes, ultimo = min(primeiro), inicio_mes(date.today())
+    meses = []
+    while mes <= ultimo:
+        meses.append(mes)
+        mes = proximo_mes(mes)
+    marcar_meses(conn, meses)
+    return len(meses)
+
+
+# =========================
+# Apuração
+# =========================
+
+def _apurar_mes(conn, mes, hoje):
+    """Reescreve as linhas de `mes` em metricas_mensais."""
+    fim = proximo_mes(mes)
+    fim_dt = datetime.combine(fim, datetime.min.time())
+    vinculo = db.and_(AtletaGrupo.atleta_id == Atleta.id, AtletaGrupo.ativo.is_(True))
+
+    grupos = set(conn.execute(db.select(Grupo.id)).scalars())
+    linhas = {g: dict.fromkeys(_CONTADORES, 0) for g in grupos | {GRUPO_TODOS}}
+
+    def somar(grupo_id, **valores):
+        linha = linhas.setdefault(grupo_id, dict.fromkeys(_CONTADORES, 0))
+        for campo, valor in valores.items():
+            linha[campo] += valor or 0
+
+    # atletas ativos cadastrados até o fim do mês: só no mês corrente (os
+    # passados mantêm a foto que já têm, logo abaixo)
+    passado = mes < inicio_mes(hoje)
+    if not passado:
+        ativos = db.and_(
+            Atleta.status == "ATIVO",
+            db.or_(Atleta.criado_em.is_(None), Atleta.criado_em < fim_dt),
+        )
+        somar(GRUPO_TODOS, atletas_ativos=conn.execute(
+            db.select(db.func.count()).select_from(Atleta).where(ativos)
+        ).scalar())
+        for grupo_id, qtd in conn.execute(
+            db.select(AtletaGrupo.grupo_id, db.func.count(db.distinct(Atleta.id)))
+            .join(Atleta, vinculo)
+            .where(ativos)
+            .group_by(AtletaGrupo.grupo_id)
+        ):
+            somar(grupo_id, atletas_ativos=qtd)
+
+    # cobranças com vencimento no mês
+    colunas = (
+        db.func.sum(ContaReceber.valor),
+        db.func.sum(db.case((ContaReceber.status == "PAGO", ContaReceber.valor), else_=0)),
+        db.func.count(db.distinct(ContaReceber.atleta_id)),
+        db.func.count(
+            db.distinct(db.case((ContaReceber.status == "ATRASADO", ContaReceber.atleta_id)))
+        ),
+    )
+    no_mes = db.and_(
+        ContaReceber.vencimento >= mes,
+        ContaReceber.vencimento < fim,
+        ContaReceber.status != "CANCELADO",
+    )
+    por_grupo = [
+        (GRUPO_TODOS, *conn.execute(db.select(*colunas).where(no_mes)).one()),
+        *conn.execute(
+            db.select(AtletaGrupo.grupo_id, *colunas)
+            .join(AtletaGrupo, db.and_(
+                AtletaGrupo.atleta_id == ContaReceber.atleta_id, AtletaGrupo.ativo.is_(True)
+            ))
+            .where(no_mes)
+            .group_by(AtletaGrupo.grupo_id)
+        ),
+    ]
+    for grupo_id, faturada, paga, cobrados, inadimplentes in por_grupo:
+        somar(
+            grupo_id,
+            receita_faturada=Decimal(str(faturada or 0)),
+            receita_paga=Decimal(str(paga or 0)),
+            atletas_cobrados=cobrados,
+            atletas_inadimplentes=inadimplentes,
+        )
+
+    # chamadas das atividades do mês (cada atividade é de um grupo só)
+    for grupo_id, registradas, presentes in conn.execute(
+        db.select(
+            Atividade.grupo_id,
+            db.func.count(),
+            db.func.count(db.case((Presenca.status == "PRESENTE", 1))),
+        )
+        .select_from(Presenca)
+        .join(Atividade, Atividade.id == Presenca.atividade_id)
+        .where(Atividade.data >= mes, Atividade.data < fim)
+        .group_by(Atividade.grupo_id)
+    ):
+        somar(GRUPO_TODOS, presencas_registradas=registradas, presencas_presentes=presentes)
+        if grupo_id is not None:
+            somar(grupo_id, presencas_registradas=registradas, presencas_presentes=presentes)
+
+    # meses passados: a foto de atletas ativos já tirada, ou NULL se o mês
+    # nunca foi apurado enquanto era o corrente (ver docstring do módulo)
+    if passado:
+        fotos = dict(conn.execute(
+            db.select(metricas_mensais.c.grupo_id, metricas_mensais.c.atletas_ativos)
+            .where(metricas_mensais.c.mes == mes)
+        ).all())
+        for grupo_id, linha in linhas.items():
+            linha["atletas_ativos"] = fotos.get(grupo_id)
+
+    agora = datetime.utcnow()
+    conn.execute(metricas_mensais.delete().where(metricas_mensais.c.mes == mes))
+    conn.execute(
+        metricas_mensais.insert(),
+        [{"mes": mes, "grupo_id": g, "atualizado_em": agora, **v} for g, v in sorted(linhas.items())],
+    )
+
+
+def atualizar_pendentes(hoje: date = None) -> dict:
+    """
+    Corpo do job: recalcula os meses anotados e apaga exatamente as
+    anotações lidas. Apagar por faixa de id (id <= máximo lido) perderia,
+    no MySQL, a anotação de uma transação que pegou um id menor mas só fez
+    commit depois da leitura; as que chegarem durante a apuração ficam
+    para a próxima execução.
+    """
+    hoje = hoje or date.today()
+    conn = db.session.connection()
+    anotacoes = conn.execute(db.select(metricas_pendencias.c.id, metricas_pendencias.c.mes)).all()
+    if not anotacoes:
+        return {"meses": []}
+
+    meses = sorted({mes for _, mes in anotacoes})
+    for mes in meses:
+        _apurar_mes(conn, mes, hoje)
+    ids = [i for i, _ in anotacoes]
+    for inicio in range(0, len(ids), LOTE_EXCLUSAO):
+        conn.execute(
+            metricas_pendencias.delete().where(
+                metricas_pendencias.c.id.in_(ids[inicio:inicio + LOTE_EXCLUSAO])
+            )
+        )
+    db.session.commit()
+    return {"meses": [m.strftime("%m/%Y") for m in meses]}
+
+
+def serie_mensal(grupo_id=GRUPO_TODOS, quantidade=12, ate: date = None) -> list:
+    """
+    Os últimos `quantidade` meses de um grupo, do mais antigo ao mais novo,
+    lidos só de metricas_mensais (um SELECT pelo índice único). Meses ainda
+    não apurados vêm com os contadores em None.
+    """
+    meses = meses_ate(ate or date.today(), quantidade)
+    linhas = {
+        l.mes: l
+        for l in db.session.execute(
+            db.select(metricas_mensais)
+            .where(
+                metricas_mensais.c.grupo_id == grupo_id,
+                metricas_mensais.c.mes >= meses[0],
+                metricas_mensais.c.mes <= meses[-1],
+            )
+            .order_by(metricas_mensais.c.mes)
+        )
+    }
+
+    serie = []
+    for mes in meses:
+        linha = linhas.get(mes)
+        ponto = {"mes": mes, **{c: getattr(linha, c) if linha else None for c in _CONTADORES}}
+        ponto["taxa_inadimplencia"] = _percentual(ponto["atletas_inadimplentes"], ponto["atletas_cobrados"])
+        ponto["taxa_presenca"] = _percentual(ponto["presencas_presentes"], ponto["presencas_registradas"])
+        serie.append(ponto)
+    return serie
+
+
+def _percentual(parte, total):
+    if not total:
+        return None
+    return round(100 * parte / total, 1)
+
+
+def registrar_cli(app):
+    import click
+
+    @app.cli.group("metricas")
+    def metricas_cli():
+        """Indicadores mensais por grupo (gráficos do painel)."""
+
+    @metricas_cli.command("atualizar")
+    def atualizar_cmd():
+        """Recalcula os meses com alterações desde a última execução."""
+        resultado = atualizar_pendentes()
+        click.echo(f"{len(resultado['meses'])} mês(es) recalculado(s).")
+
+    @metricas_cli.command("recalcular")
+    def recalcular_cmd():
+        """Recalcula todo o histórico."""
+        marcar_historico(db.session.connection())
+        resultado = atualizar_pendentes()
+        click.echo(f"{len(resultado['meses'])} mês(es) recalculado(s).")
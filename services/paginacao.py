@@ -0,0 +1,127 @@
+"""
+Paginação por chave (keyset) para as listagens.
+
+Em vez de OFFSET (que lê e descarta todas as linhas anteriores), cada
+página continua a partir da última linha da anterior:
+
+    WHERE (nome, id) > (:ultimo_nome, :ultimo_id) ORDER BY nome, id LIMIT n
+
+O custo de qualquer página é o mesmo da primeira, desde que exista índice
+nas colunas da ordenação. A comparação de tuplas é escrita por extenso
+(nome > :n OR (nome = :n AND id > :i)), que tanto o SQLite quanto o MySQL
+resolvem pelo índice.
+
+O cursor que vai na URL é a chave da última linha em JSON/base64.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Optional
+
+from extensions import db
+
+
+class CursorInvalido(ValueError):
+    """Cursor adulterado ou de outra ordenação."""
+
+
+@dataclass
+class Pagina:
+    itens: list
+    proximo: Optional[str] = None  # cursor da página seguinte (None = última)
+    primeira: bool = True
+
+    @property
+    def tem_mais(self) -> bool:
+        return self.proximo is not None
+
+
+def _valor_json(v):
+    if isinstance(v, (date, datetime, time)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def _valor_coluna(coluna, v):
+    if v is None:
+        return None
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        return v
+    if tipo is datetime:
+        return datetime.fromisoformat(v)
+    if tipo is date:
+        return date.fromisoformat(v)
+    if tipo is time:
+        return time.fromisoformat(v)
+    if tipo is Decimal:
+        return Decimal(v)
+    return tipo(v)
+
+
+def codificar_cursor(valores) -> str:
+    texto = json.dumps([_valor_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, colunas) -> list:
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(texto)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CursorInvalido(str(exc)) from exc
+    if not isinstance(valores, list) or len(valores) != len(colunas):
+        raise CursorInvalido("cursor com quantidade de colunas diferente")
+    try:
+        return [_valor_coluna(c, v) for c, v in zip(colunas, valores)]
+    except (TypeError, ValueError) as exc:
+        raise CursorInvalido(str(exc)) from exc
+
+
+def depois_de(colunas, valores, descendente=False):
+    """(c1, c2, ...) > (v1, v2, ...) por extenso (ou < com descendente)."""
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(colunas, valores)):
+        passo = coluna < valor if descendente else coluna > valor
+        iguais = [c == v for c, v in zip(colunas[:i], valores[:i])]
+        condicoes.append(db.and_(*iguais, passo) if iguais else passo)
+    return db.or_(*condicoes)
+
+
+def paginar(query, colunas, cursor=None, por_pagina=50, descendente=False, chave=None):
+    """
+    Uma página de `query` ordenada por `colunas` (a última deve ser única,
+    normalmente o id). `chave(item)` devolve os valores das colunas para um
+    item do resultado (padrão: os atributos de mesmo nome).
+
+    Cursor inválido recomeça da primeira página.
+    """
+    colunas = list(colunas)
+    if chave is None:
+        nomes = [c.key for c in colunas]
+
+        def chave(item):
+            return [getattr(item, n) for n in nomes]
+
+    primeira = True
+    if cursor:
+        try:
+            query = query.filter(depois_de(colunas, decodificar_cursor(cursor, colunas), descendente))
+            primeira = False
+        except CursorInvalido:
+            pass
+
+    ordem = [c.desc() for c in colunas] if descendente else colunas
+    itens = query.order_by(*ordem).limit(por_pagina + 1).all()
+
+    proximo = None
+    if len(itens) > por_pagina:
+        itens = itens[:por_pagina]
+        proximo = codificar_cursor(chave(itens[-1]))
+    return Pagina(itens=itens, proximo=proximo, primeira=primeira)
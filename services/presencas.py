@@ -0,0 +1,238 @@
+"""
+Gravação da chamada (presenças) de uma atividade.
+
+A chamada enviada é comparada com o que já está gravado: só as linhas
+novas ou com status/observação diferentes vão para o banco, num upsert em
+lote pela constraint uk_presenca_atividade_atleta. Linhas iguais nem são
+tocadas, e `registrado_em` continua sendo o horário do primeiro registro.
+Os contadores de frequência (services/frequencia.py) são recontados na
+mesma transação, só para as presenças gravadas.
+
+Chamada offline (static/js/presencas_offline.js): o celular guarda as
+alterações numa fila local e manda em lotes para sincronizar_presencas():
+- cada alteração tem um id gerado no aparelho; os ids aplicados ficam em
+  `presencas_sincronizadas`, então reenviar o mesmo lote (resposta que se
+  perdeu na rede) não muda nada;
+- cada alteração tem o horário em que foi feita no aparelho; vale a mais
+  recente (`Presenca.alterado_em`), mesmo que chegue antes da mais antiga.
+"""
+from datetime import datetime, timedelta, timezone
+
+from extensions import db
+from models import Atividade, Atleta, Presenca
+from services.banco import upsert
+from services.frequencia import atualizar_frequencia, chaves_das_presencas
+
+STATUS_PRESENCA = ("PRESENTE", "AUSENTE", "JUSTIFICADO")
+
+# folga para relógio de aparelho adiantado: mais que isso vira "agora"
+TOLERANCIA_RELOGIO = timedelta(minutes=5)
+
+presencas_sincronizadas = db.Table(
+    "presencas_sincronizadas",
+    db.Column("id_cliente", db.String(64), primary_key=True),
+    db.Column("recebido_em", db.DateTime, nullable=False),
+    db.Index("ix_presencas_sincronizadas_recebido_em", "recebido_em"),
+)
+
+
+def gravar_presencas(atividade_id: int, chamada: dict) -> int:
+    """
+    Grava a chamada {atleta_id: (status, observacao)} da atividade.
+    Atletas fora da chamada não são alterados. Não faz commit.
+    Retorna quantas presenças foram criadas ou alteradas.
+    """
+    atuais = {
+        atleta_id: (status, observacao)
+        for atleta_id, status, observacao in db.session.execute(
+            db.select(Presenca.atleta_id, Presenca.status, Presenca.observacao)
+            .where(Presenca.atividade_id == atividade_id)
+        )
+    }
+
+    agora = datetime.utcnow()
+    linhas = [
+        {
+            "atividade_id": atividade_id,
+            "atleta_id": atleta_id,
+            "status": status,
+            "observacao": observacao,
+            "registrado_em": agora,  # só vale para as linhas novas
+            "alterado_em": agora,
+        }
+        for atleta_id, (status, observacao) in sorted(chamada.items())
+        if atuais.get(atleta_id) != (status, observacao)
+    ]
+    upsert(
+        Presenca,
+        linhas,
+        chaves=("atividade_id", "atleta_id"),
+        atualizar=("status", "observacao", "alterado_em"),
+    )
+    atualizar_frequencia(chaves_das_presencas((atividade_id, l["atleta_id"]) for l in linhas))
+    return len(linhas)
+
+
+class AlteracaoInvalida(ValueError):
+    pass
+
+
+def _ler_alteracao(item, agora):
+    """Valida um item do lote -> dict da alteração (ou AlteracaoInvalida)."""
+    if not isinstance(item, dict):
+        raise AlteracaoInvalida("alteração deve ser um objeto")
+    id_cliente = item.get("id")
+    if not isinstance(id_cliente, str) or not 0 < len(id_cliente) <= 64:
+        raise AlteracaoInvalida("id ausente ou inválido")
+    try:
+        atividade_id = int(item.get("atividade_id"))
+        atleta_id = int(item.get("atleta_id"))
+    except (TypeError, ValueError):
+        raise AlteracaoInvalida("atividade_id/atleta_id inválidos") from None
+    status = item.get("status")
+    if status not in STATUS_PRESENCA:
+        raise AlteracaoInvalida("status inválido")
+    observacao = item.get("observacao")
+    if observacao is not None and not isinstance(observacao, str):
+        raise AlteracaoInvalida("observação inválida")
+    em = str(item.get("em"))
+    if em.endswith(("Z", "z")):  # toISOString(); fromisoformat só aceita "Z" a partir do 3.11
+        em = em[:-1] + "+00:00"
+    try:
+        em = datetime.fromisoformat(em)
+    except ValueError:
+        raise AlteracaoInvalida("horário (em) inválido") from None
+    if em.tzinfo is not None:  # o banco guarda UTC sem fuso
+        em = em.astimezone(timezone.utc).replace(tzinfo=None)
+    if em > agora + TOLERANCIA_RELOGIO:
+        em = agora
+    return {
+        "id": id_cliente,
+        "atividade_id": atividade_id,
+        "atleta_id": atleta_id,
+        "status": status,
+        "observacao": (observacao or "").strip()[:255] or None,
+        "em": em,
+    }
+
+
+def sincronizar_presencas(itens) -> list:
+    """
+    Aplica um lote de alterações da chamada offline:
+    [{"id", "atividade_id", "atleta_id", "status", "observacao", "em"}, ...]
+
+    Retorna um resultado por item, na mesma ordem:
+    {"id", "situacao"} com situacao em
+    - "aplicada": gravada (ou já valia o mesmo horário);
+    - "superada": havia alteração mais recente, no lote ou no banco;
+    - "repetida": esse id já tinha sido sincronizado;
+    - "invalida": item com erro (vem também "erro"); não adianta reenviar.
+    Não faz commit.
+    """
+    agora = datetime.utcnow()
+    resultados = []
+    validas = {}  # id -> alteração
+    for item in itens:
+        try:
+            alteracao = _ler_alteracao(item, agora)
+        except AlteracaoInvalida as exc:
+            id_cliente = item.get("id") if isinstance(item, dict) else None
+            resultados.append({"id": id_cliente, "situacao": "invalida", "erro": str(exc)})
+            continue
+        resultados.append({"id": alteracao["id"], "situacao": None})
+        if alteracao["id"] in validas:
+            resultados[-1]["situacao"] = "repetida"
+        else:
+            validas[alteracao["id"]] = alteracao
+
+    # ids já sincronizados antes
+    repetidos = set()
+    if validas:
+        repetidos = set(db.session.execute(
+            db.select(presencas_sincronizadas.c.id_cliente)
+            .where(presencas_sincronizadas.c.id_cliente.in_(list(validas)))
+        ).scalars())
+
+    # atividades e atletas que existem
+    novas = [a for i, a in validas.items() if i not in repetidos]
+    atividades = {a["atividade_id"] for a in novas}
+    atletas = {a["atleta_id"] for a in novas}
+    atividades_ok = set(db.session.execute(
+        db.select(Atividade.id).where(Atividade.id.in_(atividades))
+    ).scalars()) if atividades else set()
+    atletas_ok = set(db.session.execute(
+        db.select(Atleta.id).where(Atleta.id.in_(atletas))
+    ).scalars()) if atletas else set()
+
+    # a mais recente de cada (atividade, atleta) no lote
+    vencedoras = {}
+    situacao = {}
+    for a in novas:
+        if a["atividade_id"] not in atividades_ok or a["atleta_id"] not in atletas_ok:
+            situacao[a["id"]] = ("invalida", "atividade ou atleta não encontrado")
+            continue
+        chave = (a["atividade_id"], a["atleta_id"])
+        atual = vencedoras.get(chave)
+        if atual is None or (a["em"], a["id"]) > (atual["em"], atual["id"]):
+            if atual is not None:
+                situacao[atual["id"]] = ("superada", None)
+            vencedoras[chave] = a
+        else:
+            situacao[a["id"]] = ("superada", None)
+
+    # comparação com o banco: só para mostrar "superada" na resposta; quem
+    # garante o last-write-wins é o WHERE do upsert
+    gravadas = {}
+    if vencedoras:
+        for atividade_id, atleta_id, alterado_em in db.session.execute(
+            db.select(Presenca.atividade_id, Presenca.atleta_id, Presenca.alterado_em)
+            .where(Presenca.atividade_id.in_({k[0] for k in vencedoras}))
+        ):
+            gravadas[(atividade_id, atleta_id)] = alterado_em
+
+    linhas = []
+    for chave, a in vencedoras.items():
+        anterior = gravadas.get(chave)
+        if anterior is not None and anterior > a["em"]:
+            situacao[a["id"]] = ("superada", None)
+            continue
+        situacao[a["id"]] = ("aplicada", None)
+        linhas.append({
+            "atividade_id": a["atividade_id"],
+            "atleta_id": a["atleta_id"],
+            "status": a["status"],
+            "observacao": a["observacao"],
+            "registrado_em": agora,
+            "alterado_em": a["em"],
+        })
+    upsert(
+        Presenca,
+        sorted(linhas, key=lambda l: (l["atividade_id"], l["atleta_id"])),
+        chaves=("atividade_id", "atleta_id"),
+        atualizar=("status", "observacao", "alterado_em"),
+        somente_se_maior="alterado_em",
+    )
+    atualizar_frequencia(chaves_das_presencas(vencedoras))
+    upsert(
+        presencas_sincronizadas,
+        [{"id_cliente": i, "recebido_em": agora} for i, (s, _) in situacao.items() if s != "invalida"],
+        chaves=("id_cliente",),
+    )
+
+    for r in resultados:
+        if r["situacao"] is None:
+            if r["id"] in repetidos:
+                r["situacao"] = "repetida"
+            else:
+                r["situacao"], erro = situacao[r["id"]]
+                if erro:
+                    r["erro"] = erro
+    return resultados
+
+
+def limpar_sincronizadas(dias: int) -> int:
+    """Esquece os ids sincronizados há mais de `dias` dias. Não faz commit."""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    return db.session.execute(
+        presencas_sincronizadas.delete().where(presencas_sincronizadas.c.recebido_em < limite)
+    ).rowcount
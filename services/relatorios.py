@@ -0,0 +1,175 @@
+"""
+Relatórios exportáveis (alunos, grupos, elenco de um grupo e financeiro).
+
+Cada relatório monta (nome_base, headers, consulta, linha) para o motor de
+exportação (services/exportacao.py). A mesma definição serve a exportação
+direta (rotas /exportar) e a exportação em segundo plano
+(services/exportacao_async.py), que roda fora do contexto de requisição.
+"""
+from decimal import Decimal
+
+from extensions import db
+from models import Atleta, AtletaGrupo, ContaReceber, Grupo
+
+PERFIS_STAFF = ("ADMIN", "COACH", "SUPER_ADMIN")
+PERFIS_ADMIN = ("ADMIN", "SUPER_ADMIN")
+
+# nome -> {"montar": callable(parametros), "perfis": tupla ou None (qualquer login),
+#          "fontes": modelos lidos pelo relatório (impressão digital do cache)}
+RELATORIOS = {}
+
+
+class RelatorioInvalido(ValueError):
+    """Relatório desconhecido ou parâmetros que não existem mais no banco."""
+
+
+def relatorio(nome: str, perfis=None, fontes=()):
+    def decorator(func):
+        RELATORIOS[nome] = {"montar": func, "perfis": perfis, "fontes": tuple(fontes)}
+        return func
+
+    return decorator
+
+
+def montar_relatorio(nome: str, parametros=None):
+    definicao = RELATORIOS.get(nome)
+    if definicao is None:
+        raise RelatorioInvalido(f"relatório desconhecido: {nome}")
+    return definicao["montar"](parametros or {})
+
+
+def fontes_relatorio(nome: str) -> tuple:
+    definicao = RELATORIOS.get(nome)
+    if definicao is None:
+        raise RelatorioInvalido(f"relatório desconhecido: {nome}")
+    return definicao["fontes"]
+
+
+def pode_exportar(nome: str, usuario) -> bool:
+    definicao = RELATORIOS.get(nome)
+    if definicao is None:
+        return False
+    return definicao["perfis"] is None or usuario.role in definicao["perfis"]
+
+
+def contar_linhas(consulta) -> int:
+    return consulta.order_by(None).count()
+
+
+@relatorio("alunos", fontes=(Atleta,))
+def alunos(parametros):
+    consulta = db.session.query(
+        Atleta.nome,
+        Atleta.data_nascimento,
+        Atleta.posicao,
+        Atleta.responsavel_nome,
+        Atleta.responsavel_telefone,
+        Atleta.telefone,
+    ).order_by(Atleta.nome, Atleta.id)
+    headers = ["Nome", "Data de nascimento", "Posição", "Responsável", "Telefone"]
+
+    def linha(a):
+        return [
+            a.nome or "",
+            a.data_nascimento,
+            a.posicao or "",
+            a.responsavel_nome or "",
+            a.responsavel_telefone or a.telefone or "",
+        ]
+
+    return "alunos", headers, consulta, linha
+
+
+@relatorio("grupos", perfis=PERFIS_STAFF, fontes=(Grupo,))
+def grupos(parametros):
+    consulta = db.session.query(
+        Grupo.nome, Grupo.faixa_etaria_min, Grupo.faixa_etaria_max, Grupo.descricao
+    ).order_by(Grupo.nome, Grupo.id)
+    headers = ["Nome", "Faixa etária mínima", "Faixa etária máxima", "Descrição"]
+
+    def linha(g):
+        return [
+            g.nome or "",
+            g.faixa_etaria_min or "",
+            g.faixa_etaria_max or "",
+            (g.descricao or "").replace("\n", " "),
+        ]
+
+    return "grupos", headers, consulta, linha
+
+
+@relatorio("grupo", perfis=PERFIS_STAFF, fontes=(Grupo, AtletaGrupo, Atleta))
+def grupo(parametros):
+    """Um grupo com todos os atletas vinculados. Parâmetro: grupo_id."""
+    try:
+        grupo_id = int(parametros.get("grupo_id"))
+    except (TypeError, ValueError):
+        raise RelatorioInvalido("grupo_id inválido")
+    g = db.session.get(Grupo, grupo_id)
+    if g is None:
+        raise RelatorioInvalido(f"grupo {grupo_id} não existe")
+
+    consulta = (
+        db.session.query(
+            Atleta.nome,
+            Atleta.posicao,
+            Atleta.cpf,
+            Atleta.rg,
+            Atleta.data_nascimento,
+            Atleta.responsavel_nome,
+            Atleta.responsavel_telefone,
+            Atleta.telefone,
+        )
+        .join(AtletaGrupo, Atleta.id == AtletaGrupo.atleta_id)
+        .filter(AtletaGrupo.grupo_id == g.id)
+        .order_by(Atleta.nome, Atleta.id)
+    )
+
+    headers = [
+        "Grupo",
+        "Nome do atleta",
+        "Posição",
+        "CPF",
+        "RG",
+        "Data de nascimento",
+        "Responsável",
+        "Telefone",
+    ]
+    nome_grupo = g.nome
+
+    def linha(a):
+        return [
+            nome_grupo,
+            a.nome or "",
+            a.posicao or "",
+            a.cpf or "",
+            a.rg or "",
+            a.data_nascimento,
+            a.responsavel_nome or "",
+            a.responsavel_telefone or a.telefone or "",
+        ]
+
+    nome_base = f"grupo_{g.id}_{g.nome.replace(' ', '_')}"
+    return nome_base, headers, consulta, linha
+
+
+@relatorio("financeiro", perfis=PERFIS_ADMIN, fontes=(ContaReceber, Atleta))
+def financeiro(parametros):
+    consulta = (
+        db.session.query(
+            Atleta.nome,
+            ContaReceber.vencimento,
+            ContaReceber.valor,
+            ContaReceber.status,
+        )
+        .select_from(ContaReceber)
+        .outerjoin(Atleta, Atleta.id == ContaReceber.atleta_id)
+        .order_by(ContaReceber.vencimento.desc(), ContaReceber.id.desc())
+    )
+
+    headers = ["Aluno", "Vencimento", "Valor", "Status"]
+
+    def linha(c):
+        return [c.nome or "", c.vencimento, c.valor or Decimal("0"), c.status or ""]
+
+    return "financeiro", headers, consulta, linha
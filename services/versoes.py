@@ -0,0 +1,131 @@
+"""
+Versão dos dados por tabela, para invalidar caches (exportações, KPIs).
+
+Toda escrita feita pela sessão do SQLAlchemy nas tabelas monitoradas
+incrementa `versoes_dados.versao` da tabela:
+- flush de objetos (add / alteração / delete);
+- comandos em lote pela sessão: query.update(), query.delete() e
+  db.session.execute(db.insert(Model), linhas).
+
+As tabelas escritas são anotadas na sessão e o incremento roda depois do
+COMMIT, numa transação curta e própria (um UPDATE, linhas em ordem de
+chave). Dentro da transação da requisição, a linha do contador de cada
+tabela ficaria travada até o fim: todos os escritores da tabela fariam
+fila nela, e flushes em ordens diferentes podiam travar uns aos outros
+(deadlock no MySQL). Rollback descarta as anotações.
+
+Entre o COMMIT e o incremento, um leitor ainda vê a versão antiga: no pior
+caso guarda em cache um valor novo com a versão velha, que o incremento
+invalida em seguida. SQL escrito à mão (text()) ou direto no engine não
+passa por aqui; por isso o cache de dados tem TTL e a impressão digital
+das exportações também confere count/max(id).
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from extensions import db
+
+TABELAS_MONITORADAS = (
+    "atletas",
+    "grupos",
+    "atletas_grupos",
+    "atletas_responsaveis",
+    "planos",
+    "atletas_planos",
+    "atividades",
+    "presencas",
+    "contas_receber",
+    "contas_pagar",
+)
+
+versoes_dados = db.Table(
+    "versoes_dados",
+    db.Column("tabela", db.String(64), primary_key=True),
+    db.Column("versao", db.BigInteger, nullable=False, default=0),
+    db.Column("atualizado_em", db.DateTime),
+)
+
+# engines em que a tabela versoes_dados já existe. Só o "sim" fica guardado:
+# antes da migração confere de novo a cada commit, e um worker que subiu
+# antes de `flask banco migrar` passa a incrementar assim que a tabela aparece
+_tabela_existe = {}
+
+
+def _ativo(conn) -> bool:
+    engine = conn.engine
+    if not _tabela_existe.get(engine):
+        _tabela_existe[engine] = inspect(conn).has_table("versoes_dados")
+    return _tabela_existe[engine]
+
+
+def _incrementar(conn, tabelas):
+    tabelas = sorted(t for t in tabelas if t in TABELAS_MONITORADAS)
+    if not tabelas or not _ativo(conn):
+        return
+    conn.execute(
+        versoes_dados.update()
+        .where(versoes_dados.c.tabela.in_(tabelas))
+        .values(versao=versoes_dados.c.versao + 1, atualizado_em=datetime.utcnow())
+    )
+
+
+def _anotar(session, tabelas):
+    tabelas = {t for t in tabelas if t in TABELAS_MONITORADAS}
+    if tabelas:
+        engine = session.connection().engine
+        session.info.setdefault("versoes_pendentes", {}).setdefault(engine, set()).update(tabelas)
+
+
+def _apos_flush(session, flush_context):
+    tabelas = set()
+    for obj in session.new | session.deleted:
+        tabelas.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tabelas.add(obj.__table__.name)
+    _anotar(session, tabelas)
+
+
+def _ao_executar(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabela = getattr(estado.statement, "table", None)
+    nome = getattr(tabela, "name", None)
+    if nome:
+        _anotar(estado.session, {nome})
+
+
+def _apos_commit(session):
+    pendentes = session.info.pop("versoes_pendentes", None)
+    for engine, tabelas in (pendentes or {}).items():
+        try:
+            with engine.begin() as conn:
+                _incrementar(conn, tabelas)
+        except Exception:
+            # os dados já foram gravados; o cache se corrige pelo TTL
+            current_app.logger.exception("versoes: falha ao incrementar %s", sorted(tabelas))
+
+
+def _apos_rollback(session):
+    session.info.pop("versoes_pendentes", None)
+
+
+def init_versoes():
+    """Liga os eventos (uma vez por processo)."""
+    if not event.contains(Session, "after_flush", _apos_flush):
+        event.listen(Session, "after_flush", _apos_flush)
+        event.listen(Session, "do_orm_execute", _ao_executar)
+        event.listen(Session, "after_commit", _apos_commit)
+        event.listen(Session, "after_rollback", _apos_rollback)
+
+
+def versoes(tabelas) -> dict:
+    """{tabela: (versao, atualizado_em)} das tabelas pedidas, num SELECT só."""
+    linhas = db.session.execute(
+        db.select(versoes_dados.c.tabela, versoes_dados.c.versao, versoes_dados.c.atualizado_em)
+        .where(versoes_dados.c.tabela.in_(list(tabelas)))
+    )
+    return {t: (v, em) for t, v, em in linhas}
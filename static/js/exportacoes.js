@@ -0,0 +1,59 @@
+// Exportações grandes: "preparar e depois baixar".
+// Botões com data-preparar enfileiram a exportação (POST), acompanham o
+// status e iniciam o download quando o arquivo fica pronto.
+document.addEventListener('DOMContentLoaded', function () {
+    const botoes = document.querySelectorAll('a[data-preparar]');
+    if (!botoes.length) return;
+
+    const INTERVALO_MS = 1500;
+
+    function acompanhar(botao, textoOriginal, statusUrl) {
+        fetch(statusUrl, { credentials: 'same-origin' })
+            .then(resp => resp.json())
+            .then(dados => {
+                if (dados.status === 'CONCLUIDA') {
+                    botao.textContent = textoOriginal;
+                    botao.classList.remove('disabled');
+                    window.location = dados.download_url;
+                    return;
+                }
+                if (dados.status === 'ERRO' || dados.erro) {
+                    botao.textContent = textoOriginal;
+                    botao.classList.remove('disabled');
+                    alert('Não foi possível gerar a exportação: ' + (dados.erro || 'erro desconhecido'));
+                    return;
+                }
+                const pct = dados.percentual !== null && dados.percentual !== undefined
+                    ? ' ' + dados.percentual + '%'
+                    : '';
+                botao.textContent = 'Preparando' + pct + '…';
+                setTimeout(() => acompanhar(botao, textoOriginal, statusUrl), INTERVALO_MS);
+            })
+            .catch(() => {
+                setTimeout(() => acompanhar(botao, textoOriginal, statusUrl), INTERVALO_MS * 2);
+            });
+    }
+
+    botoes.forEach(botao => {
+        botao.addEventListener('click', function (ev) {
+            ev.preventDefault();
+            if (botao.classList.contains('disabled')) return;
+
+            const textoOriginal = botao.textContent.trim();
+            botao.classList.add('disabled');
+            botao.textContent = 'Preparando…';
+
+            fetch(botao.dataset.preparar, { method: 'POST', credentials: 'same-origin' })
+                .then(resp => resp.json().then(dados => ({ ok: resp.ok, dados })))
+                .then(({ ok, dados }) => {
+                    if (!ok) throw new Error(dados.erro || 'falha ao enfileirar');
+                    acompanhar(botao, textoOriginal, dados.status_url);
+                })
+                .catch(err => {
+                    botao.textContent = textoOriginal;
+                    botao.classList.remove('disabled');
+                    alert('Não foi possível preparar a exportação: ' + err.message);
+                });
+        });
+    });
+});
@@ -0,0 +1,111 @@
+// Fila local (IndexedDB) das alterações de presença ainda não sincronizadas.
+// Usada pela página da chamada (presencas_offline.js) e pelo service worker
+// (sw_presencas.js). Uma entrada por atividade/atleta: a alteração mais
+// nova substitui a que ainda não foi enviada.
+(function (global) {
+    const BANCO = 'presencas-offline';
+    const LOJA = 'fila';
+    const LOTE = 100;
+
+    let conexao = null;
+    let emAndamento = null;
+
+    function abrir() {
+        if (!conexao) {
+            conexao = new Promise(function (ok, erro) {
+                const req = indexedDB.open(BANCO, 1);
+                req.onupgradeneeded = () => req.result.createObjectStore(LOJA, { keyPath: 'chave' });
+                req.onsuccess = () => ok(req.result);
+                req.onerror = () => erro(req.error);
+            });
+        }
+        return conexao;
+    }
+
+    // roda fn(loja) numa transação; resolve com o resultado do pedido que fn devolver
+    function transacao(modo, fn) {
+        return abrir().then(banco => new Promise(function (ok, erro) {
+            const tx = banco.transaction(LOJA, modo);
+            const pedido = fn(tx.objectStore(LOJA));
+            tx.oncomplete = () => ok(pedido && 'result' in pedido ? pedido.result : pedido);
+            tx.onerror = () => erro(tx.error);
+        }));
+    }
+
+    function adicionar(alteracao) {
+        const entrada = Object.assign({ chave: alteracao.atividade_id + ':' + alteracao.atleta_id }, alteracao);
+        return transacao('readwrite', loja => loja.put(entrada));
+    }
+
+    function todas() {
+        return transacao('readonly', loja => loja.getAll());
+    }
+
+    function contar() {
+        return transacao('readonly', loja => loja.count());
+    }
+
+    // apaga as entradas respondidas pelo servidor (se não foram trocadas
+    // por uma alteração mais nova enquanto o lote estava na rede)
+    function remover(ids) {
+        const contagem = { removidas: 0 };
+        return transacao('readwrite', function (loja) {
+            loja.openCursor().onsuccess = function (ev) {
+                const cursor = ev.target.result;
+                if (!cursor) return;
+                if (ids.has(cursor.value.id)) {
+                    cursor.delete();
+                    contagem.removidas += 1;
+                }
+                cursor.continue();
+            };
+            return null;
+        }).then(() => contagem.removidas);
+    }
+
+    // envia a fila em lotes; resolve com os totais por situação
+    function sincronizar(url) {
+        if (emAndamento) return emAndamento;
+        const totais = { aplicada: 0, superada: 0, repetida: 0, invalida: 0 };
+
+        function proximo() {
+            return todas().then(function (itens) {
+                if (!itens.length) return totais;
+                const lote = itens.slice(0, LOTE).map(function (item) {
+                    const alteracao = Object.assign({}, item);
+                    delete alteracao.chave;
+                    return alteracao;
+                });
+                return fetch(url, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ alteracoes: lote }),
+                })
+                    .then(function (resp) {
+                        // sessão expirada cai na tela de login (HTML)
+                        const tipo = resp.headers.get('Content-Type') || '';
+                        if (!resp.ok || tipo.indexOf('json') === -1) throw new Error('HTTP ' + resp.status);
+                        return resp.json();
+                    })
+                    .then(function (dados) {
+                        const respondidas = new Set();
+                        dados.resultados.forEach(function (r) {
+                            respondidas.add(r.id);
+                            totais[r.situacao] = (totais[r.situacao] || 0) + 1;
+                        });
+                        return remover(respondidas);
+                    })
+                    .then(function (removidas) {
+                        if (!removidas) throw new Error('lote sem resposta aproveitável');
+                        return proximo();
+                    });
+            });
+        }
+
+        emAndamento = proximo().finally(() => { emAndamento = null; });
+        return emAndamento;
+    }
+
+    global.FilaPresencas = { adicionar, todas, contar, sincronizar };
+})(self);
@@ -0,0 +1,132 @@
+// Chamada com sinal ruim: cada alteração na tela vai para a fila local
+// (presencas_fila.js) e é enviada em lotes para /atividades/presencas/sincronizar
+// quando há conexão. O service worker (sw_presencas.js) guarda a página para
+// abrir sem sinal e, onde o navegador permite, envia a fila em segundo plano.
+//
+// Marcação: <form data-presencas-offline data-atividade-id data-sync-url
+//                data-sw-url> com <tr data-atleta-id> por atleta
+// e um elemento .presencas-sync-aviso para o status.
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.querySelector('form[data-presencas-offline]');
+    if (!form || !window.indexedDB || !window.fetch) return;  // fica o POST normal
+
+    const ESPERA_MS = 1500;
+    const atividadeId = Number(form.dataset.atividadeId);
+    const urlSync = form.dataset.syncUrl;
+    const aviso = form.querySelector('.presencas-sync-aviso');
+    const linhas = Array.from(form.querySelectorAll('tr[data-atleta-id]'));
+
+    let espera = null;
+    const enviado = {};  // atleta_id -> último estado posto na fila
+
+    function estado(tr) {
+        const marcado = tr.querySelector('input[type=radio]:checked');
+        const obs = tr.querySelector('input[type=text]');
+        return {
+            status: marcado ? marcado.value : null,
+            observacao: (obs && obs.value.trim()) || null,
+        };
+    }
+
+    function novoId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
+    function mostrar(texto) {
+        if (aviso) aviso.textContent = texto;
+    }
+
+    function atualizarAviso() {
+        return FilaPresencas.contar().then(function (n) {
+            if (n) mostrar(n + ' alteração(ões) aguardando conexão.');
+        });
+    }
+
+    function pedirSincronizacaoEmSegundoPlano() {
+        if (!('serviceWorker' in navigator)) return;
+        navigator.serviceWorker.ready
+            .then(reg => reg.sync && reg.sync.register('presencas'))
+            .catch(() => {});
+    }
+
+    function sincronizar() {
+        clearTimeout(espera);
+        if (!navigator.onLine) {
+            pedirSincronizacaoEmSegundoPlano();
+            return atualizarAviso();
+        }
+        mostrar('Sincronizando…');
+        return FilaPresencas.sincronizar(urlSync)
+            .then(function (totais) {
+                let texto = 'Presenças sincronizadas.';
+                if (totais.superada) texto += ' ' + totais.superada + ' já tinha(m) alteração mais recente.';
+                if (totais.invalida) texto += ' ' + totais.invalida + ' recusada(s) pelo servidor.';
+                mostrar(texto);
+            })
+            .catch(function () {
+                pedirSincronizacaoEmSegundoPlano();
+                return atualizarAviso();
+            });
+    }
+
+    function registrar(tr) {
+        const atletaId = Number(tr.dataset.atletaId);
+        const atual = estado(tr);
+        const chave = JSON.stringify(atual);
+        if (!atual.status || enviado[atletaId] === chave) return Promise.resolve(false);
+        enviado[atletaId] = chave;
+        return FilaPresencas.adicionar({
+            id: novoId(),
+            atividade_id: atividadeId,
+            atleta_id: atletaId,
+            status: atual.status,
+            observacao: atual.observacao,
+            em: new Date().toISOString(),
+        }).then(() => true);
+    }
+
+    function aplicarPendentes(pendentes) {
+        // página aberta do cache: mostra o que ainda está na fila
+        pendentes
+            .filter(p => p.atividade_id === atividadeId)
+            .forEach(function (p) {
+                const tr = form.querySelector('tr[data-atleta-id="' + p.atleta_id + '"]');
+                if (!tr) return;
+                const radio = tr.querySelector('input[type=radio][value="' + p.status + '"]');
+                if (radio) radio.checked = true;
+                const obs = tr.querySelector('input[type=text]');
+                if (obs) obs.value = p.observacao || '';
+            });
+    }
+
+    linhas.forEach(function (tr) {
+        tr.addEventListener('change', function () {
+            registrar(tr).then(function (entrou) {
+                if (!entrou) return;
+                atualizarAviso();
+                clearTimeout(espera);
+                espera = setTimeout(sincronizar, ESPERA_MS);
+            });
+        });
+    });
+
+    form.addEventListener('submit', function (ev) {
+        ev.preventDefault();
+        Promise.all(linhas.map(registrar)).then(sincronizar);
+    });
+
+    window.addEventListener('online', sincronizar);
+
+    if ('serviceWorker' in navigator && form.dataset.swUrl) {
+        navigator.serviceWorker
+            .register(form.dataset.swUrl)  // escopo: /atividades/
+            .catch(() => {});
+    }
+
+    FilaPresencas.todas().then(function (pendentes) {
+        aplicarPendentes(pendentes);
+        linhas.forEach(tr => { enviado[Number(tr.dataset.atletaId)] = JSON.stringify(estado(tr)); });
+        if (pendentes.length) sincronizar();
+    });
+});
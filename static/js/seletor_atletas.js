@@ -0,0 +1,152 @@
+// Seletor de atletas com busca (typeahead).
+// Campo de texto + hidden com o id; a lista vem de /busca/atletas conforme
+// a pessoa digita (nome ou começo do CPF), 10 por vez, com "Mostrar mais".
+//
+// Marcação:
+// <div class="seletor-atletas" data-seletor-atletas data-url="/busca/atletas">
+//     <input type="hidden" name="atleta_id">
+//     <input type="text" class="form-control">
+//     <ul class="seletor-atletas-lista" hidden></ul>
+// </div>
+document.addEventListener('DOMContentLoaded', function () {
+    const ESPERA_MS = 250;
+    const POR_PAGINA = 10;
+
+    document.querySelectorAll('[data-seletor-atletas]').forEach(function (caixa) {
+        const url = caixa.dataset.url;
+        const campoId = caixa.querySelector('input[type=hidden]');
+        const campoTexto = caixa.querySelector('input[type=text]');
+        const lista = caixa.querySelector('.seletor-atletas-lista');
+        const MENSAGEM = 'Selecione um atleta da lista.';
+
+        let espera = null;
+        let sequencia = 0;   // descarta respostas que chegaram fora de ordem
+        let ativo = -1;      // item destacado pelo teclado
+
+        function validar() {
+            campoTexto.setCustomValidity(campoId.value ? '' : MENSAGEM);
+        }
+
+        function fechar() {
+            lista.hidden = true;
+            ativo = -1;
+        }
+
+        function opcoes() {
+            return Array.from(lista.querySelectorAll('li[data-id]'));
+        }
+
+        function destacar(indice) {
+            const itens = opcoes();
+            if (!itens.length) return;
+            ativo = (indice + itens.length) % itens.length;
+            itens.forEach((li, i) => li.classList.toggle('ativo', i === ativo));
+            itens[ativo].scrollIntoView({ block: 'nearest' });
+        }
+
+        function escolher(li) {
+            campoId.value = li.dataset.id;
+            campoTexto.value = li.dataset.nome;
+            validar();
+            fechar();
+        }
+
+        function descricao(item) {
+            const partes = [];
+            if (item.idade !== null && item.idade !== undefined) partes.push(item.idade + ' anos');
+            if (item.responsavel) partes.push('resp. ' + item.responsavel);
+            return partes.join(' · ');
+        }
+
+        function mostrar(dados, acrescentar) {
+            if (!acrescentar) lista.innerHTML = '';
+            const mais = lista.querySelector('li.mais');
+            if (mais) mais.remove();
+
+            dados.itens.forEach(function (item) {
+                const li = document.createElement('li');
+                li.dataset.id = item.id;
+                li.dataset.nome = item.nome;
+                const nome = document.createElement('strong');
+                nome.textContent = item.nome;
+                const extra = document.createElement('small');
+                extra.textContent = descricao(item);
+                li.append(nome, extra);
+                lista.appendChild(li);
+            });
+
+            if (!lista.children.length) {
+                const vazio = document.createElement('li');
+                vazio.className = 'vazio';
+                vazio.textContent = 'Nenhum atleta encontrado.';
+                lista.appendChild(vazio);
+            }
+
+            if (dados.proximo) {
+                const li = document.createElement('li');
+                li.className = 'mais';
+                li.dataset.cursor = dados.proximo;
+                li.textContent = 'Mostrar mais…';
+                lista.appendChild(li);
+            }
+            lista.hidden = false;
+        }
+
+        function carregar(cursor) {
+            const q = campoTexto.value.trim();
+            if (!q) {
+                fechar();
+                return;
+            }
+            const params = new URLSearchParams({ q: q, limite: POR_PAGINA });
+            if (cursor) params.set('cursor', cursor);
+            const minha = ++sequencia;
+
+            fetch(url + '?' + params.toString(), { credentials: 'same-origin' })
+                .then(resp => resp.json())
+                .then(dados => {
+                    if (minha !== sequencia) return;
+                    mostrar(dados, Boolean(cursor));
+                })
+                .catch(() => {});
+        }
+
+        campoTexto.addEventListener('input', function () {
+            campoId.value = '';
+            validar();
+            clearTimeout(espera);
+            espera = setTimeout(() => carregar(null), ESPERA_MS);
+        });
+
+        campoTexto.addEventListener('keydown', function (ev) {
+            if (lista.hidden) return;
+            if (ev.key === 'ArrowDown') {
+                ev.preventDefault();
+                destacar(ativo + 1);
+            } else if (ev.key === 'ArrowUp') {
+                ev.preventDefault();
+                destacar(ativo - 1);
+            } else if (ev.key === 'Enter' && ativo >= 0) {
+                ev.preventDefault();
+                escolher(opcoes()[ativo]);
+            } else if (ev.key === 'Escape') {
+                fechar();
+            }
+        });
+
+        // mousedown (e não click) para escolher antes do blur fechar a lista
+        lista.addEventListener('mousedown', function (ev) {
+            const li = ev.target.closest('li');
+            if (!li) return;
+            ev.preventDefault();
+            if (li.classList.contains('mais')) {
+                carregar(li.dataset.cursor);
+            } else if (li.dataset.id) {
+                escolher(li);
+            }
+        });
+
+        campoTexto.addEventListener('blur', fechar);
+        validar();
+    });
+});
@@ -0,0 +1,72 @@
+// Service worker da chamada offline (servido em /atividades/sw.js).
+// - Páginas de presença: rede primeiro; sem sinal, a última cópia aberta.
+// - Arquivos estáticos: cópia local, atualizada em segundo plano.
+// - Background Sync "presencas": envia a fila local (presencas_fila.js).
+importScripts('/static/js/presencas_fila.js');
+
+const CACHE = 'presencas-v1';
+const ESTATICOS = [
+    '/static/css/style.css',
+    '/static/js/presencas_fila.js',
+    '/static/js/presencas_offline.js',
+];
+const PAGINA_PRESENCAS = /\/atividades\/\d+\/presencas$/;
+
+self.addEventListener('install', function (ev) {
+    ev.waitUntil(caches.open(CACHE).then(cache => cache.addAll(ESTATICOS)));
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function (ev) {
+    ev.waitUntil(
+        caches.keys()
+            .then(nomes => Promise.all(nomes.filter(n => n !== CACHE).map(n => caches.delete(n))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', function (ev) {
+    const req = ev.request;
+    if (req.method !== 'GET') return;
+    const url = new URL(req.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (req.mode === 'navigate' && PAGINA_PRESENCAS.test(url.pathname)) {
+        ev.respondWith(
+            fetch(req)
+                .then(function (resp) {
+                    // redirecionamento = sessão expirada: não guarda a tela de login
+                    if (resp.ok && !resp.redirected) {
+                        const copia = resp.clone();
+                        caches.open(CACHE).then(cache => cache.put(req, copia));
+                    }
+                    return resp;
+                })
+                .catch(() => caches.match(req))
+        );
+        return;
+    }
+
+    if (url.pathname.startsWith('/static/')) {
+        ev.respondWith(
+            caches.match(req).then(function (local) {
+                const rede = fetch(req).then(function (resp) {
+                    if (resp.ok) {
+                        const copia = resp.clone();
+                        caches.open(CACHE).then(cache => cache.put(req, copia));
+                    }
+                    return resp;
+                });
+                if (!local) return rede;
+                rede.catch(() => {});  // sem sinal: fica a cópia local
+                return local;
+            })
+        );
+    }
+});
+
+self.addEventListener('sync', function (ev) {
+    if (ev.tag === 'presencas') {
+        ev.waitUntil(FilaPresencas.sincronizar(new URL('presencas/sincronizar', self.registration.scope).href));
+    }
+});